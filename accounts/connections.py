@@ -0,0 +1,62 @@
+"""
+A user's hearts sent, hearts received and friends, one keyset page at a time.
+
+Each list is paged newest first on its own timestamp (``Crush.timestamp``,
+``Friendship.created_at``) through feed.pagination, and each row comes back
+with ``other`` (the user shown on the card) and ``since`` set. The other
+user and their questionnaire are joined in the same query, so a page is one
+query however many cards it holds.
+
+Friends are read from ``Friendship``; ``sync_friendship`` keeps it in step
+with mutual crushes.
+"""
+from django.db.models import Q
+
+from feed.pagination import keyset_page
+
+from .models import Crush, Friendship
+
+
+def _hearts_sent(user):
+    return Crush.objects.filter(sender=user, is_mutual=False).select_related('receiver__questionnaire')
+
+
+def _hearts_received(user):
+    return Crush.objects.filter(receiver=user, is_mutual=False).select_related('sender__questionnaire')
+
+
+def _friendships(user):
+    return Friendship.objects.filter(Q(user1=user) | Q(user2=user)).select_related(
+        'user1__questionnaire', 'user2__questionnaire',
+    )
+
+
+# kind: (queryset for a user, ordering field, the other user of a row given the viewing user)
+LISTS = {
+    'hearts_sent': (_hearts_sent, 'timestamp', lambda crush, user: crush.receiver),
+    'hearts_received': (_hearts_received, 'timestamp', lambda crush, user: crush.sender),
+    'friends': (
+        _friendships, 'created_at',
+        lambda friendship, user: friendship.user2 if friendship.user1_id == user.pk else friendship.user1,
+    ),
+}
+
+
+def connection_page(user, kind, cursor=None, page_size=24):
+    """Returns ``(rows, next_cursor)`` for one of ``LISTS``, newest first."""
+    queryset, field, other = LISTS[kind]
+    rows, next_cursor = keyset_page(queryset(user), field, cursor, page_size)
+    for row in rows:
+        row.other = other(row, user)
+        row.since = getattr(row, field)
+    return rows, next_cursor
+
+
+def sync_friendship(user, other):
+    """Creates or deletes the ``Friendship`` of two users to match whether their crushes are mutual."""
+    pair = Q(user1=user, user2=other) | Q(user1=other, user2=user)
+    if Crush.objects.filter(sender=user, receiver=other, is_mutual=True).exists():
+        if not Friendship.objects.filter(pair).exists():
+            Friendship.objects.create(user1=user, user2=other)
+    else:
+        Friendship.objects.filter(pair).delete()
@@ -0,0 +1,67 @@
+"""
+Compacts the profile-view rollups (see accounts/profile_views.py): hour
+buckets older than ``--hourly-days`` (``PROFILE_VIEW_HOURLY_DAYS``, default 7)
+are summed into day buckets, and day buckets older than ``--daily-days``
+(``PROFILE_VIEW_DAILY_DAYS``, default 365, 0 keeps them) are deleted.
+
+Each batch of users is compacted in its own short transaction, so the
+command can run alongside the site, e.g. nightly from cron. It is safe to
+rerun.
+
+Usage:
+    python manage.py compact_profile_views
+    python manage.py compact_profile_views --hourly-days 2 --daily-days 90
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import ProfileViewRollup
+from accounts.profile_views import compact_rollups
+
+
+def bucket_counts():
+    return {
+        period: ProfileViewRollup.objects.filter(period=period).count()
+        for period in (ProfileViewRollup.HOUR, ProfileViewRollup.DAY)
+    }
+
+
+class Command(BaseCommand):
+    help = "Folds old hourly profile-view rollups into daily ones and drops expired daily rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hourly-days', type=int, default=None, help="Keep hour buckets for this many days.")
+        parser.add_argument('--daily-days', type=int, default=None, help="Keep day buckets for this many days (0: forever).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Users compacted per transaction.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['hourly_days'] is not None and options['hourly_days'] < 1:
+            raise CommandError("--hourly-days must be at least 1; the last-24-hours trend reads hour buckets.")
+        if options['daily_days'] is not None and options['daily_days'] < 0:
+            raise CommandError("--daily-days cannot be negative.")
+
+        before = bucket_counts()
+        started = time.perf_counter()
+        result = compact_rollups(
+            hourly_days=options['hourly_days'], daily_days=options['daily_days'], batch_size=options['batch_size'],
+        )
+        report = {
+            **result,
+            'seconds': round(time.perf_counter() - started, 2),
+            'buckets_before': before,
+            'buckets_after': bucket_counts(),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"Folded {report['hours_folded']} hour buckets, expired {report['days_expired']} day buckets "
+            f"({report['seconds']}s)."
+        )
+        for period in before:
+            self.stdout.write(f"{period.capitalize() + ' buckets:':<14} {before[period]} -> {report['buckets_after'][period]}")
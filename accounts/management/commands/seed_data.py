@@ -0,0 +1,359 @@
+"""
+Synthetic data generator for performance work.
+
+Creates realistic users (with profiles and questionnaires), crushes,
+mutual friendships, posts with tiny images, likes, comments, confessions,
+profile views, chat messages and deleted chats at a configurable scale.
+Rows are bulk-inserted with timestamps spread over the last ``--days`` days
+so feed and inbox ordering behave like production data.
+
+Every seeded username starts with ``--prefix`` so a dataset can be removed
+again with ``--flush``.
+
+Usage:
+    python manage.py seed_data --users 1000
+    python manage.py seed_data --users 20000 --messages 1000000
+    python manage.py seed_data --flush
+"""
+import contextlib
+import io
+import itertools
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import (
+    COLLEGE_CHOICES, DEPARTMENT_CHOICES, GENDER_CHOICES, RELATIONSHIP_CHOICES,
+    Crush, Friendship, Profile, ProfileView, ProfileViewRollup, User, UserQuestionnaire,
+)
+from accounts.profile_views import hour_start, recount_profile_views
+from chat.models import DeletedChat, Message
+from feed.models import Comment, Confession, ConfessionComment, ConfessionLike, Like, Post
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kabir', 'Kavya', 'Meera', 'Neha',
+    'Nikhil', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Saanvi', 'Sahil', 'Sneha', 'Tanvi', 'Vivaan',
+]
+LAST_NAMES = [
+    'Agarwal', 'Bansal', 'Choudhary', 'Gupta', 'Jain', 'Kumar', 'Mehta', 'Rathore', 'Sharma', 'Singh',
+]
+PERSONALITIES = ['Introvert', 'Extrovert', 'A mix of both']
+COMM_STYLES = ['Mostly texting', 'Voice & video calls', 'A bit of everything']
+HOBBIES = ['Gaming', 'Music', 'Movies & Shows', 'Coding', 'Sports', 'Art & Design', 'Reading', 'Travel', 'Foodie']
+YEARS = ['1st Year', '2nd Year', '3rd Year', 'Final Year', 'Postgraduate']
+STATUSES = ['Single', 'Taken', "It's Complicated", 'Focusing on me']
+WORDS = (
+    'campus canteen exam lab library fest hostel chai coffee project semester placement '
+    'weekend friends music movie cricket assignment lecture notes sunset rain trip playlist '
+    'coding hackathon deadline vibes crush class bus morning night'
+).split()
+
+TILE_COLORS = ['#1e88e5', '#e53935', '#43a047', '#fb8c00', '#8e24aa', '#00acc1', '#fdd835', '#6d4c41']
+
+
+def _sentence(rng, low=4, high=14):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize() + rng.choice(['.', '!', '?', ' :)', ''])
+
+
+def _tiles(folder):
+    """Writes a handful of tiny PNGs to storage once and returns their names."""
+    from PIL import Image
+
+    names = []
+    for i, color in enumerate(TILE_COLORS):
+        name = f'{folder}/seed/tile_{i}.png'
+        if not default_storage.exists(name):
+            buffer = io.BytesIO()
+            Image.new('RGB', (16, 16), color).save(buffer, format='PNG')
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+@contextlib.contextmanager
+def _manual_timestamps(*fields):
+    """Lets bulk_create keep explicit values for ``auto_now_add`` fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+class Command(BaseCommand):
+    help = "Generates a realistic synthetic dataset (users, social graph, posts, confessions, chats) for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users to create.")
+        parser.add_argument('--posts-per-user', type=float, default=3, help="Average posts per user.")
+        parser.add_argument('--likes-per-post', type=float, default=10, help="Average likes per post.")
+        parser.add_argument('--comments-per-post', type=float, default=3, help="Average comments per post.")
+        parser.add_argument('--confessions-per-user', type=float, default=1, help="Average confessions per user.")
+        parser.add_argument('--crushes-per-user', type=float, default=5, help="Average crushes sent per user.")
+        parser.add_argument('--mutual-rate', type=float, default=0.3, help="Share of crushes that are returned.")
+        parser.add_argument('--views-per-user', type=float, default=10, help="Average profiles viewed per user.")
+        parser.add_argument('--messages', type=int, default=20000, help="Total chat messages.")
+        parser.add_argument('--deleted-chat-rate', type=float, default=0.05, help="Share of conversations deleted by one side.")
+        parser.add_argument('--days', type=int, default=180, help="Spread timestamps over this many past days.")
+        parser.add_argument('--prefix', default='seed', help="Username prefix of generated users.")
+        parser.add_argument('--password', default='seedpass123', help="Password for every generated user.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per bulk insert.")
+        parser.add_argument('--random-seed', type=int, default=42, help="Seed for reproducible datasets.")
+        parser.add_argument('--flush', action='store_true', help="Delete previously seeded users (and their data) and exit.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix.isidentifier():
+            raise CommandError("--prefix must only contain letters, digits and underscores.")
+
+        existing = User.objects.filter(username__startswith=prefix)
+        if options['flush']:
+            deleted, _ = existing.delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} seeded rows."))
+            return
+        if existing.exists():
+            raise CommandError(f"Users prefixed {prefix!r} already exist; run with --flush first or pick another --prefix.")
+
+        self.rng = random.Random(options['random_seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+        self.options = options
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = self._users()
+            friend_pairs = self._crushes(users)
+            self._profile_views(users)
+            self._posts(users)
+            self._confessions(users)
+            self._messages(users, friend_pairs)
+        self.stdout.write(self.style.SUCCESS(f"Seeded dataset in {time.perf_counter() - started:.1f}s."))
+
+    # --------------------------------------------------------------------------
+    # Helpers
+    # --------------------------------------------------------------------------
+
+    def _when(self, after=None):
+        """Random timestamp within the seeding window, optionally after ``after``."""
+        start = after or self.now - timedelta(days=self.options['days'])
+        return start + (self.now - start) * self.rng.random()
+
+    def _count(self, average):
+        """Skewed per-item count with the given mean, so a few items are popular."""
+        return int(self.rng.expovariate(1 / average)) if average > 0 else 0
+
+    def _bulk(self, model, objs):
+        created = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.stdout.write(f"  {model.__name__:<18} {len(created):>9}")
+        return created
+
+    def _bulk_stream(self, model, objs):
+        """bulk_create for generators too large to hold in memory."""
+        total = 0
+        for chunk in iter(lambda: list(itertools.islice(objs, self.batch_size)), []):
+            model.objects.bulk_create(chunk)
+            total += len(chunk)
+        self.stdout.write(f"  {model.__name__:<18} {total:>9}")
+
+    # --------------------------------------------------------------------------
+    # Generators
+    # --------------------------------------------------------------------------
+
+    def _users(self):
+        rng, prefix = self.rng, self.options['prefix']
+        password = make_password(self.options['password'])
+        avatars = _tiles('profile_pics')
+
+        users = []
+        for i in range(self.options['users']):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f'{prefix}{i:06d}'
+            users.append(User(
+                username=username,
+                password=password,
+                first_name=first,
+                last_name=last,
+                full_name=f'{first} {last}',
+                college_email=f'{username}@poornima.org',
+                profile_picture=rng.choice(avatars),
+                bio=_sentence(rng),
+                college=rng.choice(COLLEGE_CHOICES)[0],
+                department=rng.choice(DEPARTMENT_CHOICES)[0],
+                gender=rng.choice(GENDER_CHOICES)[0],
+                dob=date(rng.randint(2000, 2006), rng.randint(1, 12), rng.randint(1, 28)),
+                date_joined=self._when(),
+                otp_verified=True,
+                has_answered_questionnaire=rng.random() < 0.9,
+                is_profile_locked=rng.random() < 0.5,
+            ))
+        users = self._bulk(User, users)
+
+        # bulk_create skips the post_save signal that normally creates these.
+        self._bulk(Profile, [
+            Profile(user=user, has_answered_questionnaire=user.has_answered_questionnaire) for user in users
+        ])
+        self._bulk(UserQuestionnaire, [
+            UserQuestionnaire(
+                user=user,
+                personality=rng.choice(PERSONALITIES),
+                communication_style=rng.choice(COMM_STYLES),
+                hobbies_interests=','.join(rng.sample(HOBBIES, rng.randint(1, 5))),
+                year=rng.choice(YEARS),
+                relationship_status=rng.choice(STATUSES),
+                looking_for=rng.choice(RELATIONSHIP_CHOICES)[0],
+            )
+            for user in users if user.has_answered_questionnaire
+        ])
+        return users
+
+    def _crushes(self, users):
+        """Creates crushes, returning some of them to make mutual pairs with a Friendship."""
+        rng = self.rng
+        crushes, friendships, friend_pairs, seen = [], [], [], set()
+        for sender in users:
+            for receiver in rng.sample(users, min(len(users) - 1, self._count(self.options['crushes_per_user']))):
+                if receiver.pk == sender.pk or (sender.pk, receiver.pk) in seen or (receiver.pk, sender.pk) in seen:
+                    continue
+                sent_at = self._when(sender.date_joined)
+                mutual = rng.random() < self.options['mutual_rate']
+                seen.add((sender.pk, receiver.pk))
+                crushes.append(Crush(sender=sender, receiver=receiver, is_mutual=mutual, timestamp=sent_at))
+                if mutual:
+                    returned_at = self._when(sent_at)
+                    crushes.append(Crush(sender=receiver, receiver=sender, is_mutual=True, timestamp=returned_at))
+                    friendships.append(Friendship(user1=sender, user2=receiver, created_at=returned_at, confirmed_at=returned_at))
+                    friend_pairs.append((sender, receiver))
+
+        with _manual_timestamps(_field(Crush, 'timestamp'), _field(Friendship, 'created_at')):
+            self._bulk(Crush, crushes)
+            self._bulk(Friendship, friendships)
+        return friend_pairs
+
+    def _profile_views(self, users):
+        views, rollups = [], {}
+        for viewer in users:
+            for viewed in self.rng.sample(users, min(len(users), self._count(self.options['views_per_user']))):
+                if viewed.pk != viewer.pk:
+                    # Some profiles get revisited; the row keeps the last visit, the rollups count them all.
+                    visits = [self._when(viewer.date_joined)]
+                    for _ in range(self.rng.randrange(3)):
+                        visits.append(self._when(visits[-1]))
+                    views.append(ProfileView(viewer=viewer, viewed=viewed, timestamp=visits[-1]))
+                    for i, when in enumerate(visits):
+                        rollup = rollups.setdefault((viewed.pk, hour_start(when)), [0, 0])
+                        rollup[0] += 1
+                        rollup[1] += i == 0
+        self._bulk(ProfileView, views)
+        self._bulk(ProfileViewRollup, [
+            ProfileViewRollup(user_id=user_id, period=ProfileViewRollup.HOUR, bucket=bucket, views=n, new_viewers=new)
+            for (user_id, bucket), (n, new) in rollups.items()
+        ])
+        recount_profile_views([user.pk for user in users])
+
+    def _posts(self, users):
+        rng = self.rng
+        images = _tiles('posts')
+
+        posts, likers, comment_counts = [], [], []
+        for user in users:
+            for _ in range(self._count(self.options['posts_per_user'])):
+                liked_by = rng.sample(users, min(len(users), self._count(self.options['likes_per_post'])))
+                comments = self._count(self.options['comments_per_post'])
+                posts.append(Post(
+                    user=user,
+                    image=rng.choice(images),
+                    caption=_sentence(rng),
+                    created_at=self._when(user.date_joined),
+                    is_public=rng.random() < 0.6,
+                    # Counters are set up front because bulk_create skips the signals that maintain them.
+                    like_count=len(liked_by),
+                    comment_count=comments,
+                ))
+                likers.append(liked_by)
+                comment_counts.append(comments)
+        posts = self._bulk(Post, posts)
+
+        with _manual_timestamps(_field(Like, 'created_at'), _field(Comment, 'created_at')):
+            self._bulk(Like, [
+                Like(post=post, user=user, created_at=self._when(post.created_at))
+                for post, liked_by in zip(posts, likers) for user in liked_by
+            ])
+            self._bulk(Comment, [
+                Comment(post=post, user=rng.choice(users), content=_sentence(rng), created_at=self._when(post.created_at))
+                for post, comments in zip(posts, comment_counts) for _ in range(comments)
+            ])
+
+    def _confessions(self, users):
+        rng = self.rng
+        confessions, likers, comment_counts = [], [], []
+        for user in users:
+            for _ in range(self._count(self.options['confessions_per_user'])):
+                liked_by = rng.sample(users, min(len(users), self._count(self.options['likes_per_post'])))
+                comments = self._count(self.options['comments_per_post'])
+                confessions.append(Confession(
+                    user=user,
+                    content=_sentence(rng, 8, 40),
+                    is_anonymous=rng.random() < 0.8,
+                    created_at=self._when(user.date_joined),
+                    like_count=len(liked_by),
+                    comment_count=comments,
+                ))
+                likers.append(liked_by)
+                comment_counts.append(comments)
+
+        fields = [_field(Confession, 'created_at'), _field(ConfessionLike, 'created_at'), _field(ConfessionComment, 'created_at')]
+        with _manual_timestamps(*fields):
+            confessions = self._bulk(Confession, confessions)
+            self._bulk(ConfessionLike, [
+                ConfessionLike(confession=confession, user=user, created_at=self._when(confession.created_at))
+                for confession, liked_by in zip(confessions, likers) for user in liked_by
+            ])
+            self._bulk(ConfessionComment, [
+                ConfessionComment(
+                    confession=confession, user=rng.choice(users), content=_sentence(rng),
+                    is_anonymous=rng.random() < 0.5, created_at=self._when(confession.created_at),
+                )
+                for confession, comments in zip(confessions, comment_counts) for _ in range(comments)
+            ])
+
+    def _messages(self, users, friend_pairs):
+        """Spreads messages over friend pairs plus random pairs, with a few very busy conversations."""
+        rng = self.rng
+        total = self.options['messages']
+        if total <= 0 or len(users) < 2:
+            return
+
+        conversations = list(friend_pairs) + [tuple(rng.sample(users, 2)) for _ in range(len(users))]
+        weights = [rng.paretovariate(1.2) for _ in conversations]
+        window = timedelta(days=self.options['days']).total_seconds()
+
+        def generate():
+            for pair in rng.choices(conversations, weights=weights, k=total):
+                sender, receiver = pair if rng.random() < 0.5 else pair[::-1]
+                age = window * rng.random() ** 3  # Recent conversations are busier.
+                yield Message(
+                    sender=sender, receiver=receiver, content=_sentence(rng, 1, 12),
+                    timestamp=self.now - timedelta(seconds=age), read=age > 3600,
+                )
+
+        with _manual_timestamps(_field(Message, 'timestamp'), _field(DeletedChat, 'deleted_at')):
+            self._bulk_stream(Message, generate())
+            deleted = rng.sample(conversations, int(len(conversations) * self.options['deleted_chat_rate']))
+            self._bulk(DeletedChat, [
+                DeletedChat(user=user, other_user=other, deleted_at=self._when())
+                for user, other in {(a.pk, b.pk): (a, b) for a, b in deleted}.values()
+            ])
@@ -0,0 +1,14 @@
+"""
+Accounts metrics; see poornimax.metrics.
+"""
+from poornimax.metrics import Counter, Histogram
+
+OTP_SENDS = Counter('poornimax_accounts_otp_sends_total', "Login OTP emails, by result.", ['result'])
+OTP_VERIFICATIONS = Counter('poornimax_accounts_otp_verifications_total', "OTP checks, by result.", ['result'])
+SIGNUPS = Counter('poornimax_accounts_signups_total', "Accounts created.")
+PROFILE_VIEWS = Counter(
+    'poornimax_accounts_profile_views_total', "Profile views, by result (buffered, flushed, dropped).", ['result'],
+)
+PROFILE_VIEW_FLUSH_SECONDS = Histogram(
+    'poornimax_accounts_profile_view_flush_seconds', "Time to upsert one batch of buffered profile views.",
+)
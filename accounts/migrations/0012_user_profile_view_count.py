@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-19 18:16
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_profile_view_count(apps, schema_editor):
+    """Seeds the stored counter from the existing ProfileView rows (one per viewer)."""
+    User = apps.get_model('accounts', 'User')
+    ProfileView = apps.get_model('accounts', 'ProfileView')
+    counts = (ProfileView.objects.filter(viewed=OuterRef('pk'))
+              .order_by().values('viewed').annotate(n=Count('pk')).values('n'))
+    User.objects.update(profile_view_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_friendship_confirmed_at_alter_friendship_user1_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='profileview',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_profile_view_count, migrations.RunPython.noop),
+    ]
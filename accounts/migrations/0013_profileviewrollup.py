@@ -0,0 +1,41 @@
+# Generated by Django 5.0.2 on 2026-10-19 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_user_profile_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or day.')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('new_viewers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='profileview',
+            index=models.Index(fields=['viewed', '-timestamp', '-id'], name='accounts_pv_recent_idx'),
+        ),
+        migrations.AddField(
+            model_name='profileviewrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_view_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='profileviewrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'bucket', 'period'), name='accounts_pv_rollup_unique'),
+        ),
+    ]
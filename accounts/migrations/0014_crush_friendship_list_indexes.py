@@ -0,0 +1,66 @@
+# Generated by Django 5.0.2 on 2026-10-19 18:22
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Greatest
+
+
+def sync_friendships(apps, schema_editor):
+    """
+    The friends list now reads Friendship, which the profile page's crush
+    action never maintained: create one per mutual crush pair, dated when the
+    second crush was sent, and drop those whose crushes are no longer mutual.
+    """
+    Crush = apps.get_model('accounts', 'Crush')
+    Friendship = apps.get_model('accounts', 'Friendship')
+    # A mutual crush whose reverse row is gone would make Greatest NULL (on
+    # SQLite and MySQL) and leave the Friendship without a date.
+    mutual = {
+        (sender, receiver): since
+        for sender, receiver, since in Crush.objects.filter(is_mutual=True, sender__lt=models.F('receiver'))
+        .annotate(since=Greatest('timestamp', Coalesce(Crush.objects.filter(
+            sender=models.OuterRef('receiver'), receiver=models.OuterRef('sender'),
+        ).values('timestamp')[:1], 'timestamp'))).values_list('sender_id', 'receiver_id', 'since')
+    }
+    kept, stale = set(), []
+    for pk, user1, user2 in Friendship.objects.values_list('pk', 'user1_id', 'user2_id'):
+        pair = (min(user1, user2), max(user1, user2))
+        if pair in mutual and pair not in kept:
+            kept.add(pair)
+        else:
+            stale.append(pk)
+    Friendship.objects.filter(pk__in=stale).delete()
+    missing = {pair: since for pair, since in mutual.items() if pair not in kept}
+    # created_at is auto_now_add; bulk_update writes the real date afterwards.
+    created = Friendship.objects.bulk_create(
+        [Friendship(user1_id=user1, user2_id=user2) for user1, user2 in missing], batch_size=500,
+    )
+    for friendship, since in zip(created, missing.values()):
+        friendship.created_at = since
+    Friendship.objects.bulk_update(created, ['created_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_profileviewrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crush',
+            index=models.Index(fields=['sender', 'is_mutual', '-timestamp', '-id'], name='accounts_crush_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crush',
+            index=models.Index(fields=['receiver', 'is_mutual', '-timestamp', '-id'], name='accounts_crush_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user1', '-created_at', '-id'], name='accounts_friendship_user1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user2', '-created_at', '-id'], name='accounts_friendship_user2_idx'),
+        ),
+        migrations.RunPython(sync_friendships, migrations.RunPython.noop),
+    ]
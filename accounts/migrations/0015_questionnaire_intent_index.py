@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_crush_friendship_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userquestionnaire',
+            index=models.Index(fields=['relationship_status', 'looking_for', 'year'], name='accounts_q_intent_idx'),
+        ),
+    ]
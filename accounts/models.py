@@ -3,8 +3,10 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 # ==============================================================================
 # CHOICES CONSTANTS
@@ -67,6 +69,10 @@ class User(AbstractUser):
     has_answered_questionnaire = models.BooleanField(default=False)
     is_profile_locked = models.BooleanField(default=True, help_text="If true, profile is not publicly visible.")
 
+    # Denormalized: distinct users who have viewed this profile, kept up to
+    # date by accounts/profile_views.py when buffered views are flushed.
+    profile_view_count = models.PositiveIntegerField(default=0, editable=False)
+
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['college_email', 'full_name', 'dob', 'college', 'department', 'gender']
 
@@ -120,6 +126,12 @@ class UserQuestionnaire(models.Model):
     relationship_status = models.CharField(max_length=50, blank=True)
     looking_for = models.CharField(max_length=50, blank=True, choices=RELATIONSHIP_CHOICES)
 
+    class Meta:
+        # Candidates are counted and fetched per intent triple (feed/compatibility.py).
+        indexes = [
+            models.Index(fields=['relationship_status', 'looking_for', 'year'], name='accounts_q_intent_idx'),
+        ]
+
     def __str__(self):
         return f"Questionnaire for {self.user.username}"
 
@@ -136,6 +148,11 @@ class Crush(models.Model):
 
     class Meta:
         unique_together = ('sender', 'receiver')
+        # Serve the keyset-paged hearts lists (accounts/connections.py).
+        indexes = [
+            models.Index(fields=['sender', 'is_mutual', '-timestamp', '-id'], name='accounts_crush_sent_idx'),
+            models.Index(fields=['receiver', 'is_mutual', '-timestamp', '-id'], name='accounts_crush_received_idx'),
+        ]
         verbose_name = "Crush"
         verbose_name_plural = "Crushes"
 
@@ -167,6 +184,11 @@ class Friendship(models.Model):
 
     class Meta:
         unique_together = ('user1', 'user2')
+        # Serve the keyset-paged friends list (accounts/connections.py).
+        indexes = [
+            models.Index(fields=['user1', '-created_at', '-id'], name='accounts_friendship_user1_idx'),
+            models.Index(fields=['user2', '-created_at', '-id'], name='accounts_friendship_user2_idx'),
+        ]
         verbose_name = "Friendship"
         verbose_name_plural = "Friendships"
 
@@ -185,16 +207,59 @@ class Friendship(models.Model):
 # ==============================================================================
 
 class ProfileView(models.Model):
-    """Logs when a user views another user's profile."""
+    """
+    Logs when a user last viewed another user's profile. Recorded in batches
+    by accounts/profile_views.py, so ``timestamp`` is the time of the view,
+    not of the write.
+    """
     viewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile_views_made')
     viewed = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile_views_received')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ('viewer', 'viewed')
         ordering = ['-timestamp']
+        # Serves the "recent viewers" list, newest first, without a sort.
+        indexes = [models.Index(fields=['viewed', '-timestamp', '-id'], name='accounts_pv_recent_idx')]
         verbose_name = "Profile View"
         verbose_name_plural = "Profile Views"
 
     def __str__(self):
-        return f"{self.viewer.username} viewed {self.viewed.username}'s profile"
\ No newline at end of file
+        return f"{self.viewer.username} viewed {self.viewed.username}'s profile"
+
+
+@receiver(post_delete, sender=ProfileView)
+def decrement_profile_view_count(sender, instance, origin=None, **kwargs):
+    # Skip the update when the viewed user is being deleted.
+    if isinstance(origin, User) and origin.pk == instance.viewed_id:
+        return
+    User.objects.filter(pk=instance.viewed_id, profile_view_count__gt=0).update(
+        profile_view_count=F('profile_view_count') - 1
+    )
+
+
+class ProfileViewRollup(models.Model):
+    """
+    Views of a user's profile counted per hour or per day (UTC). Every visit
+    counts, repeats included; ``new_viewers`` counts first-time viewers. Hour
+    buckets are folded into day buckets once they age out; see
+    accounts/profile_views.py.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIOD_CHOICES = [(HOUR, 'Hour'), (DAY, 'Day')]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile_view_rollups')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour or day.")
+    views = models.PositiveIntegerField(default=0)
+    new_viewers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'bucket', 'period'], name='accounts_pv_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.period} {self.bucket:%Y-%m-%d %H:00}: {self.views} views"
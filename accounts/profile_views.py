@@ -0,0 +1,332 @@
+"""
+Buffered profile-view recording and view analytics.
+
+The profile page used to ``get_or_create`` a ``ProfileView`` on every visit:
+a SELECT plus an INSERT on the request path, and a timestamp that never
+moved after the first view. ``record_view`` now only notes the visit in an
+in-process buffer, where repeat views of the same pair collapse to their
+first and latest times. A background thread flushes the buffer every
+``PROFILE_VIEW_FLUSH_SECONDS`` (default 5), or sooner once it holds
+``PROFILE_VIEW_BUFFER_SIZE`` pairs, as one bulk upsert that refreshes
+``timestamp``. The insert reports which pairs it created, and the same
+flush adds those first-time viewers to the viewed user's
+``profile_view_count``, so "who viewed me" counts are a column read.
+
+Every visit, repeats included, is also tallied per viewed user and UTC hour
+in the buffer, and the flush adds the tallies to ``ProfileViewRollup`` hour
+buckets: one row per user and hour however many visits it had. Reads never
+touch the raw rows:
+
+* ``recent_viewers`` pages through ``ProfileView`` newest first on the
+  ``(viewed, timestamp)`` index;
+* ``view_trends`` sums at most two weeks of buckets for one user.
+
+``compact_rollups`` (``manage.py compact_profile_views``) folds hour buckets
+older than ``PROFILE_VIEW_HOURLY_DAYS`` (default 7) into day buckets and
+drops day buckets older than ``PROFILE_VIEW_DAILY_DAYS`` (default 365, 0
+keeps them).
+
+Views still buffered when a process is killed are lost; the buffer is
+flushed at normal interpreter exit. A flush that fails is put back in the
+buffer and retried with the next one, up to ``MAX_FLUSH_ATTEMPTS`` times. Writes go through
+``poornimax.write_queue`` so they queue behind chat messages on SQLite
+instead of competing for the lock.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter as Tally
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDay
+from django.utils import timezone
+
+from feed.pagination import keyset_page
+from poornimax.write_queue import run_write
+
+from .metrics import PROFILE_VIEW_FLUSH_SECONDS, PROFILE_VIEWS
+from .models import ProfileView, ProfileViewRollup
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+TREND_DAYS = 14
+# Rows per INSERT; three parameters each, under SQLite's old 999 limit.
+INSERT_BATCH = 300
+
+
+def hour_start(when):
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(when):
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+logger = logging.getLogger(__name__)
+
+MAX_FLUSH_ATTEMPTS = 5
+
+
+class ProfileViewBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # One flush at a time per process; across processes the writer's
+        # BEGIN IMMEDIATE (poornimax/write_queue.py) serializes them.
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._hits = Tally()
+        self._failures = 0
+        self._pid = None
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, viewer_id, viewed_id, when=None):
+        with self._lock:
+            self._ensure_started()
+            when = when or timezone.now()
+            first, _ = self._pending.get((viewer_id, viewed_id), (when, when))
+            self._pending[viewer_id, viewed_id] = (first, when)
+            self._hits[viewed_id, hour_start(when)] += 1
+            full = len(self._pending) >= getattr(settings, 'PROFILE_VIEW_BUFFER_SIZE', 1000)
+        PROFILE_VIEWS.inc(result='buffered')
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Writes everything buffered so far; returns the number of viewer/viewed pairs written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                hits, self._hits = self._hits, Tally()
+            if not pending:
+                return 0
+            try:
+                with PROFILE_VIEW_FLUSH_SECONDS.time():
+                    run_write(_upsert, pending, hits)
+            except Exception:
+                self._failures += 1
+                if self._failures >= MAX_FLUSH_ATTEMPTS:
+                    self._failures = 0
+                    PROFILE_VIEWS.inc(len(pending), result='dropped')
+                    logger.exception("Dropped buffered profile views", extra={'pairs': len(pending)})
+                else:
+                    self._requeue(pending, hits)
+                    PROFILE_VIEWS.inc(len(pending), result='requeued')
+                    logger.exception("Requeued buffered profile views", extra={'pairs': len(pending)})
+                return 0
+            self._failures = 0
+            PROFILE_VIEWS.inc(len(pending), result='flushed')
+            return len(pending)
+
+    def _requeue(self, pending, hits):
+        """Puts a failed batch back, merged with the visits buffered since."""
+        with self._lock:
+            for pair, (first, last) in pending.items():
+                newer_first, newer_last = self._pending.get(pair, (first, last))
+                self._pending[pair] = (min(first, newer_first), max(last, newer_last))
+            self._hits.update(hits)
+
+    def _ensure_started(self):
+        """Holds the lock."""
+        if self._pid != os.getpid():
+            # A forked worker starts empty; the parent flushes its own buffer.
+            self._pid = os.getpid()
+            self._flush_lock = threading.Lock()
+            self._pending = {}
+            self._hits = Tally()
+            self._failures = 0
+            self._thread = threading.Thread(target=self._flush_forever, name='profile-view-flusher', daemon=True)
+            self._thread.start()
+
+    def _flush_forever(self):
+        while True:
+            self._wake.wait(getattr(settings, 'PROFILE_VIEW_FLUSH_SECONDS', 5))
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+
+def _insert_new_pairs(pending):
+    """
+    Inserts the pairs of ``{(viewer_id, viewed_id): (first, last)}`` that have
+    no row yet, dated ``last``, and returns them. The insert itself decides
+    which pairs are new (ON CONFLICT DO NOTHING RETURNING), so two processes
+    flushing the same first visit cannot both count it.
+    """
+    quote = connection.ops.quote_name
+    fields = [ProfileView._meta.get_field(name) for name in ('viewer', 'viewed', 'timestamp')]
+    viewer, viewed, timestamp = (quote(field.column) for field in fields)
+    items = list(pending.items())
+    created = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), INSERT_BATCH):
+            batch = items[start:start + INSERT_BATCH]
+            params = []
+            for (viewer_id, viewed_id), (_, last) in batch:
+                params += [viewer_id, viewed_id, fields[2].get_db_prep_value(last, connection)]
+            cursor.execute(
+                f"INSERT INTO {quote(ProfileView._meta.db_table)} ({viewer}, {viewed}, {timestamp}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT ({viewer}, {viewed}) DO NOTHING RETURNING {viewer}, {viewed}",
+                params,
+            )
+            created.update(cursor.fetchall())
+    return created
+
+
+def _upsert(pending, hits):
+    """
+    Records ``{(viewer_id, viewed_id): (first, last)}`` visit times: new pairs
+    are inserted and counted, dated ``last``, and the others get ``last`` as
+    their timestamp. Adds ``{(viewed_id, hour): views}`` to the hour buckets,
+    with each new viewer in the hour of their first visit.
+
+    Writes come before any read, so on SQLite the transaction holds the write
+    lock from its first statement even outside the write queue.
+    """
+    User = get_user_model()
+    with transaction.atomic():
+        created = _insert_new_pairs(pending)
+        ProfileView.objects.bulk_create(
+            [ProfileView(viewer_id=viewer, viewed_id=viewed, timestamp=last)
+             for (viewer, viewed), (_, last) in pending.items() if (viewer, viewed) not in created],
+            update_conflicts=True, unique_fields=['viewer', 'viewed'], update_fields=['timestamp'], batch_size=500,
+        )
+        for viewed_id, count in Tally(viewed for _, viewed in created).items():
+            User.objects.filter(pk=viewed_id).update(profile_view_count=F('profile_view_count') + count)
+
+        # Either user may have deleted their account since the visit. Deleting
+        # the rows undoes their count (see the post_delete handler).
+        live = set(User.objects.filter(pk__in={pk for pair in pending for pk in pair}).values_list('pk', flat=True))
+        dead = {pk for pair in pending for pk in pair} - live
+        if dead:
+            ProfileView.objects.filter(Q(viewer_id__in=dead) | Q(viewed_id__in=dead)).delete()
+
+        new_viewers = Tally(
+            (viewed, hour_start(pending[viewer, viewed][0]))
+            for viewer, viewed in created if viewer in live and viewed in live
+        )
+        _add_to_rollups(ProfileViewRollup.HOUR, {
+            key: (hits[key], new_viewers[key]) for key in hits.keys() | new_viewers.keys() if key[0] in live
+        })
+
+
+def _add_to_rollups(period, counts):
+    """Adds ``{(user_id, bucket): (views, new_viewers)}`` to the ``period`` buckets; call inside a transaction."""
+    # Create missing buckets empty, then increment, so concurrent flushes add up instead of overwriting.
+    ProfileViewRollup.objects.bulk_create(
+        [ProfileViewRollup(user_id=user_id, period=period, bucket=bucket) for user_id, bucket in counts],
+        ignore_conflicts=True, batch_size=500,
+    )
+    for (user_id, bucket), (views, new_viewers) in counts.items():
+        ProfileViewRollup.objects.filter(user_id=user_id, period=period, bucket=bucket).update(
+            views=F('views') + views, new_viewers=F('new_viewers') + new_viewers,
+        )
+
+
+def recount_profile_views(user_ids=None):
+    """Recomputes ``profile_view_count`` from the ``ProfileView`` rows, e.g. after a bulk import."""
+    User = get_user_model()
+    counts = (ProfileView.objects.filter(viewed=OuterRef('pk'))
+              .order_by().values('viewed').annotate(n=Count('pk')).values('n'))
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    return users.update(profile_view_count=Coalesce(Subquery(counts), 0))
+
+
+def recent_viewers(user, cursor=None, page_size=20):
+    """Returns ``(profile_views, next_cursor)``: who viewed ``user`` most recently, newest first."""
+    return keyset_page(
+        ProfileView.objects.filter(viewed=user).select_related('viewer'), 'timestamp', cursor, page_size,
+    )
+
+
+def view_trends(user, now=None):
+    """
+    View totals for ``user`` from the rollups: the last 24 hours, this week
+    against the week before (UTC days, today included) and a daily series.
+    """
+    now = now or timezone.now()
+    today = day_start(now)
+    since = today - (TREND_DAYS - 1) * DAY
+    days = {since + i * DAY: [0, 0] for i in range(TREND_DAYS)}
+    last_24_hours = 0
+    rows = ProfileViewRollup.objects.filter(user=user, bucket__gte=since).values_list(
+        'period', 'bucket', 'views', 'new_viewers',
+    )
+    for period, bucket, views, new_viewers in rows:
+        totals = days.get(day_start(bucket))
+        if totals is None:
+            continue
+        totals[0] += views
+        totals[1] += new_viewers
+        if period == ProfileViewRollup.HOUR and bucket > now - DAY:
+            last_24_hours += views
+
+    series = [{'date': day.date(), 'views': views, 'new_viewers': new} for day, (views, new) in days.items()]
+    this_week = sum(day['views'] for day in series[-7:])
+    last_week = sum(day['views'] for day in series[:-7])
+    return {
+        'last_24_hours': last_24_hours,
+        'last_7_days': this_week,
+        'previous_7_days': last_week,
+        'change_percent': round(100 * (this_week - last_week) / last_week) if last_week else None,
+        'new_viewers_7_days': sum(day['new_viewers'] for day in series[-7:]),
+        'daily': series,
+    }
+
+
+def compact_rollups(now=None, hourly_days=None, daily_days=None, batch_size=500):
+    """
+    Folds hour buckets older than ``hourly_days`` whole days into day buckets,
+    ``batch_size`` users per transaction, and deletes day buckets older than
+    ``daily_days`` (0 keeps them). Returns the number of rows of each removed.
+    """
+    if hourly_days is None:
+        hourly_days = getattr(settings, 'PROFILE_VIEW_HOURLY_DAYS', 7)
+    if daily_days is None:
+        daily_days = getattr(settings, 'PROFILE_VIEW_DAILY_DAYS', 365)
+    today = day_start(now or timezone.now())
+    # The last-24-hours trend needs yesterday's hours.
+    old_hours = ProfileViewRollup.objects.filter(
+        period=ProfileViewRollup.HOUR, bucket__lt=today - max(hourly_days, 1) * DAY,
+    ).order_by()
+
+    folded, last_user_id = 0, 0
+    while True:
+        user_ids = list(
+            old_hours.filter(user_id__gt=last_user_id).order_by('user_id')
+            .values_list('user_id', flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            break
+        with transaction.atomic():
+            batch = old_hours.filter(user_id__in=user_ids)
+            sums = batch.annotate(day=TruncDay('bucket')).values('user_id', 'day').annotate(
+                views=Sum('views'), new_viewers=Sum('new_viewers'),
+            )
+            _add_to_rollups(ProfileViewRollup.DAY, {
+                (row['user_id'], row['day']): (row['views'], row['new_viewers']) for row in sums
+            })
+            folded += batch.delete()[0]
+        last_user_id = user_ids[-1]
+
+    expired = 0
+    if daily_days:
+        expired, _ = ProfileViewRollup.objects.filter(
+            period=ProfileViewRollup.DAY, bucket__lt=today - daily_days * DAY,
+        ).delete()
+    return {'hours_folded': folded, 'days_expired': expired}
+
+
+buffer = ProfileViewBuffer()
+atexit.register(buffer.flush)
+
+
+def record_view(viewer_id, viewed_id):
+    """Notes that ``viewer_id`` viewed ``viewed_id``'s profile; never touches the database."""
+    if viewer_id != viewed_id:
+        buffer.add(viewer_id, viewed_id)
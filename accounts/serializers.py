@@ -0,0 +1,40 @@
+"""
+Payload schemas for users; see poornimax.serialization.
+"""
+from poornimax.serialization import Schema
+
+DEFAULT_AVATAR_URL = '/static/ann.png'
+
+
+def avatar_url(user, context=None):
+    return user.profile_picture.url if user.profile_picture else DEFAULT_AVATAR_URL
+
+
+def display_name(user, context=None):
+    return user.full_name or user.username
+
+
+def year(user, context=None):
+    questionnaire = getattr(user, 'questionnaire', None)
+    return questionnaire.year if questionnaire else None
+
+
+# The compact user card shown in search results and next to comments.
+USER_CARD = Schema(
+    id='id',
+    username='username',
+    full_name=display_name,
+    profile_picture_url=avatar_url,
+)
+
+# One entry of the "who viewed my profile" list.
+PROFILE_VIEWER = Schema(
+    viewer=('viewer', USER_CARD),
+    viewed_at='timestamp',
+)
+
+# One card of the hearts sent, hearts received and friends lists (accounts/connections.py).
+CONNECTION = Schema(
+    user=('other', USER_CARD.extend(department='department', college='college', year=year)),
+    since='since',
+)
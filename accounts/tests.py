@@ -1,3 +1,74 @@
+import os
+from collections import Counter as Tally
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import ProfileView, ProfileViewRollup, User
+from .profile_views import ProfileViewBuffer, _upsert, hour_start
+
+TEN_FIFTY = datetime(2026, 1, 5, 10, 50, tzinfo=dt_timezone.utc)
+ELEVEN_TEN = datetime(2026, 1, 5, 11, 10, tzinfo=dt_timezone.utc)
+
+
+def _user(name):
+    return User.objects.create(username=name, college_email=f'{name}@poornima.org')
+
+
+class ProfileViewFlushTests(TestCase):
+    def setUp(self):
+        self.viewer, self.viewed = _user('viewer'), _user('viewed')
+        self.pair = (self.viewer.pk, self.viewed.pk)
+        self.hits = Tally({(self.viewed.pk, hour_start(TEN_FIFTY)): 1, (self.viewed.pk, hour_start(ELEVEN_TEN)): 1})
+
+    def _rollups(self):
+        return dict(ProfileViewRollup.objects.filter(user=self.viewed).values_list('bucket', 'new_viewers'))
+
+    def test_new_viewer_counts_in_the_hour_of_the_first_visit(self):
+        _upsert({self.pair: (TEN_FIFTY, ELEVEN_TEN)}, self.hits)
+
+        self.viewed.refresh_from_db()
+        self.assertEqual(self.viewed.profile_view_count, 1)
+        self.assertEqual(ProfileView.objects.get(viewer=self.viewer, viewed=self.viewed).timestamp, ELEVEN_TEN)
+        self.assertEqual(self._rollups(), {hour_start(TEN_FIFTY): 1, hour_start(ELEVEN_TEN): 0})
+
+    def test_pair_inserted_elsewhere_is_not_counted_again(self):
+        # Another worker flushed the same first visit first.
+        _upsert({self.pair: (TEN_FIFTY, TEN_FIFTY)}, Tally({(self.viewed.pk, hour_start(TEN_FIFTY)): 1}))
+        _upsert({self.pair: (TEN_FIFTY, ELEVEN_TEN)}, Tally({(self.viewed.pk, hour_start(ELEVEN_TEN)): 1}))
+
+        self.viewed.refresh_from_db()
+        self.assertEqual(self.viewed.profile_view_count, 1)
+        self.assertEqual(ProfileView.objects.get(viewer=self.viewer, viewed=self.viewed).timestamp, ELEVEN_TEN)
+        self.assertEqual(self._rollups(), {hour_start(TEN_FIFTY): 1, hour_start(ELEVEN_TEN): 0})
+
+    def test_views_of_deleted_users_are_skipped(self):
+        gone = _user('gone')
+        gone_pk = gone.pk
+        gone.delete()
+        _upsert(
+            {self.pair: (TEN_FIFTY, TEN_FIFTY), (gone_pk, self.viewed.pk): (TEN_FIFTY, TEN_FIFTY)},
+            Tally({(self.viewed.pk, hour_start(TEN_FIFTY)): 2, (gone_pk, hour_start(TEN_FIFTY)): 1}),
+        )
+
+        self.viewed.refresh_from_db()
+        self.assertEqual(self.viewed.profile_view_count, 1)
+        self.assertEqual(list(ProfileView.objects.values_list('viewer_id', flat=True)), [self.viewer.pk])
+        self.assertEqual(self._rollups(), {hour_start(TEN_FIFTY): 1})
+
+    def test_failed_flush_is_requeued(self):
+        buffer = ProfileViewBuffer()
+        buffer._pid = os.getpid()  # no flusher thread
+        buffer._pending, buffer._hits = {self.pair: (TEN_FIFTY, TEN_FIFTY)}, Tally(self.hits)
+
+        with mock.patch('accounts.profile_views.run_write', side_effect=RuntimeError("database is locked")):
+            with self.assertLogs('accounts.profile_views', 'ERROR'):
+                self.assertEqual(buffer.flush(), 0)
+        buffer._pending[self.pair] = (buffer._pending[self.pair][0], ELEVEN_TEN)  # a later visit, merged
+        self.assertEqual(buffer.flush(), 1)
+
+        self.viewed.refresh_from_db()
+        self.assertEqual(self.viewed.profile_view_count, 1)
+        self.assertEqual(ProfileView.objects.get(viewer=self.viewer, viewed=self.viewed).timestamp, ELEVEN_TEN)
+        self.assertEqual(sum(ProfileViewRollup.objects.values_list('views', flat=True)), 2)
@@ -1,14 +1,13 @@
-import os
 import random
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.hashers import make_password
-from django.core.files.storage import FileSystemStorage
 from django.core.mail import send_mail
 from django.shortcuts import redirect, render
 from .models import User, UserQuestionnaire
+from . import metrics
 
 
 
@@ -67,14 +66,11 @@ def signup_access(request):
             gender=data['gender'],
             bio=data['bio']
         )
+        metrics.SIGNUPS.inc()
 
         if profile_picture:
-            path = os.path.join(settings.MEDIA_ROOT, 'profile_pics', user.username)
-            os.makedirs(path, exist_ok=True)
-            fs = FileSystemStorage(location=path)
-            filename = fs.save(profile_picture.name, profile_picture)
-            user.profile_picture.name = f'profile_pics/{user.username}/{filename}'
-            user.save()
+            # Saved as profile_pics/<username>/<name>.<hash>.<ext> by the default storage.
+            user.profile_picture.save(f'{user.username}/{profile_picture.name}', profile_picture)
 
         messages.success(request, "Account created! Now login with OTP.")
         return redirect('accounts:load_login')
@@ -141,7 +137,12 @@ def login_access(request):
                 to=[email]
             )
             msg.attach_alternative(html_content, "text/html")
-            msg.send()
+            try:
+                msg.send()
+            except Exception:
+                metrics.OTP_SENDS.inc(result='failed')
+                raise
+            metrics.OTP_SENDS.inc(result='sent')
 
             return render(request, 'accounts/login.html', {
                 'show_otp': True,
@@ -149,6 +150,7 @@ def login_access(request):
             })
 
         except User.DoesNotExist:
+            metrics.OTP_SENDS.inc(result='unknown_email')
             messages.error(request, "Email not found.")
             return redirect('accounts:load_login')
 
@@ -164,10 +166,11 @@ def verify_otp(request):
         # Check if the stored OTP matches the submitted one
         if otp_store.get(email) == submitted_otp:
             # --- OTP IS CORRECT ---
+            metrics.OTP_VERIFICATIONS.inc(result='success')
             try:
                 user = User.objects.get(college_email=email)
                 user.otp_verified = True
-                user.save()
+                user.save(update_fields=['otp_verified'])
 
                 login(request, user)  # Create the user's session
 
@@ -186,6 +189,7 @@ def verify_otp(request):
                 return redirect('accounts:load_login')
         else:
             # --- OTP IS INCORRECT ---
+            metrics.OTP_VERIFICATIONS.inc(result='failure')
             # Re-render the login page with the OTP popup still active
             # and pass a specific error message.
             context = {
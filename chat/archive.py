@@ -0,0 +1,104 @@
+"""
+Message archival.
+
+``Message`` only ever grew: ``delete_chat`` records a watermark in
+``DeletedChat`` and leaves the rows in place. ``manage.py archive_messages``
+moves cold rows into ``ArchivedMessage``, keeping their ids:
+
+* messages older than ``CHAT_ARCHIVE_AFTER_DAYS`` (default 180), except the
+  latest message of each conversation, which the inbox needs to list it;
+* messages behind both users' deletion watermarks, which neither can see.
+
+Archived rows are always older than the hot rows of their conversation, so
+``thread_page`` reads the hot table first and falls through to the archive
+only once a conversation's hot rows are exhausted. Cursors look the same
+either way.
+"""
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from feed.pagination import encode_cursor, keyset_page
+
+from .models import ArchivedMessage, DeletedChat, Message
+
+ARCHIVED_FIELDS = ('id', 'sender_id', 'receiver_id', 'content', 'timestamp', 'read')
+
+
+def archive_horizon(now=None, days=None):
+    if days is None:
+        days = getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 180)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def conversation(user, other, model=Message):
+    """Messages between ``user`` and ``other`` that ``user`` has not deleted."""
+    queryset = model.objects.filter(Q(sender=user, receiver=other) | Q(sender=other, receiver=user))
+    deleted_at = DeletedChat.objects.filter(user=user, other_user=other).values_list('deleted_at', flat=True).first()
+    if deleted_at:
+        queryset = queryset.filter(timestamp__gt=deleted_at)
+    return queryset
+
+
+def thread_page(user, other, cursor=None, page_size=50):
+    """
+    Returns ``(messages, next_cursor)`` for a conversation, newest first, like
+    ``keyset_page``; pages continue from the hot table into the archive.
+    """
+    rows, next_cursor = keyset_page(conversation(user, other).select_related('sender'), 'timestamp', cursor, page_size)
+    if next_cursor is not None:
+        return rows, next_cursor
+    archive = conversation(user, other, ArchivedMessage).select_related('sender')
+    if rows:
+        cursor = encode_cursor(rows[-1].timestamp, rows[-1].pk)
+    remaining = page_size - len(rows)
+    if remaining == 0:
+        # A full hot page; only say there is more if the archive has something older.
+        older, _ = keyset_page(archive, 'timestamp', cursor, 1)
+        return rows, cursor if older else None
+    archived, next_cursor = keyset_page(archive, 'timestamp', cursor, remaining)
+    return rows + archived, next_cursor
+
+
+def full_thread(user, other, after=None):
+    """Every message of the conversation after ``after``, oldest first, archive included."""
+    filters = Q(sender__in=[user, other], receiver__in=[user, other])
+    if after:
+        filters &= Q(timestamp__gt=after)
+    # Iterated in chunks: a long conversation is never loaded whole.
+    return chain(*(
+        model.objects.filter(filters).select_related('sender', 'receiver').order_by('timestamp', 'pk').iterator(500)
+        for model in (ArchivedMessage, Message)
+    ))
+
+
+def archivable(now=None, days=None):
+    """Hot messages that ``archive_messages`` would move."""
+    aged = Q(timestamp__lt=archive_horizon(now, days)) & Exists(
+        Message.objects.filter(
+            Q(sender=OuterRef('sender'), receiver=OuterRef('receiver'))
+            | Q(sender=OuterRef('receiver'), receiver=OuterRef('sender')),
+            timestamp__gt=OuterRef('timestamp'),
+        )
+    )
+    deleted_by_both = Exists(
+        DeletedChat.objects.filter(user=OuterRef('sender'), other_user=OuterRef('receiver'),
+                                   deleted_at__gte=OuterRef('timestamp'))
+    ) & Exists(
+        DeletedChat.objects.filter(user=OuterRef('receiver'), other_user=OuterRef('sender'),
+                                   deleted_at__gte=OuterRef('timestamp'))
+    )
+    return Message.objects.filter(aged | deleted_by_both)
+
+
+def archive_batch(ids):
+    """Moves the messages with ``ids`` into the archive in one transaction; returns the count moved."""
+    with transaction.atomic():
+        rows = list(Message.objects.filter(id__in=ids).values(*ARCHIVED_FIELDS))
+        ArchivedMessage.objects.bulk_create([ArchivedMessage(**row) for row in rows], ignore_conflicts=True)
+        Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
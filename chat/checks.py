@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.utils.module_loading import import_string
+
+from poornimax.channel_layers import MEMORY_BACKEND
+
+
+@register(deploy=True)
+def check_channel_layer(app_configs, **kwargs):
+    """Warns when production runs chat on the single-process in-memory layer."""
+    backend = settings.CHANNEL_LAYERS.get('default', {}).get('BACKEND')
+    if settings.DEBUG or backend != MEMORY_BACKEND:
+        return []
+    return [
+        Warning(
+            "InMemoryChannelLayer is in use with DEBUG=False.",
+            hint="Chat messages will not reach users connected to other ASGI workers. "
+                 "Set CHANNEL_LAYER=redis and REDIS_URL (or REDIS_URLS).",
+            id='chat.W001',
+        )
+    ]
+
+
+@register()
+def check_channel_layer_backend(app_configs, **kwargs):
+    """Fails when the configured layer's backend cannot be imported (e.g. channels_redis missing)."""
+    backend = settings.CHANNEL_LAYERS.get('default', {}).get('BACKEND')
+    if backend is None:
+        return [Error("CHANNEL_LAYERS has no 'default' layer with a BACKEND.", id='chat.E001')]
+    try:
+        import_string(backend)
+    except ImportError as e:
+        return [
+            Error(
+                f"The channel layer backend {backend!r} cannot be imported: {e}",
+                hint="Install channels_redis for CHANNEL_LAYER=redis or redis-pubsub.",
+                id='chat.E002',
+            )
+        ]
+    return []
@@ -2,7 +2,10 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import Message
+from . import metrics
 from django.contrib.auth import get_user_model
+from poornimax.metrics import WEBSOCKET_CONNECTIONS, WEBSOCKET_CONNECTS
+from poornimax.write_queue import arun_write
 
 User = get_user_model()
 
@@ -13,15 +16,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
         
         if self.user.is_anonymous:
             # Reject the connection if user is not authenticated
+            WEBSOCKET_CONNECTS.inc(consumer='chat', result='rejected')
             await self.close()
             return
         
         try:
             self.other_user = await self.get_user_by_username(self.other_username)
             if not self.other_user:
+                WEBSOCKET_CONNECTS.inc(consumer='chat', result='rejected')
                 await self.close()
                 return
         except:
+            WEBSOCKET_CONNECTS.inc(consumer='chat', result='rejected')
             await self.close()
             return
         
@@ -37,10 +43,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
+        WEBSOCKET_CONNECTS.inc(consumer='chat', result='accepted')
+        WEBSOCKET_CONNECTIONS.inc(consumer='chat')
 
     async def disconnect(self, close_code):
         # Leave room group
         if hasattr(self, 'room_group_name'):
+            WEBSOCKET_CONNECTIONS.dec(consumer='chat')
             await self.channel_layer.group_discard(
                 self.room_group_name,
                 self.channel_name
@@ -53,7 +62,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
         
         if message and not self.user.is_anonymous and hasattr(self, 'other_user'):
             # Save message to database
-            await self.save_message(self.user, self.other_user, message)
+            with metrics.MESSAGE_SAVE_SECONDS.time():
+                await self.save_message(self.user, self.other_user, message)
+            metrics.MESSAGES.inc(transport='websocket')
             
             # Send message to the room group (both users in the conversation)
             await self.channel_layer.group_send(
@@ -83,9 +94,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except User.DoesNotExist:
             return None
     
-    @database_sync_to_async
-    def save_message(self, sender, receiver, content):
-        Message.objects.create(
+    async def save_message(self, sender, receiver, content):
+        # Queued for the single database writer rather than racing other executors for the SQLite lock.
+        await arun_write(
+            Message.objects.create,
             sender=sender,
             receiver=receiver,
             content=content
@@ -0,0 +1,117 @@
+"""
+Moves cold chat messages from the hot ``Message`` table into
+``ArchivedMessage`` (see chat/archive.py) and reports how much the hot table
+shrank.
+
+Archived: messages older than ``--days`` (``CHAT_ARCHIVE_AFTER_DAYS``,
+default 180) apart from each conversation's latest message, and messages
+behind both users' ``delete_chat`` watermarks. Batches are moved in their
+own short transactions, so the command can run alongside the site, e.g.
+nightly from cron. It is safe to rerun.
+
+Deleted rows leave free space inside the table's pages, so the hot table only
+gets smaller on disk once it is vacuumed. ``--vacuum`` does that: ``VACUUM``
+rewrites the whole SQLite file and holds the write lock while it runs, and
+on PostgreSQL a plain ``VACUUM ANALYZE`` of the table makes its space
+reusable without a lock.
+
+Usage:
+    python manage.py archive_messages --dry-run
+    python manage.py archive_messages --days 90 --batch-size 2000
+    python manage.py archive_messages --vacuum
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from chat.archive import archivable, archive_batch
+from chat.models import ArchivedMessage, Message
+
+
+def table_bytes(model):
+    """On-disk size of ``model``'s table and its indexes, or ``None`` where it cannot be measured."""
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # Needs SQLITE_ENABLE_DBSTAT_VTAB, which most builds have.
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+                    [table],
+                )
+            elif connection.vendor == 'postgresql':
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            else:
+                return None
+            return cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+
+
+class Command(BaseCommand):
+    help = "Moves old and doubly-deleted chat messages into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Archive messages older than this many days.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Messages moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived.")
+        parser.add_argument('--vacuum', action='store_true', help="Vacuum the hot table afterwards to reclaim space.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        candidates = archivable(days=options['days']).order_by('id').values_list('id', flat=True)
+        before = {'rows': Message.objects.count(), 'bytes': table_bytes(Message)}
+
+        moved, batches, last_id = 0, 0, 0
+        started = time.perf_counter()
+        if options['dry_run']:
+            moved = candidates.count()
+        else:
+            while True:
+                # Resuming after the last id keeps every batch a short scan.
+                ids = list(candidates.filter(id__gt=last_id)[:options['batch_size']])
+                if not ids:
+                    break
+                moved += archive_batch(ids)
+                batches += 1
+                last_id = ids[-1]
+            if options['vacuum']:
+                self._vacuum()
+        elapsed = time.perf_counter() - started
+
+        report = {
+            'dry_run': options['dry_run'],
+            'archived': moved,
+            'batches': batches,
+            'seconds': round(elapsed, 2),
+            'hot_before': before,
+            'hot_after': {'rows': Message.objects.count(), 'bytes': table_bytes(Message)},
+            'archive': {'rows': ArchivedMessage.objects.count(), 'bytes': table_bytes(ArchivedMessage)},
+        }
+        self._report(report, options)
+
+    def _vacuum(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('VACUUM')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'VACUUM ANALYZE {connection.ops.quote_name(Message._meta.db_table)}')
+
+    def _report(self, report, options):
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        verb = "Would archive" if report['dry_run'] else "Archived"
+        self.stdout.write(f"{verb} {report['archived']} messages in {report['batches']} batches ({report['seconds']}s).")
+        before, after = report['hot_before'], report['hot_after']
+        self.stdout.write(f"Hot table rows:   {before['rows']} -> {after['rows']}")
+        if before['bytes'] and after['bytes'] is not None:
+            self.stdout.write(
+                f"Hot table size:   {before['bytes'] / 1024:.0f} KB -> {after['bytes'] / 1024:.0f} KB "
+                f"({100 * (1 - after['bytes'] / before['bytes']):.0f}% smaller)"
+            )
+        self.stdout.write(f"Archive rows:     {report['archive']['rows']}")
@@ -0,0 +1,209 @@
+"""
+Websocket load test for ChatConsumer.
+
+Runs ``poornimax.asgi.application`` in-process, opens authenticated
+``ws/chat/<username>/`` sockets for pairs of existing users (session cookies
+go through the real AuthMiddlewareStack), drives a configurable message
+rate and reports connect latency, end-to-end delivery latency percentiles,
+the resulting DB write rate and memory per socket.
+
+Usage:
+    python manage.py bench_chat --pairs 100 --rate 2 --duration 10
+    python manage.py bench_chat --pairs 500 --output bench_chat.json
+    python manage.py bench_chat --pairs 500 --compare bench_chat.json
+"""
+import asyncio
+import json
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from chat.models import Message
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+MESSAGE_PREFIX = 'bench-chat:'
+
+# Metrics compared by --compare, with the direction that counts as better.
+COMPARED_METRICS = {
+    'connect.p95_ms': 'lower',
+    'delivery.p50_ms': 'lower',
+    'delivery.p95_ms': 'lower',
+    'delivery.p99_ms': 'lower',
+    'db_writes_per_s': 'higher',
+    'memory_per_socket_kb': 'lower',
+}
+
+
+def _session_cookie(user):
+    """Creates a logged-in session for ``user`` and returns its cookie header value."""
+    engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+    session = engine()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def _lookup(report, dotted):
+    for key in dotted.split('.'):
+        report = report[key]
+    return report
+
+
+class Command(BaseCommand):
+    help = "Load-tests ChatConsumer with N authenticated socket pairs and reports latency, DB write rate and memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pairs', type=int, default=50, help="Conversations to open (two sockets each).")
+        parser.add_argument('--rate', type=float, default=1.0, help="Messages per second sent in each conversation.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to drive traffic for.")
+        parser.add_argument('--user-prefix', default='', help="Only use users whose username starts with this prefix.")
+        parser.add_argument('--keep-messages', action='store_true', help="Keep the chat messages the run creates.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--compare', help="Compare against a previous JSON report.")
+        parser.add_argument('--json', action='store_true', help="Print the JSON report instead of a summary.")
+
+    def handle(self, *args, **options):
+        users = list(
+            User.objects.filter(username__startswith=options['user_prefix'], username__regex=r'^\w+$')
+            .order_by('id')[:options['pairs'] * 2]
+        )
+        if len(users) < 2:
+            raise CommandError("Need at least two users; seed some with `manage.py seed_data`.")
+        pairs = list(zip(users[0::2], users[1::2]))
+        cookies = {user.pk: _session_cookie(user) for user in users[:len(pairs) * 2]}
+
+        last_message_id = Message.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        report = asyncio.run(self._run(pairs, cookies, options))
+        report['db_writes'] = Message.objects.filter(id__gt=last_message_id, content__startswith=MESSAGE_PREFIX).count()
+        report['db_writes_per_s'] = report['db_writes'] / options['duration']
+
+        if not options['keep_messages']:
+            Message.objects.filter(id__gt=last_message_id, content__startswith=MESSAGE_PREFIX).delete()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_summary(report)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self._print_comparison(json.load(f), report)
+
+    async def _run(self, pairs, cookies, options):
+        # The full ASGI stack, so sockets authenticate through cookies like a browser would.
+        from channels.testing import WebsocketCommunicator
+        from poornimax.asgi import application
+
+        async def open_socket(user, other):
+            communicator = WebsocketCommunicator(
+                application, f'/ws/chat/{other.username}/',
+                headers=[(b'cookie', cookies[user.pk].encode())],
+            )
+            started = time.perf_counter()
+            connected, _ = await communicator.connect(timeout=30)
+            return communicator, connected, (time.perf_counter() - started) * 1000
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        connections, connect_ms, failed = [], [], 0
+        for user, other in pairs:
+            sockets = await asyncio.gather(open_socket(user, other), open_socket(other, user))
+            for communicator, connected, elapsed in sockets:
+                if connected:
+                    connect_ms.append(elapsed)
+                else:
+                    failed += 1
+            connections.append((sockets[0][0], sockets[1][0]))
+        memory_per_socket = (tracemalloc.get_traced_memory()[0] - memory_before) / max(1, len(connect_ms))
+        tracemalloc.stop()
+
+        latencies = []
+        sent = 0
+        stopping = asyncio.Event()
+
+        async def receive(communicator):
+            while True:
+                # receive_from() cancels the consumer when it times out, so poll with receive_nothing().
+                if await communicator.receive_nothing(timeout=0.05):
+                    if stopping.is_set() and await communicator.receive_nothing(timeout=1):
+                        return
+                    continue
+                raw = await communicator.receive_from()
+                content = json.loads(raw).get('message', '')
+                if content.startswith(MESSAGE_PREFIX):
+                    latencies.append((time.perf_counter() - float(content.rsplit(':', 1)[1])) * 1000)
+
+        async def drive(communicator):
+            nonlocal sent
+            interval = 1 / options['rate']
+            deadline = time.perf_counter() + options['duration']
+            seq = 0
+            while time.perf_counter() < deadline:
+                await communicator.send_to(text_data=json.dumps({
+                    'message': f'{MESSAGE_PREFIX}{seq}:{time.perf_counter()}'
+                }))
+                sent += 1
+                seq += 1
+                await asyncio.sleep(interval)
+
+        # The first user of each pair talks; delivery is measured on the partner's socket.
+        receivers = [asyncio.create_task(receive(partner)) for _, partner in connections]
+        started = time.perf_counter()
+        await asyncio.gather(*(drive(sender) for sender, _ in connections))
+        elapsed = time.perf_counter() - started
+        stopping.set()
+        await asyncio.gather(*receivers)
+
+        for sender, partner in connections:
+            await sender.disconnect()
+            await partner.disconnect()
+
+        return {
+            'config': {
+                'pairs': len(pairs),
+                'sockets': len(pairs) * 2,
+                'rate_per_pair': options['rate'],
+                'duration_s': options['duration'],
+                'channel_layer': settings.CHANNEL_LAYERS['default']['BACKEND'],
+            },
+            'connect': summarize(connect_ms),
+            'connect_failures': failed,
+            'sent': sent,
+            'delivered': len(latencies),
+            'delivery': summarize(latencies),
+            'messages_per_s': len(latencies) / elapsed if elapsed else 0.0,
+            'memory_per_socket_kb': memory_per_socket / 1024,
+        }
+
+    def _print_summary(self, report):
+        config = report['config']
+        self.stdout.write(f"Sockets:           {config['sockets']} ({config['pairs']} pairs, {config['rate_per_pair']} msg/s each)")
+        self.stdout.write(f"Connect latency:   p50 {report['connect']['p50_ms']:.1f} ms, p95 {report['connect']['p95_ms']:.1f} ms, failures {report['connect_failures']}")
+        self.stdout.write(f"Delivered:         {report['delivered']}/{report['sent']} ({report['messages_per_s']:.0f} msg/s)")
+        self.stdout.write(
+            f"Delivery latency:  p50 {report['delivery']['p50_ms']:.1f} ms, "
+            f"p95 {report['delivery']['p95_ms']:.1f} ms, p99 {report['delivery']['p99_ms']:.1f} ms"
+        )
+        self.stdout.write(f"DB writes:         {report['db_writes']} ({report['db_writes_per_s']:.1f}/s)")
+        self.stdout.write(f"Memory per socket: {report['memory_per_socket_kb']:.1f} KiB")
+
+    def _print_comparison(self, baseline, report):
+        self.stdout.write("\nCompared with baseline:")
+        for metric, better in COMPARED_METRICS.items():
+            old, new = _lookup(baseline, metric), _lookup(report, metric)
+            change = ((new - old) / old * 100) if old else 0.0
+            regressed = (change > 0) if better == 'lower' else (change < 0)
+            line = f"  {metric:<22} {old:>10.2f} -> {new:>10.2f} ({change:+.1f}%)"
+            self.stdout.write(self.style.ERROR(line) if regressed and abs(change) > 10 else line)
@@ -0,0 +1,201 @@
+"""
+Concurrent read/write benchmark for the SQLite database.
+
+Runs each mode in a fresh ``manage.py`` process against its own copy of the
+database, so the settings under test (``SQLITE_PRAGMAS``, ``DB_WRITE_QUEUE``)
+are applied exactly as at startup and the real database is left untouched.
+Reader threads load conversations and the public feed while writer threads
+send chat messages through ``run_write``, as ``chat_view`` does.
+
+Modes:
+    baseline    Django's plain SQLite backend, rollback journal, no queue
+    wal         poornimax.sqlite with the default PRAGMAS, no queue
+    wal+queue   the defaults: PRAGMAS plus the single-writer queue
+
+Reports reads and writes per second, "database is locked" errors and
+latency percentiles for each mode.
+
+Usage:
+    python manage.py bench_sqlite
+    python manage.py bench_sqlite --readers 8 --writers 8 --duration 10
+    python manage.py bench_sqlite --modes baseline,wal+queue --json
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from chat.models import Message
+from feed.models import Post
+from poornimax.benchmarking import summarize
+from poornimax.write_queue import run_write
+
+User = get_user_model()
+
+MESSAGE_PREFIX = 'bench-sqlite:'
+
+MODES = {
+    'baseline': {'SQLITE_PRAGMAS': 'off', 'DB_WRITE_QUEUE': 'off'},
+    'wal': {'SQLITE_PRAGMAS': '', 'DB_WRITE_QUEUE': 'off'},
+    'wal+queue': {'SQLITE_PRAGMAS': '', 'DB_WRITE_QUEUE': 'on'},
+}
+
+
+def _copy_database(source, target, journal_mode):
+    """Copies ``source`` with the backup API, which is safe while other processes use it."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        # The journal mode is stored in the file, so reset it for the baseline copy.
+        dst.execute(f'PRAGMA journal_mode = {journal_mode}')
+    finally:
+        src.close()
+        dst.close()
+
+
+class Command(BaseCommand):
+    help = "Measures concurrent SQLite read and write throughput with and without WAL and the write queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help="Comma-separated modes to run.")
+        parser.add_argument('--readers', type=int, default=4, help="Reader threads.")
+        parser.add_argument('--writers', type=int, default=4, help="Writer threads.")
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds to run each mode for.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+        # Runs one mode in this process; used by the parent for each mode.
+        parser.add_argument('--worker', action='store_true', help="Internal.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark needs the SQLite database; unset DATABASE_URL.")
+        if options['worker']:
+            self.stdout.write(json.dumps(self._run_worker(options)))
+            return
+
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}. Choose from {', '.join(MODES)}.")
+        source = str(connection.settings_dict['NAME'])
+        connection.close()
+
+        report = {}
+        with tempfile.TemporaryDirectory(prefix='bench_sqlite_') as tmp:
+            for mode in modes:
+                path = os.path.join(tmp, f"{mode.replace('+', '_')}.sqlite3")
+                _copy_database(source, path, 'DELETE' if mode == 'baseline' else 'WAL')
+                report[mode] = self._run_mode(mode, path, options)
+        self._report(report, options)
+
+    def _run_mode(self, mode, path, options):
+        env = {**os.environ, **MODES[mode], 'SQLITE_PATH': path}
+        env.pop('DATABASE_URL', None)
+        command = [
+            sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'bench_sqlite', '--worker',
+            '--readers', str(options['readers']), '--writers', str(options['writers']),
+            '--duration', str(options['duration']),
+        ]
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"Mode {mode!r} failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def _run_worker(self, options):
+        users = list(User.objects.filter(username__regex=r'^seed\d+$').order_by('id')[:50])
+        if len(users) < 2:
+            users = list(User.objects.order_by('id')[:50])
+        if len(users) < 2:
+            raise CommandError("Need at least two users; run seed_data first.")
+        connection.close()
+
+        deadline = time.monotonic() + options['duration']
+        reads, writes, locked = [], [], []
+        threads = [
+            threading.Thread(target=self._read, args=(users, i, deadline, reads, locked))
+            for i in range(options['readers'])
+        ] + [
+            threading.Thread(target=self._write, args=(users, i, deadline, writes, locked))
+            for i in range(options['writers'])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        return {
+            'engine': connection.settings_dict['ENGINE'],
+            'journal_mode': self._journal_mode(),
+            'write_queue': settings.DB_WRITE_QUEUE,
+            'reads_per_s': len(reads) / elapsed,
+            'writes_per_s': len(writes) / elapsed,
+            'locked_errors': len(locked),
+            'read': summarize(reads),
+            'write': summarize(writes),
+        }
+
+    def _journal_mode(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def _read(self, users, i, deadline, latencies, locked):
+        try:
+            while time.monotonic() < deadline:
+                me, other = users[i % len(users)], users[(i + 1) % len(users)]
+                started = time.perf_counter()
+                try:
+                    list(Message.objects.filter(sender__in=[me, other], receiver__in=[me, other]).order_by('-timestamp')[:50])
+                    list(Post.objects.filter(is_public=True).select_related('user').order_by('-created_at')[:10])
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    locked.append(time.perf_counter() - started)
+                else:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                i += 1
+        finally:
+            connections.close_all()
+
+    def _write(self, users, i, deadline, latencies, locked):
+        try:
+            while time.monotonic() < deadline:
+                sender, receiver = users[i % len(users)], users[(i + 1) % len(users)]
+                started = time.perf_counter()
+                try:
+                    run_write(Message.objects.create, sender=sender, receiver=receiver, content=f'{MESSAGE_PREFIX}{i}')
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    locked.append(time.perf_counter() - started)
+                else:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                i += 1
+        finally:
+            connections.close_all()
+
+    def _report(self, report, options):
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{'mode':<11} {'journal':<8} {'reads/s':>9} {'writes/s':>9} {'locked':>7} "
+            f"{'read p95':>9} {'write p50':>10} {'write p95':>10} {'write p99':>10}"
+        )
+        for mode, r in report.items():
+            self.stdout.write(
+                f"{mode:<11} {r['journal_mode']:<8} {r['reads_per_s']:>9.0f} {r['writes_per_s']:>9.0f} "
+                f"{r['locked_errors']:>7} {r['read']['p95_ms']:>7.1f}ms {r['write']['p50_ms']:>8.1f}ms "
+                f"{r['write']['p95_ms']:>8.1f}ms {r['write']['p99_ms']:>8.1f}ms"
+            )
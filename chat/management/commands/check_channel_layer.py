@@ -0,0 +1,217 @@
+"""
+Multi-process integration check for the chat channel layer.
+
+Starts two worker processes that each host ``ChatConsumer`` instances for
+one side of a conversation. The sender process pushes messages through its
+consumers and the command verifies that the consumers in the *other*
+process receive them, which only works with a shared (Redis) layer. It also
+reports connect latency, delivery latency percentiles and throughput for the
+total number of open sockets.
+
+Usage:
+    # Against the configured layer (REDIS_URL / CHANNEL_LAYER=redis)
+    python manage.py check_channel_layer --sender alice --receiver bob
+
+    # Against a local Redis-protocol stand-in (requires fakeredis + lupa)
+    python manage.py check_channel_layer --sender alice --receiver bob --fake-redis --sockets 1000
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from poornimax.benchmarking import summarize
+from poornimax.channel_layers import MEMORY_BACKEND
+
+MESSAGE_PREFIX = 'layer-check:'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _run_side(role, username, other_username, sockets, messages, interval, timeout, barrier, results):
+    """Entry point of a worker process; hosts ``sockets`` ChatConsumers for ``username``."""
+    import django
+    django.setup()
+    results.put(asyncio.run(_side(role, username, other_username, sockets, messages, interval, timeout, barrier)))
+
+
+async def _side(role, username, other_username, sockets, messages, interval, timeout, barrier):
+    from channels.routing import URLRouter
+    from channels.testing import WebsocketCommunicator
+    from django.contrib.auth import get_user_model
+
+    import chat.routing
+
+    user = await get_user_model().objects.aget(username=username)
+    application = URLRouter(chat.routing.websocket_urlpatterns)
+    loop = asyncio.get_running_loop()
+
+    communicators, connect_ms = [], []
+    for _ in range(sockets):
+        communicator = WebsocketCommunicator(application, f'/ws/chat/{other_username}/')
+        communicator.scope['user'] = user
+        started = time.perf_counter()
+        connected, _ = await communicator.connect(timeout=timeout)
+        if connected:
+            connect_ms.append((time.perf_counter() - started) * 1000)
+            communicators.append(communicator)
+
+    latencies, last_received = [], 0.0
+
+    async def drain(communicator):
+        nonlocal last_received
+        received = 0
+        while received < messages:
+            try:
+                raw = await communicator.receive_from(timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            content = json.loads(raw).get('message', '')
+            if content.startswith(MESSAGE_PREFIX):
+                now = time.time()
+                latencies.append((now - float(content.rsplit(':', 1)[1])) * 1000)
+                last_received = max(last_received, now)
+                received += 1
+        return received
+
+    # Both processes must have joined the group before anything is sent.
+    await loop.run_in_executor(None, barrier.wait)
+    drains = [asyncio.create_task(drain(c)) for c in communicators]
+
+    first_sent = None
+    if role == 'sender' and communicators:
+        for seq in range(messages):
+            sent_at = time.time()
+            first_sent = first_sent or sent_at
+            await communicators[0].send_to(text_data=json.dumps({'message': f'{MESSAGE_PREFIX}{seq}:{sent_at}'}))
+            await asyncio.sleep(interval)
+
+    received = sum(await asyncio.gather(*drains))
+    for communicator in communicators:
+        await communicator.disconnect()
+
+    return {
+        'role': role,
+        'sockets': sockets,
+        'connected': len(communicators),
+        'connect': summarize(connect_ms),
+        'received': received,
+        'expected': len(communicators) * messages,
+        'delivery': summarize(latencies),
+        'first_sent': first_sent,
+        'last_received': last_received,
+    }
+
+
+class Command(BaseCommand):
+    help = "Proves chat messages cross process boundaries through the channel layer and measures fan-out latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sender', required=True, help="Username whose sockets send the messages.")
+        parser.add_argument('--receiver', required=True, help="Username whose sockets (in the other process) receive them.")
+        parser.add_argument('--sockets', type=int, default=1000, help="Total sockets, split evenly across both processes.")
+        parser.add_argument('--messages', type=int, default=5, help="Messages sent by the sender process.")
+        parser.add_argument('--interval', type=float, default=0.05, help="Seconds between sent messages.")
+        parser.add_argument('--timeout', type=float, default=30, help="Seconds to wait for connects and deliveries.")
+        parser.add_argument('--fake-redis', action='store_true', help="Run against an in-process fakeredis TCP server.")
+        parser.add_argument('--backend', choices=['redis', 'redis-pubsub'], default='redis', help="Layer used with --fake-redis.")
+        parser.add_argument('--keep-messages', action='store_true', help="Keep the chat messages the check creates.")
+        parser.add_argument('--json', action='store_true', help="Print machine-readable JSON.")
+
+    def handle(self, *args, **options):
+        from chat.models import Message
+
+        if options['fake_redis']:
+            self._start_fake_redis(options['backend'])
+        elif settings.CHANNEL_LAYERS['default']['BACKEND'] == MEMORY_BACKEND:
+            raise CommandError(
+                "The in-memory channel layer cannot cross processes. "
+                "Set CHANNEL_LAYER=redis with REDIS_URL, or pass --fake-redis."
+            )
+
+        last_message_id = Message.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        per_side = max(1, options['sockets'] // 2)
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(2)
+        results = context.Queue()
+        sides = [
+            ('sender', options['sender'], options['receiver']),
+            ('receiver', options['receiver'], options['sender']),
+        ]
+        processes = [
+            context.Process(target=_run_side, args=(
+                role, username, other, per_side, options['messages'],
+                options['interval'], options['timeout'], barrier, results,
+            ))
+            for role, username, other in sides
+        ]
+        for process in processes:
+            process.start()
+        reports = {}
+        for _ in processes:
+            report = results.get(timeout=options['timeout'] * 4 + per_side)
+            reports[report['role']] = report
+        for process in processes:
+            process.join()
+
+        if not options['keep_messages']:
+            Message.objects.filter(id__gt=last_message_id, content__startswith=MESSAGE_PREFIX).delete()
+
+        self._report(reports, options)
+
+    def _start_fake_redis(self, backend):
+        try:
+            from fakeredis import TcpFakeServer
+        except ImportError:
+            raise CommandError("--fake-redis needs the 'fakeredis' and 'lupa' packages.")
+
+        port = _free_port()
+        server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        # Spawned workers inherit the environment and rebuild CHANNEL_LAYERS from it.
+        os.environ['CHANNEL_LAYER'] = backend
+        os.environ['REDIS_URLS'] = f'redis://127.0.0.1:{port}/0'
+        os.environ.pop('REDIS_URL', None)
+
+    def _report(self, reports, options):
+        sender, receiver = reports['sender'], reports['receiver']
+        started = sender['first_sent']
+        finished = max(sender['last_received'], receiver['last_received'])
+        deliveries = sender['received'] + receiver['received']
+        elapsed = finished - started if started and finished else 0
+        summary = {
+            'sockets': sender['connected'] + receiver['connected'],
+            'cross_process_ok': receiver['received'] == receiver['expected'] and receiver['expected'] > 0,
+            'deliveries': deliveries,
+            'throughput_per_s': deliveries / elapsed if elapsed else 0.0,
+            'sender': sender,
+            'receiver': receiver,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        else:
+            self.stdout.write(f"Open sockets:        {summary['sockets']}")
+            self.stdout.write(f"Connect latency:     p50 {receiver['connect']['p50_ms']:.1f} ms, p95 {receiver['connect']['p95_ms']:.1f} ms")
+            self.stdout.write(f"Cross-process recv:  {receiver['received']}/{receiver['expected']}")
+            self.stdout.write(
+                f"Delivery latency:    p50 {receiver['delivery']['p50_ms']:.1f} ms, "
+                f"p95 {receiver['delivery']['p95_ms']:.1f} ms, p99 {receiver['delivery']['p99_ms']:.1f} ms"
+            )
+            self.stdout.write(f"Throughput:          {summary['throughput_per_s']:.0f} deliveries/s")
+
+        if not summary['cross_process_ok']:
+            raise CommandError("Receiver process did not get every message sent from the sender process.")
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS("Channel layer delivers chat messages across processes."))
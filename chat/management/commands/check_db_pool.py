@@ -0,0 +1,244 @@
+"""
+Load test for the pooled PostgreSQL backend (poornimax.postgresql_pool).
+
+Runs ``poornimax.asgi.application`` in-process and, for ``--duration``
+seconds, drives concurrently:
+
+* chat websocket pairs sending messages, each one saved through
+  ``database_sync_to_async`` in ChatConsumer,
+* async HTTP clients requesting the feed and inbox pages through the ASGI
+  handler,
+* sync HTTP clients on their own threads, as gunicorn threads would.
+
+A monitor connection outside the pool samples ``pg_stat_activity`` and
+reports the peak number of server connections this process opened. With
+the pool on, the peak must stay within ``POOL['max_size']``; otherwise the
+command fails. Run it again with ``DB_POOL=off`` to see the unpooled peak
+for comparison (that run only reports it).
+
+Usage:
+    DATABASE_URL=postgresql://localhost/poornimax python manage.py check_db_pool
+    DATABASE_URL=... DB_POOL_MAX_SIZE=5 python manage.py check_db_pool --pairs 50 --http-clients 20 --threads 8
+    DATABASE_URL=... DB_POOL=off python manage.py check_db_pool
+"""
+import asyncio
+import json
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from chat.models import Message
+from poornimax.benchmarking import summarize
+from poornimax.databases import POOL_ENGINE
+
+from .bench_chat import _session_cookie
+
+User = get_user_model()
+
+MESSAGE_PREFIX = 'pool-check:'
+
+ACTIVITY_SQL = (
+    "SELECT count(*) FROM pg_stat_activity "
+    "WHERE datname = current_database() AND backend_type = 'client backend' AND pid <> pg_backend_pid()"
+)
+
+
+class _Monitor(threading.Thread):
+    """Samples server connection counts and pool stats on a connection of its own."""
+
+    def __init__(self, interval):
+        super().__init__(name='db-pool-monitor', daemon=True)
+        self.interval = interval
+        self.stopping = threading.Event()
+        self.server_counts = []
+        self.in_use, self.waiting = [], []
+        self._raw = connection.Database.connect(**connection.get_connection_params())
+        self._raw.autocommit = True
+
+    def count(self):
+        with self._raw.cursor() as cursor:
+            cursor.execute(ACTIVITY_SQL)
+            return cursor.fetchone()[0]
+
+    def run(self):
+        from poornimax.postgresql_pool.base import pools
+
+        while not self.stopping.is_set():
+            self.server_counts.append(self.count())
+            stats = [pool.stats() for pool in pools().values()]
+            self.in_use.append(sum(s['in_use'] for s in stats))
+            self.waiting.append(sum(s['waiting'] for s in stats))
+            self.stopping.wait(self.interval)
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+        self._raw.close()
+
+
+class Command(BaseCommand):
+    help = "Drives websocket and HTTP traffic and checks the server connection count stays within the DB pool size."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pairs', type=int, default=25, help="Chat conversations (two sockets each).")
+        parser.add_argument('--rate', type=float, default=2.0, help="Messages per second in each conversation.")
+        parser.add_argument('--http-clients', type=int, default=10, help="Concurrent async HTTP clients.")
+        parser.add_argument('--threads', type=int, default=4, help="Sync HTTP clients, one thread each.")
+        parser.add_argument('--duration', type=float, default=15.0, help="Seconds to drive traffic for.")
+        parser.add_argument('--sample-interval', type=float, default=0.05, help="Seconds between pg_stat_activity samples.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("This check needs PostgreSQL; set DATABASE_URL to a Postgres database.")
+        users = list(User.objects.filter(username__regex=r'^seed\d+$').order_by('id')[:max(2, options['pairs'] * 2)])
+        if len(users) < 2:
+            raise CommandError("Need at least two seeded users; run seed_data first.")
+        pairs = list(zip(users[0::2], users[1::2]))
+        cookies = {user.pk: _session_cookie(user) for user in users}
+        last_message_id = Message.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        pooled = connection.settings_dict['ENGINE'] == POOL_ENGINE
+        max_size = connection.pool.options['max_size'] if pooled else None
+        # Start from zero connections held by this process.
+        connection.close()
+        if pooled:
+            connection.pool.close_all()
+
+        monitor = _Monitor(options['sample_interval'])
+        baseline = monitor.count()
+        monitor.start()
+        # The test clients talk to 'testserver' over plain HTTP.
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            deadline = time.monotonic() + options['duration']
+            sync_results = []
+            threads = [
+                threading.Thread(target=self._sync_http, args=(users[i % len(users)], deadline, sync_results))
+                for i in range(options['threads'])
+            ]
+            for thread in threads:
+                thread.start()
+            traffic = asyncio.run(self._async_traffic(pairs, users, cookies, deadline, options))
+            for thread in threads:
+                thread.join()
+        monitor.stop()
+
+        Message.objects.filter(id__gt=last_message_id, content__startswith=MESSAGE_PREFIX).delete()
+
+        peak = max(monitor.server_counts, default=baseline) - baseline
+        report = {
+            'pooled': pooled,
+            'max_size': max_size,
+            'baseline_connections': baseline,
+            'peak_connections': peak,
+            'peak_in_use': max(monitor.in_use, default=0),
+            'peak_waiting': max(monitor.waiting, default=0),
+            'samples': len(monitor.server_counts),
+            **traffic,
+            'sync_requests': len(sync_results),
+            'sync_http': summarize([elapsed for _, elapsed in sync_results]),
+        }
+        report['http_errors'] += sum(status >= 500 for status, _ in sync_results)
+        self._report(report, options)
+        if pooled and peak > max_size:
+            raise CommandError(f"Peak of {peak} server connections exceeds the pool size of {max_size}.")
+
+    def _sync_http(self, user, deadline, results):
+        """Requests the feed in a loop on its own thread; ``results`` gets (status, ms) tuples."""
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        url = reverse('feed:lazy_load_posts')
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = client.get(url, {'page': 1})
+                results.append((response.status_code, (time.perf_counter() - started) * 1000))
+        finally:
+            # Hands this thread's connection back (or closes it with the pool off).
+            connections.close_all()
+
+    async def _async_traffic(self, pairs, users, cookies, deadline, options):
+        from channels.testing import WebsocketCommunicator
+        from poornimax.asgi import application
+
+        sockets = []
+        for user, other in pairs:
+            for me, them in ((user, other), (other, user)):
+                communicator = WebsocketCommunicator(
+                    application, f'/ws/chat/{them.username}/', headers=[(b'cookie', cookies[me.pk].encode())],
+                )
+                connected, _ = await communicator.connect(timeout=30)
+                if connected:
+                    sockets.append(communicator)
+        if not sockets:
+            raise CommandError("No websocket connected; check the channel layer and the seeded users.")
+
+        sent, http_latency, http_errors = 0, [], 0
+
+        async def chat(communicator):
+            nonlocal sent
+            interval = 1 / options['rate']
+            while time.monotonic() < deadline:
+                await communicator.send_to(text_data=json.dumps({'message': f'{MESSAGE_PREFIX}{time.time()}'}))
+                sent += 1
+                await asyncio.sleep(interval)
+
+        async def drain(communicator):
+            # Keeps the group fan-out from filling the socket's queue.
+            while time.monotonic() < deadline:
+                if not await communicator.receive_nothing(timeout=0.1):
+                    await communicator.receive_from()
+
+        async def browse(user):
+            nonlocal http_errors
+            client = AsyncClient(raise_request_exception=False)
+            await client.aforce_login(user)
+            urls = [reverse('feed:lazy_load_posts') + '?page=1', reverse('chat:inbox')]
+            i = 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                http_latency.append((time.perf_counter() - started) * 1000)
+                http_errors += response.status_code >= 500
+                i += 1
+
+        await asyncio.gather(
+            *(chat(s) for s in sockets[::2]),
+            *(drain(s) for s in sockets),
+            *(browse(users[i % len(users)]) for i in range(options['http_clients'])),
+        )
+        for communicator in sockets:
+            await communicator.disconnect()
+        return {
+            'sockets': len(sockets),
+            'messages_sent': sent,
+            'async_requests': len(http_latency),
+            'async_http': summarize(http_latency),
+            'http_errors': http_errors,
+        }
+
+    def _report(self, report, options):
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        bound = f"pool max_size {report['max_size']}" if report['pooled'] else "pool off"
+        self.stdout.write(f"Open sockets:          {report['sockets']} ({report['messages_sent']} messages sent)")
+        self.stdout.write(
+            f"Async HTTP requests:   {report['async_requests']} "
+            f"(p50 {report['async_http']['p50_ms']:.1f} ms, p95 {report['async_http']['p95_ms']:.1f} ms, "
+            f"{report['http_errors']} errors in total)"
+        )
+        self.stdout.write(
+            f"Sync HTTP requests:    {report['sync_requests']} "
+            f"(p50 {report['sync_http']['p50_ms']:.1f} ms, p95 {report['sync_http']['p95_ms']:.1f} ms)"
+        )
+        self.stdout.write(f"Server connections:    peak {report['peak_connections']} ({bound})")
+        if report['pooled']:
+            self.stdout.write(f"Pool:                  peak in use {report['peak_in_use']}, peak waiting {report['peak_waiting']}")
+            if report['peak_connections'] <= report['max_size']:
+                self.stdout.write(self.style.SUCCESS("Connection count stayed within the pool size."))
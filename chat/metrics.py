@@ -0,0 +1,13 @@
+"""
+Chat metrics; see poornimax.metrics.
+"""
+from poornimax.metrics import Counter, Histogram
+
+MESSAGES = Counter(
+    'poornimax_chat_messages_total', "Chat messages sent, by transport (websocket or http).", ['transport'],
+)
+MESSAGE_SAVE_SECONDS = Histogram(
+    'poornimax_chat_message_save_seconds', "Time to persist a chat message received over a websocket.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CHATS_DELETED = Counter('poornimax_chat_deletions_total', "Conversations deleted (archived) by a user.")
@@ -10,6 +10,8 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        # Serves the keyset-paged conversation, one range per direction (chat/archive.py).
+        indexes = [models.Index(fields=['sender', 'receiver', '-timestamp', '-id'], name='chat_message_thread_idx')]
 
 class DeletedChat(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -18,3 +20,21 @@ class DeletedChat(models.Model):
 
     class Meta:
         unique_together = ('user', 'other_user')
+
+
+class ArchivedMessage(models.Model):
+    """
+    Cold copy of a ``Message`` moved out of the hot table by
+    ``manage.py archive_messages``; keeps the original id. See chat/archive.py.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    receiver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    content = models.TextField()
+    timestamp = models.DateTimeField()
+    read = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['timestamp']
+        indexes = [models.Index(fields=['sender', 'receiver', 'timestamp'], name='chat_archive_thread_idx')]
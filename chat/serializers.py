@@ -0,0 +1,21 @@
+"""
+Payload schemas for chat messages; see poornimax.serialization.
+"""
+from poornimax.serialization import Schema
+
+# A chat bubble. Call with ``viewer_id`` so ``sender_is_user`` is set for the
+# viewer's own messages; querysets should ``select_related('sender')``.
+MESSAGE = Schema(
+    sender='sender.username',
+    content='content',
+    timestamp=lambda message, context: message.timestamp.strftime('%H:%M'),
+    sender_is_user=lambda message, context: message.sender_id == context.get('viewer_id'),
+)
+
+# A message in a conversation export (chat.views.export_chat), with its id
+# and full timestamp.
+EXPORTED_MESSAGE = MESSAGE.extend(
+    id='id',
+    receiver='receiver.username',
+    timestamp=lambda message, context: message.timestamp.isoformat(),
+)
@@ -1,3 +1,128 @@
-from django.test import TestCase
+import json
+import socket
+import subprocess
+import sys
+import threading
+from unittest import skipIf
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from poornimax.channel_layers import MEMORY_BACKEND, build_channel_layers
+
+from .archive import archive_batch
+from .checks import check_channel_layer, check_channel_layer_backend
+from .models import DeletedChat, Message
+
+try:
+    from fakeredis import TcpFakeServer
+except ImportError:  # Optional, like check_channel_layer --fake-redis.
+    TcpFakeServer = None
+
+# One ASGI worker process: joins the chat group and waits for one message.
+RECEIVER = """
+import asyncio, json, sys
+from django.utils.module_loading import import_string
+layer_config = json.loads(sys.argv[1])['default']
+async def main():
+    layer = import_string(layer_config['BACKEND'])(**layer_config['CONFIG'])
+    channel = await layer.new_channel()
+    await layer.group_add('chat_alice_bob', channel)
+    print('ready', flush=True)
+    message = await asyncio.wait_for(layer.receive(channel), timeout=20)
+    print(message['message'], flush=True)
+asyncio.run(main())
+"""
+
+# Another worker: sends to the group.
+SENDER = """
+import asyncio, json, sys
+from django.utils.module_loading import import_string
+layer_config = json.loads(sys.argv[1])['default']
+async def main():
+    layer = import_string(layer_config['BACKEND'])(**layer_config['CONFIG'])
+    await layer.group_send('chat_alice_bob', {'type': 'chat.message', 'message': 'hello from the other worker'})
+asyncio.run(main())
+"""
+
+
+class ExportChatTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.alice, self.bob = (User.objects.create(username=name, college_email=f'{name}@poornima.org') for name in ('alice', 'bob'))
+        self.messages = [
+            Message.objects.create(sender=sender, receiver=receiver, content=f'message {i}')
+            for i, (sender, receiver) in enumerate([(self.alice, self.bob), (self.bob, self.alice)] * 3)
+        ]
+        self.client.force_login(self.alice)
+
+    def _export(self):
+        response = self.client.get(reverse('chat:export_chat', args=['bob']), secure=True)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="chat-bob.json"')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_whole_conversation_is_streamed_oldest_first(self):
+        archive_batch([message.id for message in self.messages[:2]])
+        export = self._export()
+        self.assertEqual(export['with'], 'bob')
+        self.assertEqual([message['id'] for message in export['messages']], [message.id for message in self.messages])
+        self.assertEqual(export['messages'][0]['sender_is_user'], True)
+        self.assertEqual(export['messages'][1]['sender'], 'bob')
+
+    def test_messages_before_a_deletion_are_left_out(self):
+        DeletedChat.objects.create(user=self.alice, other_user=self.bob)
+        DeletedChat.objects.filter(user=self.alice).update(deleted_at=self.messages[3].timestamp)
+        self.assertEqual([message['id'] for message in self._export()['messages']], [message.id for message in self.messages[4:]])
+
+
+class ChannelLayerCheckTests(SimpleTestCase):
+    def test_in_memory_layer_is_flagged_in_production(self):
+        with override_settings(DEBUG=False, CHANNEL_LAYERS={'default': {'BACKEND': MEMORY_BACKEND}}):
+            self.assertEqual([message.id for message in check_channel_layer(None)], ['chat.W001'])
+        with override_settings(DEBUG=True, CHANNEL_LAYERS={'default': {'BACKEND': MEMORY_BACKEND}}):
+            self.assertEqual(check_channel_layer(None), [])
+        redis = build_channel_layers({'REDIS_URL': 'redis://localhost:6379/0'})
+        with override_settings(DEBUG=False, CHANNEL_LAYERS=redis):
+            self.assertEqual(check_channel_layer(None), [])
+
+    def test_misconfigured_layer_is_an_error(self):
+        with override_settings(CHANNEL_LAYERS={}):
+            self.assertEqual([message.id for message in check_channel_layer_backend(None)], ['chat.E001'])
+        with override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels_missing.core.RedisChannelLayer'}}):
+            self.assertEqual([message.id for message in check_channel_layer_backend(None)], ['chat.E002'])
+        with override_settings(CHANNEL_LAYERS={'default': {'BACKEND': MEMORY_BACKEND}}):
+            self.assertEqual(check_channel_layer_backend(None), [])
+
+
+@skipIf(TcpFakeServer is None, "needs fakeredis")
+class ChannelLayerCrossProcessTests(SimpleTestCase):
+    """Two worker processes sharing a (fake) Redis server, as behind gunicorn/daphne."""
+
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.redis_url = f'redis://127.0.0.1:{port}/0'
+
+    def test_group_messages_reach_another_process(self):
+        for backend in ('redis', 'redis-pubsub'):
+            with self.subTest(backend=backend):
+                layers = json.dumps(build_channel_layers({'CHANNEL_LAYER': backend, 'REDIS_URLS': self.redis_url}))
+                receiver = subprocess.Popen(
+                    [sys.executable, '-c', RECEIVER, layers], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                )
+                try:
+                    self.assertEqual(receiver.stdout.readline().strip(), 'ready')
+                    subprocess.run([sys.executable, '-c', SENDER, layers], check=True, capture_output=True, timeout=30)
+                    out, err = receiver.communicate(timeout=30)
+                finally:
+                    receiver.kill()
+                    receiver.wait()
+                self.assertEqual(receiver.returncode, 0, err)
+                self.assertEqual(out.strip(), 'hello from the other worker')
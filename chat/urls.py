@@ -11,4 +11,6 @@ urlpatterns = [
     path('delete/<str:username>/', views.delete_chat, name='delete_chat'),
     path('<str:username>/', views.chat_view, name='chat_with_user'),
     path('<str:username>/poll/', views.poll_new_messages, name='poll_messages'),
+    path('<str:username>/history/', views.chat_history, name='chat_history'),
+    path('<str:username>/export/', views.export_chat, name='export_chat'),
 ]
\ No newline at end of file
@@ -4,16 +4,25 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import (Q, Max, OuterRef, Subquery, Case, When, Value,
                               BooleanField, Exists, F)
 from django.http import JsonResponse
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_POST
 
 from .models import Message, DeletedChat
+from . import metrics
+from .archive import full_thread, thread_page
+from .serializers import EXPORTED_MESSAGE, MESSAGE
+from poornimax.decorators import alogin_required
+from poornimax.replicas import use_replica
+from poornimax.serialization import FastJsonResponse, StreamingJsonResponse, stream_json
+from poornimax.write_queue import run_write
 
 User = get_user_model()
 
+CHAT_PAGE_SIZE = 50
+
 
 def _get_active_conversations(user):
     """
@@ -63,6 +72,7 @@ def _get_active_conversations(user):
 
 
 @login_required
+@use_replica
 def inbox_view(request):
     """Displays the user's inbox with all active conversations."""
     active_users = _get_active_conversations(request.user)
@@ -72,6 +82,7 @@ def inbox_view(request):
 # chat/views.py
 
 @login_required
+@use_replica
 def inbox_content(request):
     """Returns the rendered HTML for the inbox, used for AJAX refreshes."""
     # 1. This query runs successfully
@@ -84,6 +95,7 @@ def inbox_content(request):
     return JsonResponse({'html': html})
 
 @login_required
+@use_replica
 def inbox_unread_status(request):
     """
     Returns a simple dictionary of users who have unread messages.
@@ -94,8 +106,9 @@ def inbox_unread_status(request):
     return JsonResponse({'unread_status': unread_status})
 
 
-@login_required
-def inbox_updates(request):
+@alogin_required
+@use_replica
+async def inbox_updates(request):
     """
     Checks if there have been any new messages or deletions since the last check.
     This is a quick check to decide if a full refresh is needed.
@@ -112,20 +125,20 @@ def inbox_updates(request):
         return JsonResponse({'error': 'Invalid timestamp format'}, status=400)
 
     user = request.user
-    new_messages = Message.objects.filter(
+    new_messages = await Message.objects.filter(
         Q(receiver=user) | Q(sender=user),
         timestamp__gt=after_dt
-    ).exists()
+    ).aexists()
 
-    deleted_chats = DeletedChat.objects.filter(
+    deleted_chats = await DeletedChat.objects.filter(
         user=user,
         deleted_at__gt=after_dt
-    ).exists()
+    ).aexists()
     
     # Check if a message was marked as read after the last update.
-    read_messages = Message.objects.filter(
+    read_messages = await Message.objects.filter(
         receiver=user, read=True, timestamp__gt=after_dt
-    ).exists()
+    ).aexists()
 
     return JsonResponse({
         'updates': True,
@@ -148,24 +161,52 @@ def chat_view(request, username):
     if request.method == 'POST':
         content = request.POST.get('message')
         if content:
-            msg = Message.objects.create(sender=request.user, receiver=other_user, content=content)
-            return JsonResponse({
-                'sender': request.user.username,
-                'content': msg.content,
-                'timestamp': msg.timestamp.strftime('%H:%M'),
-                'sender_is_user': True
-            })
-
-    # Get messages for the conversation, respecting deletion timestamps.
-    deleted_chat = DeletedChat.objects.filter(user=request.user, other_user=other_user).first()
-    message_filter = Q(sender__in=[request.user, other_user], receiver__in=[request.user, other_user])
-
-    if deleted_chat:
-        message_filter &= Q(timestamp__gt=deleted_chat.deleted_at)
-
-    messages = Message.objects.filter(message_filter)
-    
-    return render(request, 'chat/chat.html', {'messages': messages, 'other_user': other_user})
+            msg = run_write(Message.objects.create, sender=request.user, receiver=other_user, content=content)
+            metrics.MESSAGES.inc(transport='http')
+            return FastJsonResponse(MESSAGE(msg, viewer_id=request.user.id))
+
+    # The latest page of the conversation, respecting deletion timestamps; older pages load on scroll.
+    messages, older_cursor = thread_page(request.user, other_user, page_size=CHAT_PAGE_SIZE)
+    messages.reverse()
+
+    return render(request, 'chat/chat.html', {
+        'messages': messages, 'other_user': other_user, 'older_cursor': older_cursor,
+    })
+
+
+@login_required
+@use_replica
+def chat_history(request, username):
+    """Older messages of a conversation, newest first, for scrolling back; includes archived ones."""
+    other_user = get_object_or_404(User, username=username)
+    try:
+        messages, older_cursor = thread_page(
+            request.user, other_user, cursor=request.GET.get('before'), page_size=CHAT_PAGE_SIZE,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return FastJsonResponse({
+        'messages': MESSAGE.many(messages, viewer_id=request.user.id),
+        'older_cursor': older_cursor,
+    })
+
+
+@login_required
+def export_chat(request, username):
+    """
+    The whole conversation the user has not deleted, archive included, as a
+    JSON download. Streamed in chunks, so long histories never sit in memory.
+    """
+    other_user = get_object_or_404(User, username=username)
+    deleted_at = DeletedChat.objects.filter(
+        user=request.user, other_user=other_user,
+    ).values_list('deleted_at', flat=True).first()
+    response = StreamingJsonResponse(stream_json(
+        full_thread(request.user, other_user, after=deleted_at), EXPORTED_MESSAGE,
+        key='messages', extra={'with': other_user.username}, viewer_id=request.user.id,
+    ))
+    response['Content-Disposition'] = f'attachment; filename="chat-{other_user.username}.json"'
+    return response
 
 from pathlib import Path
 from django.conf import settings
@@ -191,15 +232,8 @@ def delete_chat(request, username):
         other_user=other_user
     ).values_list('deleted_at', flat=True).first()
 
-    # Only grab messages after the last deletion
-    message_filter = {
-        'sender__in': [request.user, other_user],
-        'receiver__in': [request.user, other_user],
-    }
-    if last_deletion:
-        message_filter['timestamp__gt'] = last_deletion
-
-    messages = Message.objects.filter(**message_filter).order_by('timestamp')
+    # Only grab messages after the last deletion, archived ones included
+    messages = full_thread(request.user, other_user, after=last_deletion)
 
     try:
         base_dir = Path(settings.BASE_DIR) / 'deleted_chats'
@@ -222,14 +256,15 @@ def delete_chat(request, username):
         other_user=other_user,
         defaults={'deleted_at': timezone.now()}
     )
+    metrics.CHATS_DELETED.inc()
 
     return JsonResponse({'success': True})
 
 
-@login_required
-def poll_new_messages(request, username):
+@alogin_required
+async def poll_new_messages(request, username):
     """Polls for new messages within a specific chat window."""
-    other_user = get_object_or_404(User, username=username)
+    other_user = await aget_object_or_404(User, username=username)
     last_timestamp_str = request.GET.get('after')
 
     if not last_timestamp_str:
@@ -243,21 +278,18 @@ def poll_new_messages(request, username):
         return JsonResponse({'error': 'Invalid timestamp format'}, status=400)
 
     # Fetch new messages and mark them as read
-    new_messages = Message.objects.filter(
+    new_messages = [msg async for msg in Message.objects.filter(
         sender=other_user,
         receiver=request.user,
         timestamp__gt=last_dt
-    )
+    )]
+    for msg in new_messages:
+        msg.sender = other_user
     
-    data = [{
-        'sender': msg.sender.username,
-        'content': msg.content,
-        'timestamp': msg.timestamp.strftime('%H:%M'),
-        'sender_is_user': False
-    } for msg in new_messages]
+    data = MESSAGE.many(new_messages, viewer_id=request.user.id)
 
     # Mark the fetched messages as read
-    if new_messages.exists():
-        new_messages.update(read=True)
+    if new_messages:
+        await Message.objects.filter(id__in=[msg.id for msg in new_messages]).aupdate(read=True)
 
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    return FastJsonResponse(data, safe=False)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class FeedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'feed'
+
+    def ready(self):
+        # Connects the response-cache invalidation signals.
+        from . import caching  # noqa: F401
+        from . import checks  # noqa: F401  (registers the system checks)
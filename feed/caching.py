@@ -0,0 +1,260 @@
+"""
+Version-keyed, conditional responses for the feed JSON endpoints.
+
+Each cached payload depends on a few *scopes* (``'posts'``, ``'post:<id>'``,
+``'confession:<id>'``, ``'users'``, ``'user:<id>'``, ``'user_posts:<id>'``),
+and each scope has a version counter in the default cache. The signal
+handlers at the bottom of this module bump the counters when a post,
+confession, like, comment or user changes, once the surrounding
+transaction commits.
+
+``conditional_json`` / ``aconditional_json`` turn the current versions into
+an ETag without touching the database:
+
+* ``If-None-Match`` matches -> 304; nothing is queried or serialized.
+* ETag already cached       -> the stored JSON body is returned as is.
+* otherwise                 -> ``build()`` runs and its body is cached under the ETag.
+
+ETags also roll over every ``FEED_CACHE_TIMEOUT`` seconds, so payloads with
+relative times ("5 minutes ago") never stay stale for longer than that.
+Writes that skip signals (``bulk_create``, ``QuerySet.update``) do not bump
+versions.
+
+The same counters key the ``{% cache %}`` blocks of the server-rendered
+pages; see ``fragment_versions``.
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.http import HttpResponse, HttpResponseBase, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from accounts.models import UserQuestionnaire
+from poornimax.serialization import dumps
+
+from .metrics import CACHE_LOOKUPS
+from .models import Comment, Confession, ConfessionComment, ConfessionLike, Like, Post
+
+CACHE_NAME = 'feed_json'
+
+
+def _timeout():
+    return getattr(settings, 'FEED_CACHE_TIMEOUT', 60)
+
+
+# ==============================================================================
+# VERSION COUNTERS
+# ==============================================================================
+
+def _version_key(scope):
+    return f'feedver:{scope}'
+
+
+def _initial_version():
+    # Seeded from the clock so a counter evicted from the cache never restarts
+    # at a value that an older cached response is still stored under.
+    return time.time_ns() // 1000
+
+
+def get_versions(scopes):
+    """Returns ``{scope: version}``, creating counters that do not exist yet."""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _initial_version(), timeout=None)
+        found.update(cache.get_many(missing))
+    return {scope: found.get(key, 0) for key, scope in keys.items()}
+
+
+def bump(*scopes):
+    """Invalidates every cached response that depends on ``scopes``."""
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+
+# ==============================================================================
+# CONDITIONAL RESPONSES
+# ==============================================================================
+
+def _lookup(request, scopes, vary_on_user):
+    """Returns ``(etag, not_modified, cached_body)`` for the current versions."""
+    versions = get_versions(scopes)
+    parts = [request.get_full_path(), str(int(time.time() // _timeout()))]
+    if vary_on_user:
+        parts.append(f'user={request.user.pk}')
+    parts.extend(f'{scope}={versions[scope]}' for scope in scopes)
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    etag = f'"{digest}"'
+
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in client_etags or '*' in client_etags:
+        CACHE_LOOKUPS.inc(cache=CACHE_NAME, result='not_modified')
+        return etag, True, None
+    body = cache.get(_body_key(etag))
+    CACHE_LOOKUPS.inc(cache=CACHE_NAME, result='miss' if body is None else 'hit')
+    return etag, False, body
+
+
+def _body_key(etag):
+    return 'feedjson:' + etag.strip('"')
+
+
+def _store(etag, body):
+    cache.set(_body_key(etag), body, _timeout())
+
+
+def _response(etag, body=None):
+    response = HttpResponseNotModified() if body is None else HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Browsers keep the body but must revalidate it on every use.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def conditional_json(request, scopes, build, vary_on_user=False):
+    """
+    Serves the JSON payload of ``build()`` with an ETag derived from the
+    versions of ``scopes``. ``build`` returns a dict to cache, or an
+    ``HttpResponse`` (e.g. an error) that is passed through uncached.
+    Pass ``vary_on_user`` when the payload differs per user.
+    """
+    etag, not_modified, body = _lookup(request, scopes, vary_on_user)
+    if not_modified:
+        return _response(etag)
+    if body is None:
+        data = build()
+        if isinstance(data, HttpResponseBase):
+            return data
+        body = dumps(data)
+        _store(etag, body)
+    return _response(etag, body)
+
+
+async def aconditional_json(request, scopes, build, vary_on_user=False):
+    """Async variant of ``conditional_json``; ``build`` is a coroutine function."""
+    etag, not_modified, body = await sync_to_async(_lookup)(request, scopes, vary_on_user)
+    if not_modified:
+        return _response(etag)
+    if body is None:
+        data = await build()
+        if isinstance(data, HttpResponseBase):
+            return data
+        body = dumps(data)
+        await sync_to_async(_store)(etag, body)
+    return _response(etag, body)
+
+
+# ==============================================================================
+# TEMPLATE FRAGMENTS
+# ==============================================================================
+
+def fragment_versions(**scopes):
+    """
+    Template context for ``{% cache %}`` blocks: ``timeout`` plus the current
+    version of each ``name=scope``. Pass the versions as vary-on arguments so
+    a write to the scope renders a new fragment::
+
+        {% cache fragments.timeout profile_posts profile_user.id fragments.posts %}
+
+    Values the fragment needs should reach the template as querysets or
+    callables, so nothing is queried when the fragment is cached.
+    """
+    versions = get_versions(scopes.values())
+    return {
+        'timeout': getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 300),
+        **{name: versions[scope] for name, scope in scopes.items()},
+    }
+
+
+# ==============================================================================
+# INVALIDATION
+# ==============================================================================
+
+def _bump_on_commit(*scopes):
+    # Bumping before commit would let a concurrent request cache the old rows
+    # under the new version.
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def post_changed(sender, instance, **kwargs):
+    _bump_on_commit('posts', f'post:{instance.pk}', f'user_posts:{instance.user_id}')
+
+
+def post_child_changed(sender, instance, **kwargs):
+    _bump_on_commit('posts', f'post:{instance.post_id}')
+
+
+def confession_changed(sender, instance, **kwargs):
+    _bump_on_commit(f'confession:{instance.pk}')
+
+
+def confession_child_changed(sender, instance, **kwargs):
+    _bump_on_commit(f'confession:{instance.confession_id}')
+
+
+# The only user columns shown or counted outside the user's own profile:
+# names and avatars on posts, comments and user cards, and the department and
+# college the home page counts people by.
+LISTED_USER_FIELDS = ('username', 'full_name', 'profile_picture', 'department', 'college')
+
+
+def user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Runs before the save overwrites the row, so the listed columns can be
+    # compared. Saves that name no listed field need no query.
+    if raw or instance._state.adding:
+        return
+    fields = [name for name in LISTED_USER_FIELDS if update_fields is None or name in update_fields]
+    stored = sender._base_manager.filter(pk=instance.pk).values(*fields).first() if fields else {}
+    if stored is None:
+        return
+    instance._listed_fields_changed = any(
+        stored[name] != sender._meta.get_field(name).get_prep_value(getattr(instance, name)) for name in fields
+    )
+
+
+def user_changed(sender, instance, created=None, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no cached payload shows.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    scopes = [f'user:{instance.pk}']
+    # New and deleted users change the home page counts; other saves only
+    # matter to everyone when a listed field changed (see user_saving).
+    if created is not False or instance.__dict__.pop('_listed_fields_changed', True):
+        scopes.append('users')
+    _bump_on_commit(*scopes)
+
+
+def questionnaire_changed(sender, instance, **kwargs):
+    # The home page counts people from the same year.
+    _bump_on_commit('users')
+
+
+INVALIDATED_BY = {
+    Post: post_changed,
+    Like: post_child_changed,
+    Comment: post_child_changed,
+    Confession: confession_changed,
+    ConfessionLike: confession_child_changed,
+    ConfessionComment: confession_child_changed,
+    get_user_model(): user_changed,
+    UserQuestionnaire: questionnaire_changed,
+}
+
+for _model, _handler in INVALIDATED_BY.items():
+    post_save.connect(_handler, sender=_model, dispatch_uid=f'feed_cache_save_{_model.__name__}')
+    post_delete.connect(_handler, sender=_model, dispatch_uid=f'feed_cache_delete_{_model.__name__}')
+pre_save.connect(user_saving, sender=get_user_model(), dispatch_uid='feed_cache_pre_save_User')
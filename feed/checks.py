@@ -0,0 +1,15 @@
+from django.core.checks import Error, register
+from django.core.exceptions import ImproperlyConfigured
+
+from .scoring import experiment, models
+
+
+@register()
+def check_scoring_models(app_configs, **kwargs):
+    """Reports a broken COMPATIBILITY_MODELS / COMPATIBILITY_MODEL / COMPATIBILITY_EXPERIMENT at startup."""
+    try:
+        models()
+        experiment()
+    except (ImproperlyConfigured, TypeError) as e:
+        return [Error(str(e), hint="See feed/scoring.py.", id='feed.E001')]
+    return []
@@ -0,0 +1,260 @@
+"""
+Compatibility scoring and ranked candidate retrieval.
+
+The rules score out of 100 in three parts: intent and life stage
+(relationship status, looking for, year) worth ``INTENT_WEIGHT``,
+personality and communication style worth ``PERSONALITY_WEIGHT``, and hobby
+overlap worth ``HOBBIES_WEIGHT``. The total is rounded and clamped to 19-99.
+``RulesModel`` is the scoring model (see feed/scoring.py) for these rules,
+with the weights as options; ``score`` is the pairwise reference.
+
+``top_matches`` ranks the other users for one user with the active model
+without scoring all of them. Candidates are first counted per value of the
+model's ``partition_fields`` in one GROUP BY; for the rules that is the
+intent triple, which alone decides the intent part. Partitions of the same
+level are fetched together, best level first, and scored in batches. Once
+the K-th best score found so far reaches a level's bound (for the rules:
+its intent part plus the full personality and hobby weights), no remaining
+level can enter the top K and is never read. The top K is kept in a heap of
+size K, so nothing is sorted but the page returned.
+
+Ties rank the better level (intent match) first, then the lower user id, so
+pages are stable from one request to the next.
+"""
+import heapq
+from collections import defaultdict
+from itertools import islice
+
+from django.db.models import Count, Q
+
+from accounts.models import UserQuestionnaire
+
+from . import metrics
+from .scoring import ScoringModel, active_model
+
+INTENT_WEIGHT, PERSONALITY_WEIGHT, HOBBIES_WEIGHT = 50, 30, 20
+INTENT_MAX_POINTS, PERSONALITY_MAX_POINTS = 4, 4
+MIN_SCORE, MAX_SCORE = 19, 99
+
+INTENT_FIELDS = ('relationship_status', 'looking_for', 'year')
+PROFILE_FIELDS = ('personality', 'communication_style', 'hobbies_interests')
+
+
+def intent_points(a, b):
+    """Points out of ``INTENT_MAX_POINTS`` for two ``(relationship_status, looking_for, year)`` triples."""
+    points = 0
+    if a[0] == b[0]:
+        points += 2
+    elif {a[0], b[0]} <= {'Single', 'Focusing on me'}:
+        points += 1
+    if a[1] == b[1]:
+        points += 1
+    elif 'New friends' in {a[1], b[1]} and 'Not sure yet' in {a[1], b[1]}:
+        points += 0.5
+    if a[2] == b[2]:
+        points += 1
+    return points
+
+
+def personality_points(a, b):
+    """Points out of ``PERSONALITY_MAX_POINTS`` for two ``(personality, communication_style)`` pairs."""
+    points = 0
+    if a[0] == b[0]:
+        points += 2
+    elif 'A mix of both' in {a[0], b[0]}:
+        points += 1.5
+    elif {a[0], b[0]} == {'Introvert', 'Extrovert'}:
+        points += 0.5
+    if a[1] == b[1]:
+        points += 2
+    elif 'A bit of everything' in {a[1], b[1]}:
+        points += 1.5
+    return points
+
+
+def hobby_set(hobbies_interests):
+    return set(hobbies_interests.split(',')) if hobbies_interests else set()
+
+
+def jaccard(a, b):
+    """Similarity of two hobby sets; two empty sets count as identical."""
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def intent_part(points):
+    return points / INTENT_MAX_POINTS * INTENT_WEIGHT
+
+
+def final_score(total):
+    return max(MIN_SCORE, min(MAX_SCORE, round(total)))
+
+
+def score(q1, q2):
+    """Compatibility of two questionnaires, 19-99."""
+    intent = intent_points([getattr(q1, f) for f in INTENT_FIELDS], [getattr(q2, f) for f in INTENT_FIELDS])
+    personality = personality_points(
+        (q1.personality, q1.communication_style), (q2.personality, q2.communication_style),
+    )
+    hobbies = jaccard(hobby_set(q1.hobbies_interests), hobby_set(q2.hobbies_interests))
+    return final_score(
+        intent_part(intent) + personality / PERSONALITY_MAX_POINTS * PERSONALITY_WEIGHT + hobbies * HOBBIES_WEIGHT
+    )
+
+
+class _Table(dict):
+    """Memoizes ``points(key)`` per key."""
+
+    def __init__(self, points):
+        super().__init__()
+        self.points = points
+
+    def __missing__(self, key):
+        value = self[key] = self.points(key)
+        return value
+
+
+class RulesModel(ScoringModel):
+    """
+    The rules above as a scoring model. A candidate is encoded as its intent
+    triple, its (personality, communication style) pair and its raw hobby
+    list; each is a key into one of three tables of the viewer's points for
+    that answer, filled in as answers are first seen during one ``score``
+    call and dropped with it. Scoring a batch is then three lookups and a
+    sum per candidate.
+    """
+    fields = INTENT_FIELDS + PROFILE_FIELDS
+    partition_fields = INTENT_FIELDS
+    max_score = MAX_SCORE
+
+    def __init__(self, name, intent_weight=INTENT_WEIGHT, personality_weight=PERSONALITY_WEIGHT,
+                 hobbies_weight=HOBBIES_WEIGHT):
+        super().__init__(name)
+        self.intent_weight = intent_weight
+        self.personality_weight = personality_weight
+        self.hobbies_weight = hobbies_weight
+
+    def encode(self, row):
+        return row[:3], row[3:5], row[5]
+
+    def encode_many(self, rows):
+        return [(row[:3], row[3:5], row[5]) for row in rows]
+
+    def _tables(self, user):
+        intent, profile, hobbies = user
+        my_hobbies = hobby_set(hobbies)
+        return (
+            _Table(lambda theirs: intent_points(intent, theirs) / INTENT_MAX_POINTS * self.intent_weight),
+            _Table(lambda theirs: personality_points(profile, theirs) / PERSONALITY_MAX_POINTS * self.personality_weight),
+            _Table(lambda theirs: jaccard(my_hobbies, hobby_set(theirs)) * self.hobbies_weight),
+        )
+
+    def score(self, user, candidates):
+        intent, profile, hobbies = self._tables(user)
+        return [
+            max(MIN_SCORE, min(MAX_SCORE, round(intent[i] + profile[p] + hobbies[h])))
+            for i, p, h in candidates
+        ]
+
+    def level(self, user, partition):
+        return intent_points(user[0], partition)
+
+    def level_bound(self, user, level):
+        return final_score(
+            level / INTENT_MAX_POINTS * self.intent_weight + self.personality_weight + self.hobbies_weight
+        )
+
+
+def pair_score(q1, q2, model=None):
+    """Compatibility of two questionnaires under ``model`` (default: the active one)."""
+    model = model or active_model()
+    return model.score(model.encode_answers(q1), [model.encode_answers(q2)])[0]
+
+
+def candidates(user, college=None, department=None, gender=None, looking_for=None):
+    """Questionnaires of the users ``user`` could be matched with, narrowed by the given filters."""
+    queryset = UserQuestionnaire.objects.exclude(user=user)
+    for field, value in (('user__college', college), ('user__department', department),
+                         ('user__gender', gender), ('looking_for', looking_for)):
+        if value:
+            queryset = queryset.filter(**{field: value})
+    return queryset.order_by()
+
+
+def levels(model, user, queryset):
+    """
+    Groups the candidates by their ``model.partition_fields`` values and ranks
+    the groups for the encoded viewer ``user``. Returns ``(levels, total)``:
+    ``levels`` is a best-first list of ``(level, [partition, ...])``.
+    """
+    fields = model.partition_fields
+    if not fields:
+        return [(model.level(user, ()), [()])], queryset.count()
+    grouped, total = defaultdict(list), 0
+    for row in queryset.values_list(*fields).annotate(n=Count('pk')):
+        grouped[model.level(user, row[:-1])].append(row[:-1])
+        total += row[-1]
+    return sorted(grouped.items(), reverse=True), total
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def top_matches(user, k, stats=None, model=None, **filters):
+    """
+    Returns ``(ranked, total)``: the ``k`` best matches for ``user`` under
+    ``model`` (default: the active one) as ``(user_id, score)`` pairs, best
+    first, and how many candidates there are. Users without a questionnaire
+    are neither ranked nor counted. ``stats``, if given, is filled with the
+    number of levels and candidates scored.
+    """
+    try:
+        mine = user.questionnaire
+    except UserQuestionnaire.DoesNotExist:
+        return [], 0
+    model = model or active_model()
+    with metrics.MATCH_RANKING_SECONDS.time(model=model.name):
+        viewer = model.encode_answers(mine)
+        queryset = candidates(user, **filters)
+        ranked_levels, total = levels(model, viewer, queryset)
+
+        heap = []  # (score, level, -user_id); heap[0] is the k-th best so far
+        scored = levels_read = 0
+        for level, partitions in ranked_levels:
+            if len(heap) == k and heap[0][:2] >= (model.level_bound(viewer, level), level):
+                break
+            in_level = Q()
+            for partition in partitions:
+                in_level |= Q(**dict(zip(model.partition_fields, partition)))
+            levels_read += 1
+            rows = queryset.filter(in_level).values_list(*model.fields, 'user_id').iterator(chunk_size=2000)
+            for batch in _batches(rows, 2000):
+                scores = model.score(viewer, model.encode_many(batch))
+                scored += len(batch)
+                for row, match_score in zip(batch, scores):
+                    entry = (match_score, level, -row[-1])
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+    if stats is not None:
+        stats.update(levels=len(ranked_levels), levels_read=levels_read, scored=scored)
+    ranked = sorted(heap, reverse=True)
+    return [(-negative_id, match_score) for match_score, _, negative_id in ranked], total
+
+
+def full_sort_matches(user, **filters):
+    """Scores every candidate and sorts them all; the baseline ``bench_matching`` compares against."""
+    try:
+        mine = user.questionnaire
+    except UserQuestionnaire.DoesNotExist:
+        return []
+    scored = [(q.user_id, score(mine, q)) for q in candidates(user, **filters)]
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return scored
@@ -0,0 +1,93 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from accounts.models import Crush
+from .models import Post, Confession
+from .streams import post_group_name, confession_group_name
+from poornimax.metrics import WEBSOCKET_CONNECTIONS, WEBSOCKET_CONNECTS
+
+
+class EngagementStreamConsumer(AsyncWebsocketConsumer):
+    """
+    Read-only stream of new comments and like counts for a single object.
+    Subclasses resolve the group name and decide whether the user may join.
+    """
+
+    # Label used for this consumer's websocket metrics.
+    metrics_name = 'engagement'
+
+    async def connect(self):
+        self.user = self.scope['user']
+
+        if self.user.is_anonymous:
+            WEBSOCKET_CONNECTS.inc(consumer=self.metrics_name, result='rejected')
+            await self.close()
+            return
+
+        self.group_name = await self.get_group_name(self.scope['url_route']['kwargs'])
+        if not self.group_name:
+            WEBSOCKET_CONNECTS.inc(consumer=self.metrics_name, result='rejected')
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+        WEBSOCKET_CONNECTS.inc(consumer=self.metrics_name, result='accepted')
+        WEBSOCKET_CONNECTIONS.inc(consumer=self.metrics_name)
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'group_name', None):
+            WEBSOCKET_CONNECTIONS.dec(consumer=self.metrics_name)
+            await self.channel_layer.group_discard(
+                self.group_name,
+                self.channel_name
+            )
+
+    # Viewers never send anything; likes and comments go through the HTTP views.
+    async def receive(self, text_data=None, bytes_data=None):
+        pass
+
+    # Receive an event published by feed.streams
+    async def stream_event(self, event):
+        await self.send(text_data=json.dumps(event['payload']))
+
+    async def get_group_name(self, kwargs):
+        raise NotImplementedError
+
+
+class PostStreamConsumer(EngagementStreamConsumer):
+    metrics_name = 'post_stream'
+
+    async def get_group_name(self, kwargs):
+        post_id = int(kwargs['post_id'])
+        if not await self.can_view_post(post_id):
+            return None
+        return post_group_name(post_id)
+
+    @database_sync_to_async
+    def can_view_post(self, post_id):
+        """Same visibility rule as get_post_data: public, own post, or mutual crush."""
+        post = Post.objects.filter(id=post_id).only('user_id', 'is_public').first()
+        if post is None:
+            return False
+        if post.is_public or post.user_id == self.user.id:
+            return True
+        return Crush.objects.filter(sender=self.user, receiver_id=post.user_id, is_mutual=True).exists()
+
+
+class ConfessionStreamConsumer(EngagementStreamConsumer):
+    metrics_name = 'confession_stream'
+
+    async def get_group_name(self, kwargs):
+        confession_id = int(kwargs['confession_id'])
+        if not await self.confession_exists(confession_id):
+            return None
+        return confession_group_name(confession_id)
+
+    @database_sync_to_async
+    def confession_exists(self, confession_id):
+        return Confession.objects.filter(id=confession_id).exists()
@@ -0,0 +1,116 @@
+"""
+Concurrency benchmark for the async JSON endpoints.
+
+Drives the feed and chat AJAX endpoints through Django's ASGI handler with
+an increasing number of in-flight requests and reports throughput and
+latency percentiles for each level.
+
+Usage:
+    python manage.py bench_async_views --user alice --other bob
+    python manage.py bench_async_views --user alice --other bob --concurrency 1,25,100 --json
+"""
+import asyncio
+import json
+import time
+from urllib.parse import quote
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from feed.models import Post
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Measures throughput and latency of the async feed/chat endpoints under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Username the requests are made as.")
+        parser.add_argument('--other', required=True, help="Chat partner used for the chat endpoints.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and concurrency level.")
+        parser.add_argument('--concurrency', default='1,10,50', help="Comma-separated in-flight request levels.")
+        parser.add_argument('--json', action='store_true', help="Print machine-readable JSON instead of a table.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+            other = User.objects.get(username=options['other'])
+        except User.DoesNotExist as e:
+            raise CommandError(str(e))
+
+        levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        post = Post.objects.filter(is_public=True).first()
+        after = quote((timezone.now() - timezone.timedelta(days=1)).isoformat())
+
+        endpoints = [
+            ('lazy_load_posts', 'get', reverse('feed:lazy_load_posts') + '?page=1'),
+            ('get_home_updates', 'get', reverse('feed:get_home_updates')),
+            ('inbox_updates', 'get', reverse('chat:inbox_updates') + f'?after={after}'),
+            ('poll_new_messages', 'get', reverse('chat:poll_messages', args=[other.username]) + f'?after={after}'),
+        ]
+        if post:
+            endpoints += [
+                ('get_post_comments', 'get', reverse('feed:get_post_comments', args=[post.id])),
+                ('like_post', 'post', reverse('feed:like_post', args=[post.id])),
+            ]
+
+        # The test client talks to 'testserver' over plain HTTP.
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            results = asyncio.run(self._run(user, endpoints, levels, options['requests']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'endpoint':<20} {'inflight':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<20} {row['concurrency']:>8} {row['rps']:>9.1f} "
+                f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['errors']:>6}"
+            )
+
+    async def _run(self, user, endpoints, levels, total):
+        client = AsyncClient()
+        await client.aforce_login(user)
+
+        results = []
+        for name, method, url in endpoints:
+            for level in levels:
+                results.append(await self._measure(client, name, method, url, level, total))
+        return results
+
+    async def _measure(self, client, name, method, url, level, total):
+        semaphore = asyncio.Semaphore(level)
+        latencies = []
+        errors = 0
+
+        async def one_request():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await getattr(client, method)(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+        summary = summarize(latencies)
+        return {
+            'endpoint': name,
+            'concurrency': level,
+            'requests': total,
+            'rps': total / elapsed if elapsed else 0.0,
+            'mean_ms': summary['mean_ms'],
+            'p50_ms': summary['p50_ms'],
+            'p95_ms': summary['p95_ms'],
+            'p99_ms': summary['p99_ms'],
+            'errors': errors,
+        }
@@ -0,0 +1,91 @@
+"""
+Benchmark for the explore page's confession listing.
+
+Seeds viral confessions (many likes and comments each) inside a transaction
+that is rolled back afterwards, then times the old COUNT(DISTINCT)
+double-join query against the current counter-backed keyset page.
+
+Usage:
+    python manage.py bench_explore
+    python manage.py bench_explore --likes 1000 --comments 1000 --confessions 5 --repeat 10
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+
+from feed.models import Confession, ConfessionComment, ConfessionLike
+from feed.pagination import keyset_page
+from feed.views import CONFESSIONS_PER_PAGE, _confession_feed
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    """Raised to discard the seeded benchmark data."""
+
+
+class Command(BaseCommand):
+    help = "Compares the legacy COUNT(DISTINCT) explore query with the keyset/counter query on viral confessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--likes', type=int, default=1000, help="Likes per seeded confession.")
+        parser.add_argument('--comments', type=int, default=1000, help="Comments per seeded confession.")
+        parser.add_argument('--confessions', type=int, default=3, help="Number of viral confessions to seed.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                viewer = self._seed(options['likes'], options['comments'], options['confessions'])
+                legacy = self._time(lambda: self._legacy_query(viewer), options['repeat'])
+                keyset = self._time(
+                    lambda: keyset_page(_confession_feed(viewer), 'created_at', page_size=CONFESSIONS_PER_PAGE),
+                    options['repeat'],
+                )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"Seeded {options['confessions']} confessions x {options['likes']} likes x {options['comments']} comments")
+        self.stdout.write(f"  legacy COUNT(DISTINCT) query: median {legacy:.2f} ms")
+        self.stdout.write(f"  keyset + stored counters:     median {keyset:.2f} ms")
+        if keyset:
+            self.stdout.write(self.style.SUCCESS(f"  speedup: {legacy / keyset:.1f}x"))
+
+    def _seed(self, likes, comments, confessions):
+        fans = max(likes, comments)
+        users = User.objects.bulk_create(
+            User(username=f'bench_explore_{i}', college_email=f'bench_explore_{i}@poornima.org')
+            for i in range(fans)
+        )
+        viewer = users[0]
+        for _ in range(confessions):
+            # bulk_create skips the counter signals, so the counters are set directly.
+            confession = Confession.objects.create(content="Viral confession", like_count=likes, comment_count=comments)
+            ConfessionLike.objects.bulk_create(
+                ConfessionLike(confession=confession, user=user) for user in users[:likes]
+            )
+            ConfessionComment.objects.bulk_create(
+                ConfessionComment(confession=confession, user=user, content="+1") for user in users[:comments]
+            )
+        return viewer
+
+    def _legacy_query(self, viewer):
+        user_confession_likes = ConfessionLike.objects.filter(confession=OuterRef('pk'), user=viewer)
+        return list(Confession.objects.select_related('user').annotate(
+            legacy_like_count=Count('likes', distinct=True),
+            legacy_comment_count=Count('comments', distinct=True),
+            is_liked=Exists(user_confession_likes),
+        ).order_by('-created_at')[:CONFESSIONS_PER_PAGE])
+
+    def _time(self, query, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,222 @@
+"""
+End-to-end HTTP benchmark for every feed, chat and accounts URL.
+
+Walks the URL patterns of ``feed.urls``, ``chat.urls`` and ``accounts.urls``,
+fills in path arguments from a seeded user's own data (see ``seed_data``) and
+requests each endpoint through the full middleware stack. Every request
+runs inside a transaction that is rolled back, so write endpoints (likes,
+comments, deletes) can be repeated without changing the dataset.
+
+Reports latency percentiles, status codes and SQL query counts per endpoint.
+
+Usage:
+    python manage.py seed_data --users 2000
+    python manage.py bench_http
+    python manage.py bench_http --user seed000042 --repeat 50 --only feed: --json
+"""
+import json
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import accounts.urls
+import chat.urls
+import feed.urls
+from accounts.models import Friendship
+from feed.models import Comment, Confession, Post
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+URL_MODULES = [feed.urls, chat.urls, accounts.urls]
+
+# Endpoints that would end the benchmark client's session.
+SKIPPED = {
+    'accounts:logout': "logs the benchmark user out",
+    'accounts:delete_account': "logs the benchmark user out",
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _request_specs(fixture):
+    """(method, query/form data) per URL name; anything not listed is a plain GET."""
+    after = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+    return {
+        'feed:like_post': ('post', {}),
+        'feed:add_comment': ('post', {'content': 'Benchmark comment'}),
+        'feed:crush_action': ('post', {'crush_action': 'send_crush'}),
+        'feed:crush_action_profile': ('post', {'crush_action': 'send_crush'}),
+        'feed:delete_post': ('post', {}),
+        'feed:delete_comment': ('post', {}),
+        'feed:confession': ('post', {'content': 'Benchmark confession', 'is_anonymous': 'on'}),
+        'feed:like_confession': ('post', {'confession_id': fixture['confession_id']}),
+        'feed:add_confession_comment': ('post', {'confession_id': fixture['confession_id'], 'content': 'Benchmark'}),
+        'feed:load_users_api': ('get', {'category': 'recently_joined'}),
+        'feed:search_users_api': ('get', {'q': 'a'}),
+        'feed:lazy_load_posts': ('get', {'page': 1}),
+        'feed:test_lazy_load': ('get', {'page': 1}),
+        'feed:lazy_load_improved': ('get', {'page': 1}),
+        'chat:inbox_updates': ('get', {'after': after}),
+        'chat:poll_messages': ('get', {'after': after}),
+        'chat:delete_chat': ('post', {}),
+        'accounts:verify_otp': ('post', {'college_email': fixture['email'], 'otp': '000000'}),
+    }
+
+
+class Command(BaseCommand):
+    help = "Requests every feed/chat/accounts URL as a seeded user and reports latency and query counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to benchmark as (default: the seeded user with most friends).")
+        parser.add_argument('--prefix', default='seed', help="Username prefix used to pick the default user.")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per endpoint.")
+        parser.add_argument('--only', default='', help="Comma-separated URL name prefixes to run, e.g. 'feed:,chat:inbox'.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--json', action='store_true', help="Print machine-readable JSON instead of a table.")
+
+    def handle(self, *args, **options):
+        user = self._pick_user(options)
+        fixture = self._fixture(user)
+        specs = _request_specs(fixture)
+        only = [prefix.strip() for prefix in options['only'].split(',') if prefix.strip()]
+
+        # Broken views show up as 500s in the report instead of aborting the run.
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+
+        results = []
+        # The test client talks to 'testserver' over plain HTTP; OTP mails stay in memory.
+        with override_settings(
+            ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False,
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ):
+            for name, kwargs in self._endpoints(fixture):
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                if name in SKIPPED:
+                    results.append({'endpoint': name, 'skipped': SKIPPED[name]})
+                    continue
+                method, data = specs.get(name, ('get', {}))
+                url = reverse(name, kwargs=kwargs)
+                # delete_chat appends a transcript to disk, outside the rolled-back transaction.
+                transcript = Path(settings.BASE_DIR) / 'deleted_chats' / f"{user.username}_deletes_{fixture['username']}.txt"
+                existed = transcript.exists()
+                results.append(self._measure(client, name, method, url, data, options))
+                if not existed:
+                    transcript.unlink(missing_ok=True)
+                if options['verbosity'] > 1:
+                    self.stderr.write(f"{name}: {results[-1]['latency']['p50_ms']:.1f} ms")
+
+        report = {'user': user.username, 'repeat': options['repeat'], 'endpoints': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Benchmarking as {user.username}, {options['repeat']} requests per endpoint\n")
+        self.stdout.write(f"{'endpoint':<42} {'status':>8} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}")
+        for row in results:
+            if 'skipped' in row:
+                self.stdout.write(f"{row['endpoint']:<42} {'skipped':>8}  ({row['skipped']})")
+                continue
+            statuses = '/'.join(str(code) for code in row['statuses'])
+            self.stdout.write(
+                f"{row['endpoint']:<42} {statuses:>8} {row['latency']['p50_ms']:>8.2f} "
+                f"{row['latency']['p95_ms']:>8.2f} {row['queries_max']:>8}"
+            )
+
+    def _pick_user(self, options):
+        if options['user']:
+            try:
+                return User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']!r} does not exist.")
+
+        user = (
+            User.objects.filter(username__startswith=options['prefix'])
+            .annotate(friends=Count('friendships_from', distinct=True))
+            .filter(friends__gt=0, posts__isnull=False, comments__isnull=False)
+            .order_by('-friends', 'id')
+            .first()
+        )
+        if user is None:
+            raise CommandError("No seeded user with friends, posts and comments; run `manage.py seed_data` first.")
+        return user
+
+    def _fixture(self, user):
+        """Ids the URL patterns need, picked from ``user``'s own neighbourhood."""
+        friendship = Friendship.objects.filter(Q(user1=user) | Q(user2=user)).first()
+        other = friendship.user2 if friendship.user1_id == user.id else friendship.user1
+        friend_post = Post.objects.filter(user=other).first() or Post.objects.filter(is_public=True).first()
+        return {
+            'email': user.college_email,
+            'user_id': other.id,
+            'username': other.username,
+            'post_id': friend_post.id,
+            'own_post_id': Post.objects.filter(user=user).values_list('id', flat=True).first(),
+            'comment_id': Comment.objects.filter(user=user).values_list('id', flat=True).first(),
+            'confession_id': Confession.objects.values_list('id', flat=True).first(),
+        }
+
+    def _endpoints(self, fixture):
+        """Yields (namespaced url name, kwargs) for every named pattern in URL_MODULES."""
+        for module in URL_MODULES:
+            for pattern in module.urlpatterns:
+                if not pattern.name:
+                    continue  # The media files route appended in DEBUG.
+                name = f'{module.app_name}:{pattern.name}'
+                kwargs = {}
+                for arg in pattern.pattern.converters:
+                    if name == 'feed:delete_post':
+                        kwargs[arg] = fixture['own_post_id']
+                    else:
+                        kwargs[arg] = fixture[arg]
+                yield name, kwargs
+
+    def _measure(self, client, name, method, url, data, options):
+        send = getattr(client, method)
+        if method == 'get' and data:
+            url, data = f'{url}?{urlencode(data)}', {}
+
+        latencies, queries, statuses = [], [], set()
+        for i in range(options['warmup'] + options['repeat']):
+            try:
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = send(url, data)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    raise _Rollback
+            except _Rollback:
+                pass
+            if i >= options['warmup']:
+                latencies.append(elapsed)
+                queries.append(len(captured))
+                statuses.add(response.status_code)
+
+        return {
+            'endpoint': name,
+            'method': method.upper(),
+            'url': url,
+            'statuses': sorted(statuses),
+            'latency': summarize(latencies),
+            'queries_min': min(queries),
+            'queries_max': max(queries),
+        }
@@ -0,0 +1,149 @@
+"""
+Measures what debug logging costs the lazy-load feed endpoints.
+
+Each endpoint is requested with the ``feed.views`` logger in three modes,
+interleaved round by round so machine noise hits them equally:
+
+    off      feed.views at INFO; debug calls cost a level check.
+    sampled  feed.views at DEBUG, LOG_DEBUG_SAMPLE_RATE requests keep their
+             DEBUG records (default 0.01).
+    all      feed.views at DEBUG and every request keeps its records.
+
+Log output goes to /dev/null during the run so terminal speed does not
+skew the numbers. Reports latency percentiles, SQL query counts and the
+number of records written per request.
+
+Usage:
+    python manage.py seed_data --users 500
+    python manage.py bench_logging
+    python manage.py bench_logging --repeat 500 --sample-rate 0.05 --json
+"""
+import json
+import logging
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+ENDPOINTS = ['feed:lazy_load_posts', 'feed:test_lazy_load', 'feed:lazy_load_improved']
+MODES = ('off', 'sampled', 'all')
+
+
+class _RecordCounter(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def filter(self, record):
+        self.count += 1
+        return True
+
+
+class Command(BaseCommand):
+    help = "Compare lazy-load latency with feed debug logging off, sampled and fully on."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to request as (default: first seeded user).")
+        parser.add_argument('--repeat', type=int, default=200, help="Requests per endpoint and mode.")
+        parser.add_argument('--sample-rate', type=float, default=0.01, help="Sample rate for the 'sampled' mode.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        # The test client talks to 'testserver' over plain HTTP.
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            self._run(options)
+
+    def _run(self, options):
+        user = self._pick_user(options['user'])
+        feed_logger = logging.getLogger('feed.views')
+        handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging.StreamHandler)]
+        if not handlers:
+            raise CommandError("No console log handler is configured; check the LOGGING setting.")
+
+        rates = {'off': 0.0, 'sampled': options['sample_rate'], 'all': 1.0}
+        clients = {}
+        for mode in MODES:
+            with override_settings(LOG_DEBUG_SAMPLE_RATE=rates[mode]):
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                # The first request builds the middleware chain with this mode's sample rate.
+                client.get(reverse(ENDPOINTS[0]), {'page': 1})
+            clients[mode] = client
+
+        counter = _RecordCounter()
+        original_level = feed_logger.level
+        devnull = open(os.devnull, 'w')
+        streams = [h.setStream(devnull) for h in handlers]
+        for handler in handlers:
+            handler.addFilter(counter)
+        try:
+            results = [self._measure(endpoint, clients, feed_logger, counter, options) for endpoint in ENDPOINTS]
+        finally:
+            feed_logger.setLevel(original_level)
+            for handler, stream in zip(handlers, streams):
+                handler.removeFilter(counter)
+                handler.setStream(stream)
+            devnull.close()
+
+        if options['json']:
+            self.stdout.write(json.dumps({'user': user.username, 'repeat': options['repeat'], 'endpoints': results}, indent=2))
+            return
+
+        self.stdout.write(f"{'endpoint':<26} {'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'queries':>8} {'records/req':>12}")
+        for result in results:
+            for mode in MODES:
+                row = result[mode]
+                latency = row['latency']
+                self.stdout.write(
+                    f"{result['endpoint']:<26} {mode:<8} {latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} "
+                    f"{latency['mean_ms']:>8.2f} {row['queries']:>8} {row['records_per_request']:>12.2f}"
+                )
+
+    def _pick_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist.")
+        user = User.objects.filter(username__regex=r'^seed\d+$').order_by('id').first() or User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError("No users found; run seed_data first.")
+        return user
+
+    def _measure(self, endpoint, clients, feed_logger, counter, options):
+        url = reverse(endpoint)
+        levels = {'off': logging.INFO, 'sampled': logging.DEBUG, 'all': logging.DEBUG}
+        latencies = {mode: [] for mode in MODES}
+        queries = {}
+        records = dict.fromkeys(MODES, 0)
+        for _ in range(options['repeat']):
+            for mode in MODES:
+                feed_logger.setLevel(levels[mode])
+                before = counter.count
+                reset_queries()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    clients[mode].get(url, {'page': 1})
+                    latencies[mode].append((time.perf_counter() - started) * 1000)
+                records[mode] += counter.count - before
+                queries[mode] = len(captured)
+        return {
+            'endpoint': endpoint,
+            **{
+                mode: {
+                    'latency': summarize(latencies[mode]),
+                    'queries': queries[mode],
+                    'records_per_request': records[mode] / options['repeat'],
+                }
+                for mode in MODES
+            },
+        }
@@ -0,0 +1,131 @@
+"""
+Benchmark for ranking the all-users page (see feed/compatibility.py).
+
+Seeds users with random questionnaires inside a transaction that is rolled
+back afterwards, then for a sample of viewers times:
+
+    full_sort   score every candidate and sort them all (the old page did
+                this with two queries per candidate on top)
+    top_k       the pruned heap of feed.compatibility.top_matches, for the
+                first page and for page ``--pages``
+
+Each viewer's top-K scores are checked against the full sort's.
+
+Usage:
+    python manage.py bench_matching
+    python manage.py bench_matching --users 100000 --viewers 20 --pages 5 --json
+"""
+import json
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.management.commands.seed_data import COMM_STYLES, HOBBIES, PERSONALITIES, STATUSES, YEARS
+from accounts.models import COLLEGE_CHOICES, DEPARTMENT_CHOICES, GENDER_CHOICES, RELATIONSHIP_CHOICES, UserQuestionnaire
+from feed.compatibility import full_sort_matches, top_matches
+from feed.views import MATCHES_PER_PAGE
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    """Raised to discard the seeded benchmark data."""
+
+
+class Command(BaseCommand):
+    help = "Compares scoring and sorting every candidate with the pruned top-K ranking of the all-users page."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help="Users to seed.")
+        parser.add_argument('--viewers', type=int, default=10, help="Viewers ranked per strategy.")
+        parser.add_argument('--page-size', type=int, default=MATCHES_PER_PAGE, help="Matches per page.")
+        parser.add_argument('--pages', type=int, default=5, help="Deepest page timed for top_k.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the questionnaires.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['viewers'] < 1 or options['page_size'] < 1 or options['pages'] < 1:
+            raise CommandError("--users must be at least 2; --viewers, --page-size and --pages at least 1.")
+        page_size, pages = options['page_size'], options['pages']
+        timings = {'full_sort': [], 'top_k_page_1': [], f'top_k_page_{pages}': []}
+        scored = {'top_k_page_1': [], f'top_k_page_{pages}': []}
+        mismatches = 0
+        try:
+            with transaction.atomic():
+                viewers = self._seed(options['users'], options['viewers'], random.Random(options['seed']))
+                for viewer in viewers:
+                    started = time.perf_counter()
+                    baseline = full_sort_matches(viewer)
+                    timings['full_sort'].append((time.perf_counter() - started) * 1000)
+                    for label, k in (('top_k_page_1', page_size), (f'top_k_page_{pages}', page_size * pages)):
+                        stats = {}
+                        started = time.perf_counter()
+                        ranked, _ = top_matches(viewer, k, stats=stats)
+                        timings[label].append((time.perf_counter() - started) * 1000)
+                        scored[label].append(stats['scored'])
+                        # Ties may break differently, but the scores at each rank must agree.
+                        if [s for _, s in ranked] != [s for _, s in baseline[:k]]:
+                            mismatches += 1
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        candidates = options['users'] - 1
+        report = {
+            'users': options['users'],
+            'viewers': options['viewers'],
+            'page_size': page_size,
+            'mismatches': mismatches,
+            'results': [
+                {
+                    'strategy': label,
+                    'scored_per_viewer': round(sum(scored[label]) / len(scored[label])) if label in scored else candidates,
+                    **summarize(samples),
+                }
+                for label, samples in timings.items()
+            ],
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{report['users']} users, {report['viewers']} viewers, {page_size} matches per page")
+        self.stdout.write(f"{'strategy':<16} {'scored':>8} {'p50 ms':>9} {'p95 ms':>9}")
+        for row in report['results']:
+            self.stdout.write(f"{row['strategy']:<16} {row['scored_per_viewer']:>8} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+        full = report['results'][0]['p50_ms']
+        first = report['results'][1]['p50_ms']
+        if first:
+            self.stdout.write(self.style.SUCCESS(f"top_k page 1 speedup: {full / first:.1f}x"))
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{mismatches} rankings differ from the full sort"))
+
+    def _seed(self, count, viewers, rng):
+        users = User.objects.bulk_create(
+            (User(
+                username=f'bench_matching_{i}',
+                college_email=f'bench_matching_{i}@poornima.org',
+                college=rng.choice(COLLEGE_CHOICES)[0],
+                department=rng.choice(DEPARTMENT_CHOICES)[0],
+                gender=rng.choice(GENDER_CHOICES)[0],
+            ) for i in range(count)),
+            batch_size=2000,
+        )
+        # bulk_create skips the post_save signal, so the questionnaires are created here.
+        UserQuestionnaire.objects.bulk_create(
+            (UserQuestionnaire(
+                user=user,
+                personality=rng.choice(PERSONALITIES),
+                communication_style=rng.choice(COMM_STYLES),
+                hobbies_interests=','.join(rng.sample(HOBBIES, rng.randint(1, 5))),
+                year=rng.choice(YEARS),
+                relationship_status=rng.choice(STATUSES),
+                looking_for=rng.choice(RELATIONSHIP_CHOICES)[0],
+            ) for user in users),
+            batch_size=2000,
+        )
+        return User.objects.filter(pk__in=[user.pk for user in rng.sample(users, min(viewers, count))]).select_related('questionnaire')
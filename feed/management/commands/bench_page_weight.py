@@ -0,0 +1,200 @@
+"""
+Page-weight report for the heaviest pages: home, inbox, explore and profile.
+
+Each page is rendered through the full middleware stack as a seeded user.
+The report covers:
+
+* HTML bytes (raw and gzipped), including inline <script> and <style>
+  bytes. Inline code is re-sent with every page view.
+* Local static assets the page references: raw, gzip and brotli bytes,
+  read from the precompressed files collectstatic writes next to each
+  asset when present. Also whether the URL is content-hashed, which lets
+  WhiteNoise serve it as immutable.
+* First-visit and repeat-visit transfer. On a repeat visit, hashed assets
+  come from the browser cache, and every unhashed asset costs a
+  revalidation request.
+
+Run it with DEBUG=False after collectstatic to see the hashed names.
+
+Usage:
+    python manage.py bench_page_weight
+    python manage.py bench_page_weight --output before.json
+    python manage.py bench_page_weight --compare before.json
+"""
+import gzip
+import json
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+try:
+    import brotli
+except ImportError:  # Only used to estimate brotli sizes when no .br file exists.
+    brotli = None
+
+User = get_user_model()
+
+_HASHED_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+class _AssetParser(HTMLParser):
+    """Collects inline script/style bytes and the URLs of referenced assets."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.inline = {'script': 0, 'style': 0}
+        self.assets = []
+        self._inline_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script':
+            if attrs.get('src'):
+                self.assets.append(attrs['src'])
+            elif attrs.get('type', 'text/javascript') in ('text/javascript', 'module', ''):
+                self._inline_tag = 'script'
+        elif tag == 'style':
+            self._inline_tag = 'style'
+        elif tag == 'link' and 'stylesheet' in (attrs.get('rel') or '') and attrs.get('href'):
+            self.assets.append(attrs['href'])
+        elif tag == 'img' and attrs.get('src'):
+            self.assets.append(attrs['src'])
+
+    def handle_endtag(self, tag):
+        if tag == self._inline_tag:
+            self._inline_tag = None
+
+    def handle_data(self, data):
+        if self._inline_tag:
+            self.inline[self._inline_tag] += len(data.encode())
+
+
+def _gzip_size(data):
+    return len(gzip.compress(data, compresslevel=9))
+
+
+def _asset_file(url):
+    """Returns the file behind a local static URL, or ``None`` for external/media URLs."""
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    name = url[len(settings.STATIC_URL):].split('?', 1)[0]
+    collected = Path(settings.STATIC_ROOT) / name
+    if collected.is_file():
+        return collected
+    found = finders.find(name)
+    return Path(found) if found else None
+
+
+def _asset_weight(url):
+    path = _asset_file(url)
+    if path is None:
+        return None
+    data = path.read_bytes()
+    gz = path.with_name(path.name + '.gz')
+    br = path.with_name(path.name + '.br')
+    return {
+        'url': url,
+        'raw': len(data),
+        'gzip': gz.stat().st_size if gz.is_file() else _gzip_size(data),
+        'brotli': br.stat().st_size if br.is_file() else (len(brotli.compress(data)) if brotli else None),
+        'hashed': bool(_HASHED_RE.search(path.name)),
+    }
+
+
+class Command(BaseCommand):
+    help = "Report HTML, inline code and static asset weight of the home, inbox, explore and profile pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to render the pages as (default: first seeded user).")
+        parser.add_argument('--output', help="Write the report as JSON to this file.")
+        parser.add_argument('--compare', help="Show the change against a report saved with --output.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        user = self._pick_user(options['user'])
+        client = Client()
+        client.force_login(user)
+        pages = {
+            'feed:home': reverse('feed:home'),
+            'chat:inbox': reverse('chat:inbox'),
+            'feed:explore': reverse('feed:explore'),
+            'feed:profile': reverse('feed:profile', args=[user.id]),
+        }
+
+        report = {'user': user.username, 'debug': settings.DEBUG, 'pages': []}
+        # The test client talks to 'testserver' over plain HTTP.
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            for name, url in pages.items():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{name} returned {response.status_code}.")
+                report['pages'].append(self._weigh(name, response.content))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        previous = None
+        if options['compare']:
+            previous = {page['page']: page for page in json.loads(Path(options['compare']).read_text())['pages']}
+        self._print(report, previous)
+
+    def _pick_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist.")
+        user = User.objects.filter(username__regex=r'^seed\d+$').order_by('id').first() or User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError("No users found; run seed_data first.")
+        return user
+
+    def _weigh(self, name, html):
+        parser = _AssetParser()
+        parser.feed(html.decode())
+        assets = [weight for weight in map(_asset_weight, dict.fromkeys(parser.assets)) if weight]
+        html_gzip = _gzip_size(html)
+        assets_gzip = sum(asset['gzip'] for asset in assets)
+        unhashed = [asset for asset in assets if not asset['hashed']]
+        return {
+            'page': name,
+            'html': len(html),
+            'html_gzip': html_gzip,
+            'inline_script': parser.inline['script'],
+            'inline_style': parser.inline['style'],
+            'local_assets': len(assets),
+            'external_assets': len(parser.assets) - len(assets),
+            'assets_raw': sum(asset['raw'] for asset in assets),
+            'assets_gzip': assets_gzip,
+            'hashed_assets': len(assets) - len(unhashed),
+            'first_visit_gzip': html_gzip + assets_gzip,
+            # Hashed assets come from the browser cache; the rest are revalidated.
+            'repeat_visit_gzip': html_gzip,
+            'repeat_visit_requests': 1 + len(unhashed),
+            'assets': assets,
+        }
+
+    def _print(self, report, previous):
+        columns = [
+            ('html', 'HTML B'), ('html_gzip', 'HTML gz'), ('inline_script', 'inl JS'), ('inline_style', 'inl CSS'),
+            ('assets_gzip', 'asset gz'), ('hashed_assets', 'hashed'), ('first_visit_gzip', '1st gz'),
+            ('repeat_visit_gzip', 'repeat gz'), ('repeat_visit_requests', 'repeat req'),
+        ]
+        self.stdout.write(f"DEBUG={report['debug']}  user={report['user']}")
+        self.stdout.write(f"{'page':<14}" + ''.join(f"{label:>11}" for _, label in columns))
+        for page in report['pages']:
+            self.stdout.write(f"{page['page']:<14}" + ''.join(f"{page[key]:>11}" for key, _ in columns))
+            before = previous and previous.get(page['page'])
+            if before:
+                self.stdout.write(f"{'  change':<14}" + ''.join(
+                    f"{page[key] - before[key]:>+11}" for key, _ in columns
+                ))
@@ -0,0 +1,127 @@
+"""
+Render-time report for the large server-rendered pages: the home feed, a
+profile (own and someone else's) and the landing page.
+
+Each page is requested through the full middleware stack in two modes,
+interleaved round by round:
+
+    uncached  the 'template_fragments' cache is a dummy cache, so every
+              {% cache %} block renders and runs its queries, as on the
+              first view after an edit.
+    cached    the configured cache; after the first request the fragments
+              come from it.
+
+Reports latency percentiles, SQL query counts and whether the cached
+template loader is active (Django enables it unless TEMPLATES sets
+``loaders`` explicitly).
+
+Usage:
+    python manage.py seed_data --users 500
+    python manage.py bench_render
+    python manage.py bench_render --repeat 200 --json
+"""
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+MODES = ('uncached', 'cached')
+
+
+class Command(BaseCommand):
+    help = "Compare render latency of the home, profile and landing pages with and without fragment caching."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to request as (default: first seeded user).")
+        parser.add_argument('--repeat', type=int, default=100, help="Requests per page and mode.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        # The test client talks to 'testserver' over plain HTTP.
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            self._run(options)
+
+    def _run(self, options):
+        if not getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 0):
+            raise CommandError("FRAGMENT_CACHE_TIMEOUT is 0 (the DEBUG default); set it or run with DEBUG=False.")
+        user = self._pick_user(options['user'])
+        other = User.objects.exclude(id=user.id).order_by('id').first()
+        if other is None:
+            raise CommandError("Need at least two users; run seed_data first.")
+        pages = {
+            'feed:home': reverse('feed:home'),
+            'feed:profile (own)': reverse('feed:profile', args=[user.id]),
+            'feed:profile (other)': reverse('feed:profile', args=[other.id]),
+            'landing': reverse('home'),
+        }
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+
+        overrides = {
+            'uncached': {'CACHES': {
+                **settings.CACHES,
+                'template_fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            }},
+            'cached': {},
+        }
+        results = []
+        for name, url in pages.items():
+            latencies = {mode: [] for mode in MODES}
+            queries = {}
+            for _ in range(options['repeat']):
+                for mode in MODES:
+                    with override_settings(**overrides[mode]):
+                        reset_queries()
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            response = client.get(url)
+                            latencies[mode].append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f"{name} returned {response.status_code}.")
+                    queries[mode] = len(captured)
+            results.append({
+                'page': name,
+                **{mode: {'latency': summarize(latencies[mode]), 'queries': queries[mode]} for mode in MODES},
+            })
+
+        loaders = engines['django'].engine.template_loaders
+        cached_loader = any(isinstance(loader, CachedLoader) for loader in loaders)
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'user': user.username, 'repeat': options['repeat'], 'cached_loader': cached_loader, 'pages': results,
+            }, indent=2))
+            return
+
+        self.stdout.write(f"DEBUG={settings.DEBUG}  cached template loader={cached_loader}  user={user.username}")
+        self.stdout.write(f"{'page':<22} {'mode':<9} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'queries':>8}")
+        for result in results:
+            for mode in MODES:
+                row = result[mode]
+                latency = row['latency']
+                self.stdout.write(
+                    f"{result['page']:<22} {mode:<9} {latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} "
+                    f"{latency['mean_ms']:>8.2f} {row['queries']:>8}"
+                )
+
+    def _pick_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist.")
+        user = User.objects.filter(username__regex=r'^seed\d+$').order_by('id').first() or User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError("No users found; run seed_data first.")
+        return user
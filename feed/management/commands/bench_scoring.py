@@ -0,0 +1,129 @@
+"""
+Throughput benchmark for the compatibility scoring models (see feed/scoring.py).
+
+Builds random questionnaire rows in memory, no database needed, and for
+each configured model times scoring one viewer against the whole batch:
+
+    encode      encode_many() over the candidate rows
+    score       score() of the encoded batch
+    total       both, from the viewer's questionnaire
+
+``pairwise`` is the per-pair reference, feed.compatibility.score, for scale.
+Each model's scores are compared with the default model's.
+
+Usage:
+    python manage.py bench_scoring
+    python manage.py bench_scoring --candidates 100000 --viewers 20 --models rules hobbies_heavy --json
+"""
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.management.commands.seed_data import COMM_STYLES, HOBBIES, PERSONALITIES, STATUSES, YEARS
+from accounts.models import RELATIONSHIP_CHOICES, UserQuestionnaire
+from feed.compatibility import score
+from feed.scoring import get_model, models
+from poornimax.benchmarking import summarize
+
+
+def _random_answers(rng):
+    return UserQuestionnaire(
+        relationship_status=rng.choice(STATUSES),
+        looking_for=rng.choice(RELATIONSHIP_CHOICES)[0],
+        year=rng.choice(YEARS),
+        personality=rng.choice(PERSONALITIES),
+        communication_style=rng.choice(COMM_STYLES),
+        hobbies_interests=','.join(rng.sample(HOBBIES, rng.randint(1, 5))),
+    )
+
+
+def _elapsed_ms(started):
+    return (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = "Compares the throughput of the configured compatibility scoring models."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=100000, help="Candidates scored per viewer.")
+        parser.add_argument('--viewers', type=int, default=10, help="Viewers scored per model.")
+        parser.add_argument('--models', nargs='+', default=None, help="Models to compare (default: all configured).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the answers.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options['candidates'] < 1 or options['viewers'] < 1:
+            raise CommandError("--candidates and --viewers must be at least 1.")
+        names = options['models'] or list(models())
+        unknown = set(names) - set(models())
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(sorted(unknown))}. Configured: {', '.join(models())}.")
+
+        rng = random.Random(options['seed'])
+        candidates = [_random_answers(rng) for _ in range(options['candidates'])]
+        viewers = [_random_answers(rng) for _ in range(options['viewers'])]
+        default = get_model()
+        baseline = {}
+        for model in [default] + [get_model(name) for name in names if name != default.name]:
+            baseline[model.name] = self._run(model, viewers, candidates)
+
+        pairwise = []
+        for viewer in viewers:
+            started = time.perf_counter()
+            for candidate in candidates:
+                score(viewer, candidate)
+            pairwise.append(_elapsed_ms(started))
+
+        results = []
+        for name in names:
+            timings, scores = baseline[name]
+            differs = sum(
+                mine != theirs
+                for model_scores, default_scores in zip(scores, baseline[default.name][1])
+                for mine, theirs in zip(model_scores, default_scores)
+            )
+            results.append({
+                'model': name,
+                'candidates_per_second': round(options['candidates'] / (summarize(timings['total'])['p50_ms'] / 1000)),
+                'differs_from_default': round(differs / (len(viewers) * len(candidates)), 4),
+                **{step: summarize(samples) for step, samples in timings.items()},
+            })
+        results.append({
+            'model': 'pairwise',
+            'candidates_per_second': round(options['candidates'] / (summarize(pairwise)['p50_ms'] / 1000)),
+            'total': summarize(pairwise),
+        })
+        report = {'candidates': options['candidates'], 'viewers': options['viewers'], 'default': default.name, 'results': results}
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{report['candidates']} candidates x {report['viewers']} viewers (default model: {default.name})")
+        self.stdout.write(
+            f"{'model':<16} {'encode p50':>11} {'score p50':>10} {'total p50':>9} {'cand/s':>10} {'differs':>8}"
+        )
+        for row in results:
+            encode = f"{row['encode']['p50_ms']:.1f}" if 'encode' in row else '-'
+            scored = f"{row['score']['p50_ms']:.1f}" if 'score' in row else '-'
+            differs = f"{row['differs_from_default']:.1%}" if 'differs_from_default' in row else '-'
+            self.stdout.write(
+                f"{row['model']:<16} {encode:>11} {scored:>10} {row['total']['p50_ms']:>9.1f} "
+                f"{row['candidates_per_second']:>10} {differs:>8}"
+            )
+
+    def _run(self, model, viewers, candidates):
+        """Per-step timings in ms, and the scores, of ``model`` for every viewer."""
+        rows = [tuple(getattr(candidate, field) for field in model.fields) for candidate in candidates]
+        timings, scores = {'encode': [], 'score': [], 'total': []}, []
+        for viewer in viewers:
+            started = time.perf_counter()
+            user = model.encode_answers(viewer)
+            encoded = model.encode_many(rows)
+            encoded_at = time.perf_counter()
+            scores.append(model.score(user, encoded))
+            timings['encode'].append((encoded_at - started) * 1000)
+            timings['score'].append(_elapsed_ms(encoded_at))
+            timings['total'].append(_elapsed_ms(started))
+        return timings, scores
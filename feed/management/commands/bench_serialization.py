@@ -0,0 +1,128 @@
+"""
+Micro-benchmark for the API payload serializers (see poornimax.serialization).
+
+For each payload type the rows are loaded once, then repeatedly:
+
+    build     Schema.many() -> list of dicts
+    stdlib    json.dumps with DjangoJSONEncoder, as JsonResponse does
+    fast      serialization.dumps (orjson when installed)
+    stream    stream_json() chunks joined, schema applied per chunk
+
+Reports the p50 per run and the peak memory of the full-build and
+streamed encodings.
+
+Usage:
+    python manage.py seed_data --users 500
+    python manage.py bench_serialization
+    python manage.py bench_serialization --rows 5000 --repeat 50 --json
+"""
+import json
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from accounts.serializers import USER_CARD
+from chat.models import Message
+from chat.serializers import MESSAGE
+from feed.models import Comment, Confession, ConfessionComment, Post
+from feed.serializers import CONFESSION, CONFESSION_COMMENT, POST, POST_COMMENT
+from poornimax import serialization
+from poornimax.benchmarking import summarize
+
+User = get_user_model()
+
+
+def _payloads(rows):
+    """(name, schema, queryset, schema context) per payload type."""
+    return [
+        ('post', POST, Post.objects.select_related('user'), {}),
+        ('post_comment', POST_COMMENT, Comment.objects.select_related('user'), {}),
+        ('confession', CONFESSION, Confession.objects.select_related('user'), {}),
+        ('confession_comment', CONFESSION_COMMENT, ConfessionComment.objects.select_related('user'), {}),
+        ('user_card', USER_CARD, User.objects.all(), {}),
+        ('message', MESSAGE, Message.objects.select_related('sender'), {'viewer_id': 0}),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Time building and encoding of each API payload type, stdlib vs fast encoder vs streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Rows per payload.")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per step.")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Items per streamed chunk.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        results = []
+        for name, schema, queryset, context in _payloads(options['rows']):
+            objs = list(queryset[:options['rows']])
+            if not objs:
+                self.stderr.write(f"Skipping {name}: no rows (run seed_data first).")
+                continue
+            results.append(self._measure(name, schema, objs, context, options))
+        if not results:
+            raise CommandError("No rows to serialize; run seed_data first.")
+
+        if options['json']:
+            self.stdout.write(json.dumps({'encoder': serialization.ENCODER, 'payloads': results}, indent=2))
+            return
+
+        self.stdout.write(f"Fast encoder: {serialization.ENCODER}  (p50 ms per run)")
+        self.stdout.write(
+            f"{'payload':<20} {'rows':>6} {'build':>8} {'stdlib':>8} {'fast':>8} {'speedup':>8} "
+            f"{'stream':>8} {'full KiB':>9} {'strm KiB':>9}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['payload']:<20} {row['rows']:>6} {row['build_ms']:>8.2f} {row['stdlib_ms']:>8.2f} "
+                f"{row['fast_ms']:>8.2f} {row['stdlib_ms'] / row['fast_ms']:>7.1f}x {row['stream_ms']:>8.2f} "
+                f"{row['full_peak_kib']:>9.0f} {row['stream_peak_kib']:>9.0f}"
+            )
+
+    def _time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return summarize(samples)['p50_ms']
+
+    def _peak_kib(self, func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    def _measure(self, name, schema, objs, context, options):
+        data = {'items': schema.many(objs, **context)}
+
+        def full():
+            return serialization.dumps({'items': schema.many(objs, **context)})
+
+        def streamed():
+            return b''.join(serialization.stream_json(
+                objs, schema, chunk_size=options['chunk_size'], **context,
+            ))
+
+        if json.loads(full()) != json.loads(streamed()):
+            raise CommandError(f"Streamed {name} payload differs from the full encoding.")
+
+        return {
+            'payload': name,
+            'rows': len(objs),
+            'bytes': len(serialization.dumps(data)),
+            'build_ms': self._time(lambda: schema.many(objs, **context), options['repeat']),
+            'stdlib_ms': self._time(lambda: json.dumps(data, cls=DjangoJSONEncoder).encode(), options['repeat']),
+            'fast_ms': self._time(lambda: serialization.dumps(data), options['repeat']),
+            'stream_ms': self._time(streamed, options['repeat']),
+            'full_peak_kib': self._peak_kib(full),
+            'stream_peak_kib': self._peak_kib(lambda: sum(len(chunk) for chunk in serialization.stream_json(
+                objs, schema, chunk_size=options['chunk_size'], **context,
+            ))),
+        }
@@ -0,0 +1,129 @@
+"""
+Checks that replica-enabled views read from the ``replica`` database and
+that a client is pinned to the primary right after it writes.
+
+Needs a replica alias, e.g. locally with two SQLite files:
+
+    python manage.py check_replica_routing --sync  # with SQLITE_REPLICA_PATH=/tmp/replica.sqlite3
+
+``--sync`` first copies the primary SQLite file into the replica file (two
+local files have no replication; rerun it to "catch up"). With Postgres,
+point ``DATABASE_REPLICA_URL`` at a streaming replica or at a second
+database restored from the same dump.
+
+For every view it reports how many queries went to each alias, then sends
+a chat message (a POST) and requests the inbox again, which must read from
+the primary only.
+"""
+import json
+import sqlite3
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from chat.models import Message
+from poornimax.databases import REPLICA_ALIAS
+from poornimax.replicas import pin_cookie_name
+
+User = get_user_model()
+
+MESSAGE_PREFIX = 'replica-check:'
+
+
+class Command(BaseCommand):
+    help = "Checks that use_replica views read from the replica and that writes pin a client to the primary."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync', action='store_true', help="Copy the primary SQLite file into the replica first.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            raise CommandError("No replica database; set SQLITE_REPLICA_PATH or DATABASE_REPLICA_URL.")
+        if options['sync']:
+            self._sync()
+
+        users = list(User.objects.filter(username__regex=r'^seed\d+$').order_by('id')[:2])
+        if len(users) < 2:
+            raise CommandError("Need at least two seeded users; run seed_data first.")
+        user, other = users
+        reads = {
+            'feed:home': reverse('feed:home'),
+            'feed:profile': reverse('feed:profile', args=[other.id]),
+            'feed:lazy_load_posts': reverse('feed:lazy_load_posts') + '?page=1',
+            'feed:search_users_api': reverse('feed:search_users_api') + '?q=seed',
+            'chat:inbox': reverse('chat:inbox'),
+            'chat:inbox_unread_status': reverse('chat:inbox_unread_status'),
+        }
+
+        report, failures = {'reads': {}}, []
+        # The test client talks to 'testserver' over plain HTTP.
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            for name, url in reads.items():
+                report['reads'][name] = counts = self._request(client, 'get', url)
+                if counts['status'] >= 500 or not counts[REPLICA_ALIAS]:
+                    failures.append(f"{name} did not read from the replica ({counts}).")
+
+            last_message_id = Message.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            report['write'] = self._request(
+                client, 'post', reverse('chat:chat_with_user', args=[other.username]), {'message': f'{MESSAGE_PREFIX}1'},
+            )
+            report['after_write'] = counts = self._request(client, 'get', reads['chat:inbox'])
+            if counts[REPLICA_ALIAS]:
+                failures.append(f"chat:inbox read from the replica right after a write ({counts}).")
+            if pin_cookie_name() not in client.cookies:
+                failures.append("The write did not set the pinning cookie.")
+
+            # The test client ignores max-age, so expire the pin by hand.
+            del client.cookies[pin_cookie_name()]
+            report['after_pin_expired'] = counts = self._request(client, 'get', reads['chat:inbox'])
+            if not counts[REPLICA_ALIAS]:
+                failures.append(f"chat:inbox did not return to the replica once unpinned ({counts}).")
+            Message.objects.filter(id__gt=last_message_id, content__startswith=MESSAGE_PREFIX).delete()
+
+        report['failures'] = failures
+        self._report(report, options)
+        if failures:
+            raise CommandError(f"{len(failures)} routing check(s) failed.")
+
+    def _sync(self):
+        primary, replica = (connections[alias] for alias in (DEFAULT_DB_ALIAS, REPLICA_ALIAS))
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError("--sync only copies SQLite files; replicate Postgres with the server's own tools.")
+        replica.close()
+        source, target = sqlite3.connect(primary.settings_dict['NAME']), sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def _request(self, client, method, url, data=None):
+        """Requests ``url`` and returns its status and the queries run on each alias."""
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            response = getattr(client, method)(url, data)
+        return {'status': response.status_code, DEFAULT_DB_ALIAS: len(primary), REPLICA_ALIAS: len(replica)}
+
+    def _report(self, report, options):
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{'request':<28} {'status':>6} {'primary':>8} {'replica':>8}")
+        rows = {**report['reads'], 'POST chat message': report['write'], 'chat:inbox (pinned)': report['after_write'],
+                'chat:inbox (pin expired)': report['after_pin_expired']}
+        for name, counts in rows.items():
+            self.stdout.write(
+                f"{name:<28} {counts['status']:>6} {counts[DEFAULT_DB_ALIAS]:>8} {counts[REPLICA_ALIAS]:>8}"
+            )
+        for failure in report['failures']:
+            self.stdout.write(self.style.ERROR(failure))
+        if not report['failures']:
+            self.stdout.write(self.style.SUCCESS("Replica routing and read-your-writes pinning work."))
@@ -0,0 +1,63 @@
+"""
+Exports chat, crush and feed tables to compressed columnar files for
+offline analysis (see poornimax/columnar_export.py), so ad-hoc analytics
+stop running against the production database.
+
+Reads from the replica when one is configured. Each run only exports rows
+added since the last one; schedule it (e.g. hourly) and point analysis at
+the output directory.
+
+Usage:
+    python manage.py export_analytics --output /srv/analytics
+    python manage.py export_analytics --datasets message,crush --format arrow
+    python manage.py export_analytics --datasets post --full
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from poornimax.columnar_export import DATASETS, FORMATS, ColumnarExporter, peak_rss_mb
+from poornimax.databases import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Streams chat, crush and feed tables into Parquet or Arrow files, incrementally by primary key."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.BASE_DIR / 'analytics_export'), help="Output directory.")
+        parser.add_argument('--datasets', default=','.join(DATASETS), help="Comma-separated datasets to export.")
+        parser.add_argument('--format', choices=list(FORMATS), default='parquet')
+        parser.add_argument('--chunk-size', type=int, default=50_000, help="Rows per query and per row group.")
+        parser.add_argument('--full', action='store_true', help="Discard earlier files and export everything again.")
+        parser.add_argument('--database', default=None, help="Database alias to read (default: replica if configured).")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['datasets'].split(',') if name.strip()]
+        unknown = set(names) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown datasets: {', '.join(sorted(unknown))}. Choose from {', '.join(DATASETS)}.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        using = options['database'] or (REPLICA_ALIAS if REPLICA_ALIAS in settings.DATABASES else DEFAULT_DB_ALIAS)
+        try:
+            exporter = ColumnarExporter(
+                options['output'], fmt=options['format'], chunk_size=options['chunk_size'], using=using,
+            )
+        except ImportError as e:
+            raise CommandError(str(e))
+
+        results = [exporter.export(name, full=options['full']) for name in names]
+        report = {'database': using, 'datasets': results, 'peak_rss_mb': round(peak_rss_mb(), 1)}
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{'dataset':<18} {'rows':>10} {'chunks':>7} {'size':>10} {'seconds':>8} {'watermark':>10}")
+        for r in results:
+            self.stdout.write(
+                f"{r['dataset']:<18} {r['rows']:>10} {r['chunks']:>7} {r['bytes'] / 1024:>8.0f}KB "
+                f"{r.get('seconds', 0):>8} {str(r['watermark']):>10}"
+            )
+        self.stdout.write(f"Read from {using!r}; peak RSS {report['peak_rss_mb']} MB.")
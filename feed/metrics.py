@@ -0,0 +1,30 @@
+"""
+Feed and media metrics; see poornimax.metrics.
+"""
+from poornimax.metrics import Counter, Histogram
+
+POSTS_CREATED = Counter('poornimax_feed_posts_created_total', "Posts created.")
+CONFESSIONS_CREATED = Counter('poornimax_feed_confessions_created_total', "Confessions created.")
+LIKES = Counter(
+    'poornimax_feed_likes_total', "Like toggles, by target (post or confession) and action.", ['target', 'action'],
+)
+COMMENTS = Counter('poornimax_feed_comments_total', "Comments added, by target (post or confession).", ['target'])
+STREAM_EVENTS = Counter(
+    'poornimax_feed_stream_events_total', "Realtime engagement events published, by result.", ['result'],
+)
+CACHE_LOOKUPS = Counter(
+    'poornimax_cache_lookups_total', "Cache lookups, by cache and result (hit, miss or not_modified).", ['cache', 'result'],
+)
+MATCH_RANKING_SECONDS = Histogram(
+    'poornimax_feed_match_ranking_seconds', "Time to rank a viewer's matches, by scoring model.", ['model'],
+)
+
+# Media
+IMAGE_COMPRESS_SECONDS = Histogram(
+    'poornimax_media_image_compress_seconds', "Time spent re-encoding uploaded post images.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+IMAGE_UPLOAD_BYTES = Histogram(
+    'poornimax_media_image_upload_bytes', "Size of uploaded post images, before and after compression.", ['stage'],
+    buckets=(64 * 1024, 256 * 1024, 512 * 1024, 1024 * 1024, 2 * 1024 * 1024, 5 * 1024 * 1024, 10 * 1024 * 1024),
+)
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.2 on 2026-10-19 17:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """Seeds the stored counters from the existing like and comment rows."""
+    for model_name, like_model, comment_model, fk in [
+        ('Post', 'Like', 'Comment', 'post'),
+        ('Confession', 'ConfessionLike', 'ConfessionComment', 'confession'),
+    ]:
+        model = apps.get_model('feed', model_name)
+
+        def count_of(child_name):
+            child = apps.get_model('feed', child_name)
+            counts = (child.objects.filter(**{fk: OuterRef('pk')})
+                      .order_by().values(fk).annotate(n=Count('pk')).values('n'))
+            return Coalesce(Subquery(counts), 0)
+
+        model.objects.update(like_count=count_of(like_model), comment_count=count_of(comment_model))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0006_alter_comment_options_alter_confession_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='confession',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='confession',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
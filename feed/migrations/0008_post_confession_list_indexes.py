@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-19 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0007_post_confession_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='confession',
+            index=models.Index(fields=['-created_at', '-id'], name='feed_confession_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='feed_post_public_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 19:10
+
+import feed.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0008_post_confession_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to=feed.models.post_image_path),
+        ),
+    ]
@@ -4,6 +4,8 @@ import os
 # Django Imports
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.utils import timezone
 
 
@@ -30,13 +32,22 @@ class Post(models.Model):
         on_delete=models.CASCADE,
         related_name='posts'
     )
-    image = models.ImageField(upload_to=post_image_path)
+    # Indexed: poornimax.media looks up the post of every image it serves.
+    image = models.ImageField(upload_to=post_image_path, db_index=True)
     caption = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     is_public = models.BooleanField(default=False, help_text="Designates whether the post is visible to everyone.")
 
+    # Denormalized counters, kept in sync by the signal handlers at the bottom of this module.
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ['-created_at']
+        # Serves the public feed, newest first, without a sort.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_public=True), name='feed_post_public_idx'),
+        ]
         verbose_name = "Post"
         verbose_name_plural = "Posts"
 
@@ -94,8 +105,14 @@ class Confession(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized counters, kept in sync by the signal handlers at the bottom of this module.
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ['-created_at']
+        # Serves the keyset-paged explore page (feed/pagination.py).
+        indexes = [models.Index(fields=['-created_at', '-id'], name='feed_confession_recent_idx')]
         verbose_name = "Confession"
         verbose_name_plural = "Confessions"
 
@@ -137,4 +154,45 @@ class ConfessionComment(models.Model):
 
     def __str__(self):
         user_display = "Anonymous" if self.is_anonymous else self.user.username
-        return f"Comment by {user_display} on Confession #{self.confession.id}"
\ No newline at end of file
+        return f"Comment by {user_display} on Confession #{self.confession.id}"
+
+
+# ==============================================================================
+# DENORMALIZED COUNTERS
+# ==============================================================================
+
+# Maps each child model to the parent it is counted on:
+# (parent model, foreign key attribute, counter field)
+COUNTED_RELATIONS = {
+    Like: (Post, 'post_id', 'like_count'),
+    Comment: (Post, 'post_id', 'comment_count'),
+    ConfessionLike: (Confession, 'confession_id', 'like_count'),
+    ConfessionComment: (Confession, 'confession_id', 'comment_count'),
+}
+
+
+def _adjust_counter(sender, instance, delta):
+    """Atomically applies ``delta`` to the parent's stored counter with an F() expression."""
+    parent_model, fk_attname, field = COUNTED_RELATIONS[sender]
+    rows = parent_model.objects.filter(pk=getattr(instance, fk_attname))
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gt': 0})
+    rows.update(**{field: F(field) + delta})
+
+
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        _adjust_counter(sender, instance, 1)
+
+
+def decrement_counter(sender, instance, origin=None, **kwargs):
+    # Skip the update when the parent itself is being deleted.
+    parent_model = COUNTED_RELATIONS[sender][0]
+    if isinstance(origin, parent_model):
+        return
+    _adjust_counter(sender, instance, -1)
+
+
+for _model in COUNTED_RELATIONS:
+    post_save.connect(increment_counter, sender=_model, dispatch_uid=f'increment_{_model.__name__}_counter')
+    post_delete.connect(decrement_counter, sender=_model, dispatch_uid=f'decrement_{_model.__name__}_counter')
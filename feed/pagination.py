@@ -0,0 +1,63 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination re-scans every skipped row and shifts when new rows are
+inserted at the head of the list. These helpers page on an
+``(ordering_field, pk)`` pair instead, so the cost of a page does not grow
+with how deep the client has scrolled.
+
+A page is a single index range scan only when the list's filter columns
+followed by ``(ordering_field, pk)`` are indexed, as for the confessions
+(``feed_confession_recent_idx``), the hearts and friends lists and the
+recent profile viewers. A conversation pages two such ranges, one per
+direction of ``chat_message_thread_idx``, and sorts just their rows.
+"""
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(value, pk):
+    """Builds an opaque cursor string from the last row's ordering value and pk."""
+    return f"{value.isoformat()}~{pk}"
+
+
+def decode_cursor(cursor):
+    """
+    Parses a cursor produced by ``encode_cursor``.
+    Returns ``(datetime, pk)``, or ``None`` if the cursor is missing; raises
+    ValueError if it is malformed, rather than quietly restarting at page one.
+    """
+    if not cursor:
+        return None
+    value, _, pk = cursor.rpartition('~')
+    try:
+        parsed = parse_datetime(value)
+        pk = int(pk)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError("Invalid cursor")
+    return parsed, pk
+
+
+def keyset_page(queryset, field, cursor=None, page_size=20):
+    """
+    Returns ``(rows, next_cursor)`` for the page after ``cursor``, newest first.
+
+    ``queryset`` is re-ordered by ``-field, -pk``, so ``field`` should be a
+    datetime column on the model itself. ``next_cursor`` is ``None`` on the
+    last page. Raises ValueError on a malformed ``cursor``.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, pk = position
+        queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+
+    # Fetch one extra row to learn whether another page exists.
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field), last.pk)
@@ -0,0 +1,7 @@
+from django.urls import re_path
+from .consumers import PostStreamConsumer, ConfessionStreamConsumer
+
+websocket_urlpatterns = [
+    re_path(r'ws/feed/post/(?P<post_id>\d+)/$', PostStreamConsumer.as_asgi()),
+    re_path(r'ws/feed/confession/(?P<confession_id>\d+)/$', ConfessionStreamConsumer.as_asgi()),
+]
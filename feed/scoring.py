@@ -0,0 +1,212 @@
+"""
+Pluggable compatibility scoring models.
+
+A model declares the questionnaire fields it reads and how a row of them is
+encoded, and scores one viewer against a whole batch of encoded candidates
+per call:
+
+    fields              questionnaire fields read, in order
+    encode(row)         features of one row: a tuple of the ``fields``
+                        values, possibly followed by others to ignore
+    score(user, candidates)
+                        integer scores out of 100 for a list of encoded
+                        candidates against the encoded viewer ``user``
+
+To let ``feed.compatibility.top_matches`` skip candidates that cannot make
+the page, a model may also name ``partition_fields`` whose values alone cap
+a candidate's score: ``level(user, partition)`` ranks a group of candidates
+sharing those values, and ``level_bound(user, level)`` is the best score any
+of them can get. Without them every candidate is scored.
+
+Models are configured like CACHES, one instance per name:
+
+    COMPATIBILITY_MODELS = {
+        'rules': {'BACKEND': 'feed.compatibility.RulesModel'},
+        'hobbies_heavy': {
+            'BACKEND': 'feed.compatibility.RulesModel',
+            'OPTIONS': {'intent_weight': 40, 'personality_weight': 20, 'hobbies_weight': 40},
+        },
+    }
+
+The model used for a request is, in order:
+
+    1. ``?scoring_model=<name>`` sent by a staff user;
+    2. the share of ``COMPATIBILITY_EXPERIMENT`` ("rules:90,hobbies_heavy:10")
+       the user falls in; users are bucketed by id, so each keeps one model;
+    3. ``COMPATIBILITY_MODEL``.
+
+``ScoringModelMiddleware`` makes the request visible to ``active_model()``
+and tags responses that used a model with ``X-Scoring-Model``. Outside a
+request (commands, the shell) ``COMPATIBILITY_MODEL`` applies unless a
+block is wrapped in ``use_model(name)``.
+"""
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.utils.module_loading import import_string
+
+OVERRIDE_PARAM = 'scoring_model'
+RESPONSE_HEADER = 'X-Scoring-Model'
+
+_request = ContextVar('scoring_request', default=None)
+_forced = ContextVar('scoring_model', default=None)
+
+
+class ScoringModel:
+    """Base class; subclasses set ``fields`` and implement ``score``."""
+    fields = ()
+    partition_fields = ()
+    max_score = 100
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name!r}>'
+
+    def encode(self, row):
+        return row[:len(self.fields)]
+
+    def encode_many(self, rows):
+        return [self.encode(row) for row in rows]
+
+    def encode_answers(self, questionnaire):
+        return self.encode(tuple(getattr(questionnaire, field) for field in self.fields))
+
+    def score(self, user, candidates):
+        raise NotImplementedError
+
+    def level(self, user, partition):
+        return 0
+
+    def level_bound(self, user, level):
+        return self.max_score
+
+
+@lru_cache(maxsize=None)
+def models():
+    """Every configured model by name."""
+    configured = {}
+    for name, config in settings.COMPATIBILITY_MODELS.items():
+        try:
+            backend = import_string(config['BACKEND'])
+        except (ImportError, KeyError) as e:
+            raise ImproperlyConfigured(f"COMPATIBILITY_MODELS[{name!r}] has no importable BACKEND: {e}") from e
+        configured[name] = backend(name, **config.get('OPTIONS', {}))
+    if settings.COMPATIBILITY_MODEL not in configured:
+        raise ImproperlyConfigured(f"COMPATIBILITY_MODEL {settings.COMPATIBILITY_MODEL!r} is not in COMPATIBILITY_MODELS.")
+    return configured
+
+
+def get_model(name=None):
+    try:
+        return models()[name or settings.COMPATIBILITY_MODEL]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown compatibility model {name!r}.") from None
+
+
+@lru_cache(maxsize=None)
+def experiment():
+    """``COMPATIBILITY_EXPERIMENT`` as a list of ``(name, share)``; empty when no experiment runs."""
+    arms = []
+    for arm in filter(None, (part.strip() for part in settings.COMPATIBILITY_EXPERIMENT.split(','))):
+        name, _, share = arm.partition(':')
+        try:
+            share = int(share)
+        except ValueError:
+            raise ImproperlyConfigured(f"COMPATIBILITY_EXPERIMENT arm {arm!r} is not name:share.") from None
+        if name not in models() or share < 0:
+            raise ImproperlyConfigured(f"COMPATIBILITY_EXPERIMENT arm {arm!r} names an unknown model or a negative share.")
+        arms.append((name, share))
+    return arms if sum(share for _, share in arms) else []
+
+
+def experiment_arm(user_id):
+    """The experiment model name for ``user_id``, or None without an experiment."""
+    arms = experiment()
+    if not arms:
+        return None
+    bucket = zlib.crc32(f'scoring:{user_id}'.encode()) % sum(share for _, share in arms)
+    for name, share in arms:
+        if bucket < share:
+            return name
+        bucket -= share
+
+
+def choose_model(request):
+    """The model for ``request``; see the module docstring for the order of precedence."""
+    override = request.GET.get(OVERRIDE_PARAM)
+    user = request.user
+    if override in models() and user.is_staff:
+        return get_model(override)
+    if user.is_authenticated:
+        arm = experiment_arm(user.pk)
+        if arm:
+            return get_model(arm)
+    return get_model()
+
+
+def active_model():
+    """The model ``use_model`` forced, else the current request's, else ``COMPATIBILITY_MODEL``."""
+    forced = _forced.get()
+    if forced is not None:
+        return forced
+    request = _request.get()
+    if request is None:
+        return get_model()
+    model = getattr(request, '_scoring_model', None)
+    if model is None:
+        model = request._scoring_model = choose_model(request)
+    return model
+
+
+@contextmanager
+def use_model(name):
+    """Scores with model ``name`` inside the block, whatever the request would pick."""
+    token = _forced.set(get_model(name))
+    try:
+        yield
+    finally:
+        _forced.reset(token)
+
+
+class ScoringModelMiddleware:
+    """Lets ``active_model()`` pick a model per request; unused with a single model and no experiment."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if len(models()) < 2 and not experiment():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self._tag(request, self.get_response(request))
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return self._tag(request, await self.get_response(request))
+        finally:
+            _request.reset(token)
+
+    def _tag(self, request, response):
+        # The model is only chosen when a view scored something.
+        model = getattr(request, '_scoring_model', None)
+        if model is not None:
+            response[RESPONSE_HEADER] = model.name
+        return response
@@ -0,0 +1,68 @@
+"""
+Payload schemas for posts, confessions, their comments and compatibility
+matches; see poornimax.serialization. Querysets passed to these should
+``select_related('user')``.
+"""
+from django.utils.timesince import timesince
+
+from accounts.serializers import USER_CARD, avatar_url, display_name
+from poornimax.serialization import Schema
+
+ANONYMOUS_AVATAR_URL = '/static/ann.png'
+
+
+def _isoformat(field):
+    return lambda obj, context: getattr(obj, field).isoformat()
+
+
+def _is_anonymous(obj):
+    return obj.is_anonymous or obj.user_id is None
+
+
+POST_AUTHOR = Schema(
+    id='id',
+    username='username',
+    full_name=display_name,
+    profile_picture=avatar_url,
+)
+
+# A public feed card; ``is_liked`` comes from an Exists() annotation when present.
+POST = Schema(
+    id='id',
+    image=lambda post, context: post.image.url if post.image else '',
+    caption=lambda post, context: post.caption or '',
+    is_liked=lambda post, context: getattr(post, 'is_liked', False),
+    likes_count='like_count',
+    comments_count='comment_count',
+    user=('user', POST_AUTHOR),
+    created_at=_isoformat('created_at'),
+)
+
+POST_COMMENT = Schema(
+    id='id',
+    user=('user', USER_CARD),
+    content='content',
+    created_at=_isoformat('created_at'),
+)
+
+# Confessions and their comments hide the author when posted anonymously.
+CONFESSION = Schema(
+    content='content',
+    author=lambda confession, context: "Anonymous" if _is_anonymous(confession) else confession.user.username,
+    author_avatar=lambda confession, context: ANONYMOUS_AVATAR_URL if _is_anonymous(confession) else avatar_url(confession.user),
+)
+
+CONFESSION_COMMENT = Schema(
+    id='id',
+    user=lambda comment, context: "Anonymous" if _is_anonymous(comment) else comment.user.username,
+    profile_picture_url=lambda comment, context: ANONYMOUS_AVATAR_URL if _is_anonymous(comment) else avatar_url(comment.user),
+    content='content',
+    time_since=lambda comment, context: timesince(comment.created_at) + " ago",
+)
+
+# A ranked match; ``compatibility_score`` is set by the view from feed.compatibility.top_matches.
+MATCH = USER_CARD.extend(
+    department='department',
+    college='college',
+    compatibility_score='compatibility_score',
+)
@@ -0,0 +1,57 @@
+"""
+Realtime engagement streams for posts and confessions.
+
+Every post and confession has its own channel-layer group. Viewers with the
+post modal or confession popup open join it through the consumers in
+``feed.consumers``, and the like/comment views publish new comments and
+updated counts to it, so open modals update without refetching.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .metrics import STREAM_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+def post_group_name(post_id):
+    return f"post_{post_id}"
+
+
+def confession_group_name(confession_id):
+    return f"confession_{confession_id}"
+
+
+def _message(payload):
+    return {'type': 'stream_event', 'payload': payload}
+
+
+def publish(group, payload):
+    """Sends ``payload`` to every socket in ``group``. Safe to call from sync views."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(group, _message(payload))
+    except Exception:
+        # A broken channel layer must never fail the like/comment itself.
+        STREAM_EVENTS.inc(result='failed')
+        logger.exception("Failed to publish to %s", group)
+    else:
+        STREAM_EVENTS.inc(result='sent')
+
+
+async def apublish(group, payload):
+    """Async counterpart of ``publish`` for async views."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        await channel_layer.group_send(group, _message(payload))
+    except Exception:
+        STREAM_EVENTS.inc(result='failed')
+        logger.exception("Failed to publish to %s", group)
+    else:
+        STREAM_EVENTS.inc(result='sent')
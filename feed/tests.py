@@ -1,3 +1,145 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Crush, User, UserQuestionnaire
+from accounts.views import otp_store
+
+from . import compatibility
+from .caching import get_versions
+from .compatibility import RulesModel, score
+from .views import CONNECTIONS_PER_PAGE, MAX_MATCH_PAGES, MATCHES_PER_PAGE, _ranked_matches
+
+
+def _answers(**answers):
+    defaults = {
+        'relationship_status': 'Single', 'looking_for': 'New friends', 'year': '2nd Year',
+        'personality': 'Introvert', 'communication_style': 'Mostly texting', 'hobbies_interests': 'Music,Gaming',
+    }
+    return UserQuestionnaire(**{**defaults, **answers})
+
+
+class RulesModelTests(SimpleTestCase):
+    def test_batch_scores_match_the_pairwise_rules(self):
+        model = RulesModel('rules')
+        viewer = _answers()
+        candidates = [
+            _answers(),
+            _answers(relationship_status='Focusing on me', personality='A mix of both', hobbies_interests=''),
+            _answers(looking_for='Not sure yet', year='Final Year', hobbies_interests='Gaming,Travel'),
+        ]
+        scores = model.score(model.encode_answers(viewer), model.encode_many(
+            [tuple(getattr(candidate, field) for field in model.fields) for candidate in candidates]
+        ))
+        self.assertEqual(scores, [score(viewer, candidate) for candidate in candidates])
+
+    def test_scoring_keeps_no_per_viewer_state(self):
+        model = RulesModel('rules')
+        before = dict(vars(model))
+        for hobbies in ('Music', 'Coding,Art & Design', 'Reading'):
+            viewer = model.encode_answers(_answers(hobbies_interests=hobbies))
+            model.score(viewer, [model.encode_answers(_answers())])
+        self.assertEqual(vars(model), before)
+
+
+class UserInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='alice', college_email='alice@poornima.org', department='CORE')
+
+    def _bumped_after(self, save):
+        before = get_versions({'users', f'user:{self.user.pk}'})
+        with self.captureOnCommitCallbacks(execute=True):
+            save()
+        after = get_versions(before)
+        return {scope for scope in before if after[scope] != before[scope]}
+
+    def test_status_flags_only_invalidate_the_user(self):
+        self.user.otp_verified = True
+        self.assertEqual(self._bumped_after(lambda: self.user.save(update_fields=['otp_verified'])), {f'user:{self.user.pk}'})
+        self.user.bio = 'Hello'
+        self.assertEqual(self._bumped_after(self.user.save), {f'user:{self.user.pk}'})
+
+    def test_listed_fields_invalidate_every_user_list(self):
+        self.user.full_name = 'Alice A.'
+        self.assertEqual(self._bumped_after(self.user.save), {'users', f'user:{self.user.pk}'})
+        self.user.department = 'ECE'
+        self.assertEqual(
+            self._bumped_after(lambda: self.user.save(update_fields=['department', 'bio'])), {'users', f'user:{self.user.pk}'},
+        )
+
+
+
+@override_settings(FRAGMENT_CACHE_TIMEOUT=300)
+class HomeFragmentTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create(
+            username='alice', college_email='alice@poornima.org', department='CORE', profile_picture='profile_pics/alice.jpg',
+        )
+        self.other = User.objects.create(username='bob', college_email='bob@poornima.org', department='CORE')
+        self.client.force_login(self.viewer)
+
+    def _home_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('feed:home'), secure=True).status_code, 200)
+        return len(queries)
+
+    def test_login_keeps_the_carousel_fragment(self):
+        uncached = self._home_queries()
+        cached = self._home_queries()
+        self.assertLess(cached, uncached)
+
+        otp_store[self.other.college_email] = '123456'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = Client().post(reverse('accounts:verify_otp'), {'college_email': self.other.college_email, 'otp': '123456'}, secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self._home_queries(), cached)
+
+
+class RankedMatchesTests(TestCase):
+    def test_users_deleted_after_ranking_are_skipped(self):
+        viewer, kept = (User.objects.create(username=name, college_email=f'{name}@poornima.org') for name in ('alice', 'bob'))
+        request = RequestFactory().get('/feed/api/matches/')
+        request.user = viewer
+        with mock.patch.object(compatibility, 'top_matches', return_value=([(kept.pk + 1, 90), (kept.pk, 80)], 2)):
+            matches, next_page = _ranked_matches(request)
+        self.assertEqual([(user.pk, user.compatibility_score) for user in matches], [(kept.pk, 80)])
+        self.assertIsNone(next_page)
+
+    def test_deep_pages_are_rejected_without_ranking(self):
+        viewer = User.objects.create(username='alice', college_email='alice@poornima.org')
+        self.client.force_login(viewer)
+        with mock.patch.object(compatibility, 'top_matches', return_value=([], 0)) as top_matches:
+            response = self.client.get(reverse('feed:matches_api'), {'page': MAX_MATCH_PAGES + 1}, secure=True)
+            self.assertEqual(response.status_code, 400)
+            top_matches.assert_not_called()
+
+            top_matches.return_value = ([], 10 ** 6)
+            response = self.client.get(reverse('feed:matches_api'), {'page': MAX_MATCH_PAGES}, secure=True)
+            self.assertEqual(response.json()['next_page'], None)
+            top_matches.assert_called_once_with(viewer, MAX_MATCH_PAGES * MATCHES_PER_PAGE)
+
+
+class ConnectionCursorTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create(username='alice', college_email='alice@poornima.org')
+        for i in range(CONNECTIONS_PER_PAGE + 1):
+            other = User.objects.create(username=f'user{i}', college_email=f'user{i}@poornima.org')
+            Crush.objects.create(sender=self.viewer, receiver=other)
+        self.client.force_login(self.viewer)
+
+    def test_cursor_continues_after_the_first_page(self):
+        first = self.client.get(reverse('feed:hearts_sent_api'), secure=True).json()
+        self.assertEqual(len(first['users']), CONNECTIONS_PER_PAGE)
+        second = self.client.get(reverse('feed:hearts_sent_api'), {'cursor': first['next_cursor']}, secure=True).json()
+        self.assertEqual(len(second['users']), 1)
+        self.assertFalse(second['has_more'])
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ('garbage', '2024-01-01T00:00:00~abc', 'not-a-date~5'):
+            for name in ('feed:hearts_sent_api', 'feed:lazy_load_hearts_sent'):
+                with self.subTest(cursor=cursor, endpoint=name):
+                    response = self.client.get(reverse(name), {'cursor': cursor}, secure=True)
+                    self.assertEqual(response.status_code, 400)
@@ -49,6 +49,11 @@ urlpatterns = [
     path('api/load-users/', views.load_users_api, name='load_users_api'),
     path('api/search-users/', views.search_users_api, name='search_users_api'),
     path('api/get-home-updates/', views.get_home_updates, name='get_home_updates'),
+    path('api/profile-viewers/', views.profile_viewers_api, name='profile_viewers_api'),
+    path('api/hearts/sent/', views.connections_api, {'kind': 'hearts_sent'}, name='hearts_sent_api'),
+    path('api/hearts/received/', views.connections_api, {'kind': 'hearts_received'}, name='hearts_received_api'),
+    path('api/friends/', views.connections_api, {'kind': 'friends'}, name='friends_api'),
+    path('api/matches/', views.matches_api, name='matches_api'),
     path('api/confession/like/', views.like_confession, name='like_confession'),
     path('api/confession/comment/', views.add_confession_comment, name='add_confession_comment'),
     path('api/confession/<int:confession_id>/comments/', views.confession_comments_api, name='confession_comments_api'),
@@ -58,6 +63,11 @@ urlpatterns = [
     # Lazy Loading Endpoints
     # ===================================================================
     path('lazy-load/posts/', views.lazy_load_posts, name='lazy_load_posts'),
+    path('lazy-load/confessions/', views.lazy_load_confessions, name='lazy_load_confessions'),
+    path('lazy-load/hearts-sent/', views.lazy_load_connections, {'kind': 'hearts_sent'}, name='lazy_load_hearts_sent'),
+    path('lazy-load/hearts-received/', views.lazy_load_connections, {'kind': 'hearts_received'}, name='lazy_load_hearts_received'),
+    path('lazy-load/friends/', views.lazy_load_connections, {'kind': 'friends'}, name='lazy_load_friends'),
+    path('lazy-load/matches/', views.lazy_load_matches, name='lazy_load_matches'),
     path('lazy-load/recently-joined/', views.lazy_load_section, {'section_type': 'recently-joined'}, name='lazy_load_recently_joined'),
     path('lazy-load/same-year/', views.lazy_load_section, {'section_type': 'same-year'}, name='lazy_load_same_year'),
     path('lazy-load/same-department/', views.lazy_load_section, {'section_type': 'same-department'}, name='lazy_load_same_department'),
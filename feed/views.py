@@ -1,5 +1,8 @@
+# Python Standard Library
+import logging
+
 # Django Core Imports
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, redirect, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
@@ -10,33 +13,36 @@ from django.db import models
 from django.db.models import Count, Exists, OuterRef, Q
 from django.core.paginator import Paginator
 from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
 # Make sure you have this import
 from django.db.models import OuterRef, Exists
 # App-specific Imports
 from .forms import PostForm, ConfessionForm, ConfessionCommentForm
 from .models import Post, Like, Comment, Confession, ConfessionLike, ConfessionComment
-from accounts.models import UserQuestionnaire, Crush, Friendship, ProfileView
+from .caching import aconditional_json, conditional_json, fragment_versions
+from .serializers import CONFESSION, CONFESSION_COMMENT, MATCH, POST, POST_COMMENT
+from .pagination import keyset_page
+from . import compatibility, metrics
+from .streams import publish, apublish, post_group_name, confession_group_name
+from accounts.connections import connection_page, sync_friendship
+from accounts.models import (
+    COLLEGE_CHOICES, DEPARTMENT_CHOICES, GENDER_CHOICES, RELATIONSHIP_CHOICES, Crush, UserQuestionnaire,
+)
+from accounts.profile_views import record_view, recent_viewers, view_trends
+from accounts.serializers import CONNECTION, DEFAULT_AVATAR_URL, PROFILE_VIEWER, USER_CARD
+from poornimax.decorators import alogin_required
+from poornimax.replicas import use_replica
+from poornimax.serialization import FastJsonResponse
+from poornimax.structured_logging import debug_enabled, debug_span
 
 # Get the User model
 User = get_user_model()
 
-# Define constants for avatar URLs
-DEFAULT_AVATAR_URL = '/static/ann.png' # Make sure this path is correct
-ANONYMOUS_AVATAR_URL = '/static/ann.png' # Make sure this path is correct
+logger = logging.getLogger(__name__)
 
 
 # --- Utility Functions (Ideally in a separate 'utils.py' file) ---
 
-def _calculate_jaccard_similarity(set1, set2):
-    """Helper function to calculate similarity for lists like hobbies."""
-    if not set1 and not set2:
-        return 1.0
-    if not set1 or not set2:
-        return 0.0
-    intersection = len(set1.intersection(set2))
-    union = len(set1.union(set2))
-    return intersection / union if union != 0 else 0
-
 def calculate_compatibility(user1, user2):
     """Calculates a compatibility score between two users based on their questionnaire answers."""
     try:
@@ -44,50 +50,21 @@ def calculate_compatibility(user1, user2):
         q2 = UserQuestionnaire.objects.get(user=user2)
     except UserQuestionnaire.DoesNotExist:
         return None
+    return compatibility.pair_score(q1, q2)
 
-    INTENT_WEIGHT, PERSONALITY_WEIGHT, HOBBIES_WEIGHT = 50, 30, 20
-    total_score = 0
-
-    # 1. Intent & Life Stage
-    intent_score, intent_max_score = 0, 4
-    if q1.relationship_status == q2.relationship_status:
-        intent_score += 2
-    elif {q1.relationship_status, q2.relationship_status} <= {'Single', 'Focusing on me'}:
-        intent_score += 1
-    if q1.looking_for == q2.looking_for:
-        intent_score += 1
-    elif 'New friends' in {q1.looking_for, q2.looking_for} and 'Not sure yet' in {q1.looking_for, q2.looking_for}:
-        intent_score += 0.5
-    if q1.year == q2.year:
-        intent_score += 1
-    total_score += (intent_score / intent_max_score) * INTENT_WEIGHT
-
-    # 2. Personality & Communication
-    personality_score, personality_max_score = 0, 4
-    if q1.personality == q2.personality:
-        personality_score += 2
-    elif 'A mix of both' in {q1.personality, q2.personality}:
-        personality_score += 1.5
-    elif {q1.personality, q2.personality} == {'Introvert', 'Extrovert'}:
-        personality_score += 0.5
-    if q1.communication_style == q2.communication_style:
-        personality_score += 2
-    elif 'A bit of everything' in {q1.communication_style, q2.communication_style}:
-        personality_score += 1.5
-    total_score += (personality_score / personality_max_score) * PERSONALITY_WEIGHT
-    
-    # 3. Hobbies & Interests
-    hobbies1 = set(q1.hobbies_interests.split(',')) if q1.hobbies_interests else set()
-    hobbies2 = set(q2.hobbies_interests.split(',')) if q2.hobbies_interests else set()
-    hobby_similarity = _calculate_jaccard_similarity(hobbies1, hobbies2)
-    total_score += hobby_similarity * HOBBIES_WEIGHT
-    
-    final_score = max(19, min(99, round(total_score)))
-    return final_score
+
+def _post_comment_data(comment):
+    """Serializes a post comment in the format the comment modals render."""
+    return POST_COMMENT(comment)
+
+def _confession_comment_data(comment):
+    """Serializes a confession comment, hiding the author when it was posted anonymously."""
+    return CONFESSION_COMMENT(comment)
 
 
 # --- Main Page Views ---
 @login_required
+@use_replica
 def home(request):
     """
     Updated home view - removed initial post loading to rely on lazy loading
@@ -95,38 +72,32 @@ def home(request):
     current_user = request.user
     all_users_qs = User.objects.exclude(id=current_user.id)
 
-    # Logic for stats and user carousels (keep this the same)
-    profile_views = ProfileView.objects.filter(viewed=current_user).values('viewer').distinct().count()
-
-    def get_crush_status(person):
-        sent = Crush.objects.filter(sender=current_user, receiver=person).exists()
-        received = Crush.objects.filter(sender=person, receiver=current_user).exists()
-        if sent and received: return "mutual"
-        if sent: return "sent"
-        if received: return "received"
-        return "none"
+    # Logic for stats and user carousels
+    profile_views = current_user.profile_view_count
 
+    # The carousels are filled by lazy_load_section; the page only shows their
+    # counts. These are passed uncalled so the template runs them only when
+    # the cached carousel fragment has to be rendered again.
     recently_joined = all_users_qs.filter(date_joined__gte=timezone.now() - timezone.timedelta(days=7))[:10]
 
-    try:
-        user_year = current_user.questionnaire.year
-        same_year = [uq.user for uq in UserQuestionnaire.objects.filter(year=user_year).exclude(user=current_user).select_related('user')[:10]]
-    except (UserQuestionnaire.DoesNotExist, AttributeError):
-        same_year = []
+    def same_year_count():
+        try:
+            user_year = current_user.questionnaire.year
+        except (UserQuestionnaire.DoesNotExist, AttributeError):
+            return 0
+        return UserQuestionnaire.objects.filter(year=user_year).exclude(user=current_user)[:10].count()
 
-    same_department = all_users_qs.filter(department=current_user.department)[:10] if current_user.department else []
-    same_college = all_users_qs.filter(college=current_user.college)[:10] if current_user.college else []
-    
-    def annotate_users_with_crush(users):
-        return [{'user': person, 'crush_status': get_crush_status(person)} for person in users]
+    same_department = all_users_qs.filter(department=current_user.department)[:10] if current_user.department else None
+    same_college = all_users_qs.filter(college=current_user.college)[:10] if current_user.college else None
 
     context = {
         # REMOVED: 'public_posts': public_posts,  # Let lazy loading handle this
         'profile_views': profile_views,
-        'recently_joined': annotate_users_with_crush(recently_joined),
-        'same_year': annotate_users_with_crush(same_year),
-        'same_department': annotate_users_with_crush(same_department),
-        'same_college': annotate_users_with_crush(same_college),
+        'fragments': fragment_versions(users='users'),
+        'recently_joined_count': recently_joined.count,
+        'same_year_count': same_year_count,
+        'same_department_count': same_department.count if same_department is not None else 0,
+        'same_college_count': same_college.count if same_college is not None else 0,
         'hearts_sent': Crush.objects.filter(sender=current_user, is_mutual=False).count(),
         'hearts_received': Crush.objects.filter(receiver=current_user, is_mutual=False).count(),
         'friends': Crush.objects.filter(sender=current_user, is_mutual=True).count(),
@@ -134,14 +105,15 @@ def home(request):
     return render(request, 'feed/home.html', context)
 
 @login_required
+@use_replica
 def profile(request, user_id):
     """
     Renders a user's profile page, handling post visibility based on friendship.
     """
     profile_user = get_object_or_404(User, id=user_id)
     
-    if request.user != profile_user:
-        ProfileView.objects.get_or_create(viewer=request.user, viewed=profile_user)
+    # Buffered and written in batches; see accounts/profile_views.py.
+    record_view(request.user.id, profile_user.id)
 
     is_mutual = Crush.objects.filter(sender=request.user, receiver=profile_user, is_mutual=True).exists()
 
@@ -151,13 +123,12 @@ def profile(request, user_id):
     else:
         posts_qs = Post.objects.filter(user=profile_user, is_public=True) # View only public posts
 
-    posts = posts_qs.annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comments', distinct=True)
-    ).order_by('-created_at')
+    posts = posts_qs.order_by('-created_at')
     
     context = {
         'profile_user': profile_user,
+        'fragments': fragment_versions(profile=f'user:{profile_user.id}', posts=f'user_posts:{profile_user.id}'),
+        'all_posts_visible': request.user == profile_user or is_mutual,
         'sent_crush': Crush.objects.filter(sender=request.user, receiver=profile_user).exists(),
         'received_crush': Crush.objects.filter(sender=profile_user, receiver=request.user).exists(),
         'is_mutual': is_mutual,
@@ -166,29 +137,115 @@ def profile(request, user_id):
     }
     return render(request, 'feed/profile.html', context)
 
+MATCHES_PER_PAGE = 24
+# Page N ranks the best N * MATCHES_PER_PAGE candidates, so deep pages cost
+# almost a full sort; nobody scrolls past this many.
+MAX_MATCH_PAGES = 50
+MATCH_FILTERS = {
+    'college': COLLEGE_CHOICES,
+    'department': DEPARTMENT_CHOICES,
+    'gender': GENDER_CHOICES,
+    'looking_for': RELATIONSHIP_CHOICES,
+}
+
+def _ranked_matches(request):
+    """
+    One page of the viewer's best matches from ``?page`` and the MATCH_FILTERS
+    query parameters. Returns ``(users, next_page)``, each user carrying
+    ``compatibility_score``, or raises ValueError on a bad parameter.
+    """
+    filters = {}
+    for name, choices in MATCH_FILTERS.items():
+        value = request.GET.get(name)
+        if value:
+            if value not in dict(choices):
+                raise ValueError(f"Unknown {name} {value!r}")
+            filters[name] = value
+    page = int(request.GET.get('page') or request.GET.get('cursor') or 1)
+    if not 1 <= page <= MAX_MATCH_PAGES:
+        raise ValueError(f"page must be between 1 and {MAX_MATCH_PAGES}")
+
+    ranked, total = compatibility.top_matches(request.user, page * MATCHES_PER_PAGE, **filters)
+    ranked = ranked[(page - 1) * MATCHES_PER_PAGE:]
+    users = User.objects.in_bulk([user_id for user_id, _ in ranked])
+    matches = []
+    for user_id, match_score in ranked:
+        user = users.get(user_id)
+        if user is None:
+            # Deleted after it was ranked, or not yet on the replica.
+            continue
+        user.compatibility_score = match_score
+        matches.append(user)
+    return matches, page + 1 if page * MATCHES_PER_PAGE < total and page < MAX_MATCH_PAGES else None
+
 @login_required
+@use_replica
 def all_users(request):
-    """Renders a page with all other users, sorted by compatibility score."""
-    users = User.objects.exclude(id=request.user.id)
-    compatibility_scores = []
-    for user in users:
-        score = calculate_compatibility(request.user, user)
-        if score is not None:
-            compatibility_scores.append((user, score))
-    compatibility_scores.sort(key=lambda x: x[1], reverse=True)
-    return render(request, 'feed/all.html', {'compatibility_scores': compatibility_scores})
+    """Renders the viewer's best matches, ranked by compatibility; infinite scroll loads the rest."""
+    try:
+        matches, next_page = _ranked_matches(request)
+    except ValueError:
+        matches, next_page = [], None
+    # Further pages keep the filters; the page number travels as the cursor.
+    query = request.GET.copy()
+    query.pop('page', None)
+    lazy_load_url = reverse('feed:lazy_load_matches')
+    return render(request, 'feed/all.html', {
+        'matches': matches,
+        'next_cursor': next_page,
+        'lazy_load_url': f"{lazy_load_url}?{query.urlencode()}" if query else lazy_load_url,
+    })
 
 @login_required
-def explore(request):
-    """Renders the Confessions explore page."""
-    user_confession_likes = ConfessionLike.objects.filter(confession=OuterRef('pk'), user=request.user)
-    confessions = Confession.objects.select_related('user').annotate(
-        like_count=Count('likes', distinct=True),
-        comment_count=Count('comments', distinct=True),
+@use_replica
+def lazy_load_matches(request):
+    """Infinite-scroll endpoint for the all-users page: the rendered cards of page ``cursor``."""
+    try:
+        matches, next_page = _ranked_matches(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    html = render_to_string('feed/match_cards_partial.html', {'matches': matches}, request=request)
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'next_cursor': next_page,
+        'has_more': next_page is not None,
+    })
+
+@login_required
+@use_replica
+def matches_api(request):
+    """The viewer's best matches as JSON, ``MATCHES_PER_PAGE`` per ``?page``, optionally filtered."""
+    try:
+        matches, next_page = _ranked_matches(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return FastJsonResponse({
+        'users': MATCH.many(matches),
+        'next_page': next_page,
+        'has_more': next_page is not None,
+    })
+
+CONFESSIONS_PER_PAGE = 20
+PROFILE_VIEWERS_PER_PAGE = 20
+CONNECTIONS_PER_PAGE = 24
+
+def _confession_feed(user):
+    """
+    Confessions with the viewer's like status. Like and comment totals come
+    from the stored counters, so no aggregation over likes/comments is needed.
+    """
+    user_confession_likes = ConfessionLike.objects.filter(confession=OuterRef('pk'), user=user)
+    return Confession.objects.select_related('user').annotate(
         is_liked=Exists(user_confession_likes)
-    ).order_by('-created_at')[:20]
+    )
 
-    return render(request, 'feed/explore.html', {'confessions': confessions})
+@login_required
+@use_replica
+def explore(request):
+    """Renders the Confessions explore page."""
+    confessions, next_cursor = keyset_page(_confession_feed(request.user), 'created_at', page_size=CONFESSIONS_PER_PAGE)
+    return render(request, 'feed/explore.html', {'confessions': confessions, 'next_cursor': next_cursor})
 
 
 # --- Regular Post Views (Create, Delete) ---
@@ -216,6 +273,7 @@ def create_post(request):
             # ✨ 2. Start Image Compression Logic
             image_field = form.cleaned_data.get('image')
             if image_field:
+                metrics.IMAGE_UPLOAD_BYTES.observe(image_field.size, stage='original')
                 # Check if the image size is greater than 2 MB (2 * 1024 * 1024 bytes)
                 if image_field.size > 2 * 1024 * 1024:
                     
@@ -236,12 +294,14 @@ def create_post(request):
                     
                     # This loop will try to save the image with decreasing quality
                     # to get the file size under 1MB.
-                    while quality > 10:
-                        output_buffer.seek(0) # Rewind buffer
-                        img.save(output_buffer, format='JPEG', quality=quality, optimize=True)
-                        if output_buffer.tell() / 1024 < target_size_kb:
-                            break
-                        quality -= 5 # Decrease quality by 5
+                    with metrics.IMAGE_COMPRESS_SECONDS.time():
+                        while quality > 10:
+                            output_buffer.seek(0) # Rewind buffer
+                            img.save(output_buffer, format='JPEG', quality=quality, optimize=True)
+                            if output_buffer.tell() / 1024 < target_size_kb:
+                                break
+                            quality -= 5 # Decrease quality by 5
+                    metrics.IMAGE_UPLOAD_BYTES.observe(output_buffer.tell(), stage='compressed')
 
                     # The buffer now contains the compressed image data.
                     # We create a new Django ContentFile from the buffer's content.
@@ -254,6 +314,7 @@ def create_post(request):
             # ✨ 3. End of Image Compression Logic
 
             post.save() # Now save the post instance with the (potentially compressed) image
+            metrics.POSTS_CREATED.inc()
             messages.success(request, "Post created successfully!")
             return redirect('feed:profile', user_id=request.user.id)
     else:
@@ -284,40 +345,38 @@ def delete_comment(request, comment_id):
 
 # --- AJAX / API Views for Posts ---
 
-@login_required
-def like_post(request, post_id):
+@alogin_required
+async def like_post(request, post_id):
     if request.method == 'POST':
-        post = get_object_or_404(Post, id=post_id)
-        like, created = Like.objects.get_or_create(post=post, user=request.user)
+        post = await aget_object_or_404(Post, id=post_id)
+        like, created = await Like.objects.aget_or_create(post=post, user=request.user)
         if not created:
-            like.delete()
-        return JsonResponse({'success': True, 'liked': created, 'likes_count': post.likes.count()})
+            await like.adelete()
+        metrics.LIKES.inc(target='post', action='like' if created else 'unlike')
+        likes_count = await Post.objects.filter(pk=post.pk).values_list('like_count', flat=True).aget()
+        await apublish(post_group_name(post.id), {'type': 'likes', 'likes_count': likes_count})
+        return JsonResponse({'success': True, 'liked': created, 'likes_count': likes_count})
     return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
 
 
-@login_required
-def get_post_comments(request, post_id):
+@alogin_required
+async def get_post_comments(request, post_id):
     """
     NEW VIEW: Fetches all comments for a given post for the comment modal.
     """
-    post = get_object_or_404(Post, id=post_id)
+    post = await aget_object_or_404(Post, id=post_id)
     # Security check: Ensure user can view the post before showing comments
-    is_mutual = Crush.objects.filter(sender=request.user, receiver=post.user, is_mutual=True).exists()
-    if not post.is_public and request.user != post.user and not is_mutual:
-        return JsonResponse({'error': 'Permission denied'}, status=403)
+    if not post.is_public and request.user.id != post.user_id:
+        is_mutual = await Crush.objects.filter(sender=request.user, receiver_id=post.user_id, is_mutual=True).aexists()
+        if not is_mutual:
+            return JsonResponse({'error': 'Permission denied'}, status=403)
 
-    comments = post.comments.select_related('user').order_by('created_at')
-    comments_data = [{
-        'user': {
-            'profile_picture_url': c.user.profile_picture.url if c.user.profile_picture else DEFAULT_AVATAR_URL,
-            'username': c.user.username,
-            'full_name': c.user.full_name or c.user.username
-        },
-        'content': c.content,
-        'created_at': c.created_at.isoformat(),
-    } for c in comments]
-    
-    return JsonResponse({'comments': comments_data})
+    async def build():
+        comments = post.comments.select_related('user').order_by('created_at')
+        return {'comments': [_post_comment_data(c) async for c in comments]}
+
+    # The payload is the same for everyone allowed to see it.
+    return await aconditional_json(request, [f'post:{post.id}', 'users'], build)
 1
 @login_required
 def add_comment(request, post_id):
@@ -330,19 +389,17 @@ def add_comment(request, post_id):
         content = request.POST.get('content')
         if content:
             comment = Comment.objects.create(post=post, user=request.user, content=content)
-            # Return JSON in the format the 'renderComment' JS function expects
-            return JsonResponse({
-                'success': True,
-                'comment': {
-                    'user': {
-                        'profile_picture_url': comment.user.profile_picture.url if comment.user.profile_picture else DEFAULT_AVATAR_URL,
-                        'username': comment.user.username,
-                        'full_name': comment.user.full_name or comment.user.username
-                    },
-                    'content': comment.content,
-                    'created_at': comment.created_at.isoformat(), # Use ISO format for new Date() in JS
-                }
+            metrics.COMMENTS.inc(target='post')
+            comment_data = _post_comment_data(comment)
+            post.refresh_from_db(fields=['comment_count'])
+            # Push the comment to everyone with this post's modal open
+            publish(post_group_name(post.id), {
+                'type': 'comment',
+                'comment': comment_data,
+                'comments_count': post.comment_count,
             })
+            # Return JSON in the format the 'renderComment' JS function expects
+            return JsonResponse({'success': True, 'comment': comment_data})
     return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
 
 @login_required
@@ -375,7 +432,7 @@ def get_post_data(request, post_id):
         'user_id': post.user.id,
         'user_image': post.user.profile_picture.url if post.user.profile_picture else DEFAULT_AVATAR_URL,
         'liked': post.likes.filter(user=request.user).exists(),
-        'likes_count': post.likes.count(),
+        'likes_count': post.like_count,
         'comments': comments_data,
         'is_owner': request.user == post.user
     }
@@ -403,7 +460,7 @@ def crush_action(request, user_id):
             # Check if it's now mutual and update both records if so
             if Crush.objects.filter(sender=profile_user, receiver=current_user).exists():
                 Crush.objects.filter(Q(sender=current_user, receiver=profile_user) | Q(sender=profile_user, receiver=current_user)).update(is_mutual=True)
-                Friendship.objects.get_or_create(user1=current_user, user2=profile_user)
+                sync_friendship(current_user, profile_user)
 
         elif action == 'uncrush':
             # Remove the crush from the current user
@@ -411,10 +468,7 @@ def crush_action(request, user_id):
             # Find the other user's crush record (if it exists) and set is_mutual to False
             Crush.objects.filter(sender=profile_user, receiver=current_user).update(is_mutual=False)
             # Delete the friendship
-            Friendship.objects.filter(
-                (Q(user1=current_user) & Q(user2=profile_user)) |
-                (Q(user1=profile_user) & Q(user2=current_user))
-            ).delete()
+            sync_friendship(current_user, profile_user)
 
 
         # Re-calculate the status after the action
@@ -476,6 +530,9 @@ def crush_action_profile(request, user_id):
             received_crush_obj.is_mutual = False
             received_crush_obj.save()
 
+    # The friends list reads Friendship, so keep it in step with the crushes.
+    sync_friendship(current_user, profile_user)
+
     # --- Re-fetch current status ---
     is_mutual = Crush.objects.filter(sender=request.user, receiver=profile_user, is_mutual=True).exists()
     sent_crush = Crush.objects.filter(sender=request.user, receiver=profile_user).exists()
@@ -489,23 +546,70 @@ def crush_action_profile(request, user_id):
         'received_crush': received_crush,
     })
 
+# Hearts and friends lists: the page renders the first page of cards and
+# infinite scroll fetches the rest (see accounts/connections.py).
+CONNECTION_TEMPLATES = {
+    'hearts_sent': ('feed/hearts_sent.html', 'feed/hearts_sent_cards_partial.html'),
+    'hearts_received': ('feed/hearts_received.html', 'feed/hearts_received_cards_partial.html'),
+    'friends': ('feed/friends.html', 'feed/friend_cards_partial.html'),
+}
+
+def _connection_list_page(request, kind):
+    entries, next_cursor = connection_page(request.user, kind, page_size=CONNECTIONS_PER_PAGE)
+    return render(request, CONNECTION_TEMPLATES[kind][0], {
+        'entries': entries,
+        'next_cursor': next_cursor,
+        'lazy_load_url': reverse(f'feed:lazy_load_{kind}'),
+    })
+
 @login_required
+@use_replica
 def hearts_sent(request):
-    sent_crushes = Crush.objects.filter(sender=request.user, is_mutual=False).select_related('receiver')
-    return render(request, 'feed/hearts_sent.html', {'sent_hearts': sent_crushes})
+    return _connection_list_page(request, 'hearts_sent')
 
 @login_required
+@use_replica
 def hearts_received(request):
-    received_crushes = Crush.objects.filter(receiver=request.user, is_mutual=False).select_related('sender')
-    return render(request, 'feed/hearts_received.html', {'received_hearts': received_crushes})
+    return _connection_list_page(request, 'hearts_received')
 
+@login_required
+@use_replica
+def friends_list(request):
+    return _connection_list_page(request, 'friends')
 
+@login_required
+@use_replica
+def lazy_load_connections(request, kind):
+    """Infinite-scroll endpoint for the hearts and friends pages: the rendered cards after ``cursor``."""
+    try:
+        entries, next_cursor = connection_page(
+            request.user, kind, cursor=request.GET.get('cursor'), page_size=CONNECTIONS_PER_PAGE,
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    html = render_to_string(CONNECTION_TEMPLATES[kind][1], {'entries': entries}, request=request)
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
 
-def friends_list(request):
-    friend_ids = Crush.objects.filter(sender=request.user, is_mutual=True).values_list('receiver_id', flat=True)
-    # This line is key: 'friends' is a QuerySet of User objects.
-    friends = User.objects.filter(id__in=friend_ids) 
-    return render(request, 'feed/friends.html', {'friends': friends})
+@login_required
+@use_replica
+def connections_api(request, kind):
+    """JSON form of the hearts and friends lists, keyset-paged by ``cursor``."""
+    try:
+        entries, next_cursor = connection_page(
+            request.user, kind, cursor=request.GET.get('cursor'), page_size=CONNECTIONS_PER_PAGE,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return FastJsonResponse({
+        'users': CONNECTION.many(entries),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
 
 # --- Confession Views ---
 
@@ -518,6 +622,7 @@ def create_confession(request):
             if not form.cleaned_data.get('is_anonymous'):
                 confession.user = request.user
             confession.save()
+            metrics.CONFESSIONS_CREATED.inc()
             messages.success(request, "Confession posted!")
             return redirect('feed:explore')
     else:
@@ -531,7 +636,10 @@ def like_confession(request):
         like, created = ConfessionLike.objects.get_or_create(user=request.user, confession=confession)
         if not created:
             like.delete()
-        return JsonResponse({'liked': created, 'like_count': confession.likes.count()})
+        metrics.LIKES.inc(target='confession', action='like' if created else 'unlike')
+        confession.refresh_from_db(fields=['like_count'])
+        publish(confession_group_name(confession.id), {'type': 'likes', 'like_count': confession.like_count})
+        return JsonResponse({'liked': created, 'like_count': confession.like_count})
     return JsonResponse({'error': 'Invalid request method'}, status=400)
 
 @login_required
@@ -540,29 +648,61 @@ def add_confession_comment(request):
         confession = get_object_or_404(Confession, id=request.POST.get('confession_id'))
         content = request.POST.get('content', '').strip()
         if content:
-            ConfessionComment.objects.create(
+            comment = ConfessionComment.objects.create(
                 confession=confession,
                 user=request.user,
                 content=content,
                 is_anonymous=request.POST.get('is_anonymous') == 'true'
             )
-            return JsonResponse({'success': True, 'comment_count': confession.comments.count()})
+            metrics.COMMENTS.inc(target='confession')
+            comment_data = _confession_comment_data(comment)
+            confession.refresh_from_db(fields=['comment_count'])
+            publish(confession_group_name(confession.id), {
+                'type': 'comment',
+                'comment': comment_data,
+                'comment_count': confession.comment_count,
+            })
+            return JsonResponse({'success': True, 'comment': comment_data, 'comment_count': confession.comment_count})
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
 # --- Other API/AJAX Views ---
 
-@login_required
-def get_home_updates(request):
+@alogin_required
+@use_replica
+async def get_home_updates(request):
     """AJAX endpoint to periodically update stats on the home page."""
     return JsonResponse({'stats': {
-        'hearts_sent': Crush.objects.filter(sender=request.user, is_mutual=False).count(),
-        'hearts_received': Crush.objects.filter(receiver=request.user, is_mutual=False).count(),
-        'friends': Crush.objects.filter(sender=request.user, is_mutual=True).count(),
-        'profile_views': ProfileView.objects.filter(viewed=request.user).values('viewer').distinct().count(),
+        'hearts_sent': await Crush.objects.filter(sender=request.user, is_mutual=False).acount(),
+        'hearts_received': await Crush.objects.filter(receiver=request.user, is_mutual=False).acount(),
+        'friends': await Crush.objects.filter(sender=request.user, is_mutual=True).acount(),
+        'profile_views': request.user.profile_view_count,
     }})
 
 @login_required
+@use_replica
+def profile_viewers_api(request):
+    """
+    "Who viewed my profile": recent viewers, newest first, keyset-paged by
+    ``cursor``. The first page also carries the view trends.
+    """
+    cursor = request.GET.get('cursor')
+    try:
+        views, next_cursor = recent_viewers(request.user, cursor, PROFILE_VIEWERS_PER_PAGE)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    data = {
+        'viewers': PROFILE_VIEWER.many(views),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'total_viewers': request.user.profile_view_count,
+    }
+    if not cursor:
+        data['trends'] = view_trends(request.user)
+    return FastJsonResponse(data)
+
+@login_required
+@use_replica
 def load_users_api(request):
     """Paginates and loads users for different categories on the home page."""
     category = request.GET.get('category')
@@ -592,6 +732,7 @@ def load_users_api(request):
     return JsonResponse({'status': 'ok', 'users': users_data, 'has_next': page_obj.has_next()})
 
 @login_required
+@use_replica
 def search_users_api(request):
     """API for real-time user search."""
     query = request.GET.get('q', '').strip()
@@ -600,51 +741,23 @@ def search_users_api(request):
         users = User.objects.filter(
             Q(username__icontains=query) | Q(full_name__icontains=query)
         ).exclude(id=request.user.id)[:10]
-        for user in users:
-            users_data.append({
-                'id': user.id, 'username': user.username, 'full_name': user.full_name or user.username,
-                'profile_picture_url': user.profile_picture.url if user.profile_picture else DEFAULT_AVATAR_URL,
-            })
-    return JsonResponse({'users': users_data})
+        users_data = USER_CARD.many(users)
+    return FastJsonResponse({'users': users_data})
 
 @login_required
 def get_confession_details_api(request, confession_id):
     """API to get details for a single confession and its comments."""
-    confession = get_object_or_404(Confession, pk=confession_id)
-    
-    comments = confession.comments.select_related('user').order_by('created_at')
-    comment_list = []
-    for comment in comments:
-        # Get the correct profile picture URL for each comment
-        if comment.is_anonymous or not comment.user:
-            profile_pic = ANONYMOUS_AVATAR_URL
-        else:
-            profile_pic = comment.user.profile_picture.url if comment.user.profile_picture else DEFAULT_AVATAR_URL
+    def build():
+        confession = get_object_or_404(Confession.objects.select_related('user'), pk=confession_id)
+        comments = confession.comments.select_related('user').order_by('created_at')
+        return {
+            'success': True,
+            'confession': CONFESSION(confession),
+            'comments': CONFESSION_COMMENT.many(comments),
+        }
 
-        comment_list.append({
-            'user': "Anonymous" if comment.is_anonymous or not comment.user else comment.user.username,
-            'profile_picture_url': profile_pic,
-            'content': comment.content,
-            'time_since': timesince(comment.created_at) + " ago",
-        })
-        
-    author_name = "Anonymous" if confession.is_anonymous or not confession.user else confession.user.username
-    
-    # NEW: Get the correct profile picture URL for the confession's author
-    if confession.is_anonymous or not confession.user:
-        author_avatar_url = ANONYMOUS_AVATAR_URL
-    else:
-        author_avatar_url = confession.user.profile_picture.url if confession.user.profile_picture else DEFAULT_AVATAR_URL
-
-    return JsonResponse({
-        'success': True,
-        'confession': {
-            'content': confession.content,
-            'author': author_name,
-            'author_avatar': author_avatar_url  # This is the new key
-        },
-        'comments': comment_list
-    })
+    # Anonymous confessions look the same to every user, so one cached copy serves all.
+    return conditional_json(request, [f'confession:{confession_id}', 'users'], build)
 
 # The following two views are referenced in your urls.py but seem redundant
 # with get_confession_details_api. I've included them to prevent errors.
@@ -660,6 +773,7 @@ def get_confession_comments(request, confession_id):
 # Add these implementations to your views.py file
 
 @login_required
+@use_replica
 def lazy_load_section(request, section_type):
     """
     Lazy loads different user sections for the home page carousels.
@@ -742,112 +856,111 @@ def lazy_load_section(request, section_type):
             'error': f'Failed to load {section_type} users: {str(e)}'
         }, status=500)
 
-@login_required  
-def lazy_load_posts(request):
+@login_required
+@use_replica
+def lazy_load_confessions(request):
+    """
+    Infinite-scroll endpoint for the explore page. Returns the rendered
+    confession cards after the given cursor.
+    """
+    try:
+        confessions, next_cursor = keyset_page(
+            _confession_feed(request.user), 'created_at',
+            cursor=request.GET.get('cursor'), page_size=CONFESSIONS_PER_PAGE
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    html = render_to_string('feed/confession_cards_partial.html', {'confessions': confessions}, request=request)
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
+@alogin_required
+@use_replica
+async def lazy_load_posts(request):
     """
     Lazy loads paginated posts for the public feed with comprehensive error handling.
     """
-    print(f"DEBUG: lazy_load_posts called with method: {request.method}")
-    print(f"DEBUG: GET parameters: {request.GET}")
-    
     if request.method != 'GET':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
-    try:
-        page_number = int(request.GET.get('page', 1))
-        posts_per_page = 5
+    async def build():
+        try:
+            page_number = int(request.GET.get('page', 1))
+            posts_per_page = 5
         
-        print(f"DEBUG: Loading page {page_number}")
+            public_posts_count = await Post.objects.filter(is_public=True).acount()
         
-        # Check if we have any posts at all
-        total_posts = Post.objects.count()
-        public_posts_count = Post.objects.filter(is_public=True).count()
+            # If no posts, return empty result
+            if public_posts_count == 0:
+                logger.debug("No public posts found", extra={'page': page_number})
+                return {
+                    'success': True,
+                    'posts': [],
+                    'has_more': False,
+                    'debug_info': {
+                        'total_posts': await Post.objects.acount(),
+                        'public_posts': public_posts_count,
+                        'page_requested': page_number
+                    }
+                }
         
-        print(f"DEBUG: Total posts: {total_posts}, Public posts: {public_posts_count}")
+            # Paginate by hand: Paginator only speaks the sync ORM.
+            total_pages = -(-public_posts_count // posts_per_page)
+            if page_number < 1 or page_number > total_pages:
+                logger.debug("Page %d out of range (1-%d)", page_number, total_pages)
+                return {
+                    'success': True,
+                    'posts': [],
+                    'has_more': False,
+                    'error': f'Page {page_number} not found'
+                }
+            has_next = page_number < total_pages
+            offset = (page_number - 1) * posts_per_page
         
-        # Get public posts with like status for current user
-        user_post_likes = Like.objects.filter(post=OuterRef('pk'), user=request.user)
-        all_public_posts = Post.objects.filter(is_public=True).select_related('user').annotate(
-            is_liked=Exists(user_post_likes)
-        ).order_by('-created_at')
+            # Get public posts with like status for current user
+            user_post_likes = Like.objects.filter(post=OuterRef('pk'), user=request.user)
+            posts_page = Post.objects.filter(is_public=True).select_related('user').annotate(
+                is_liked=Exists(user_post_likes)
+            ).order_by('-created_at')[offset:offset + posts_per_page]
         
-        print(f"DEBUG: Query executed, found {all_public_posts.count()} public posts")
+            # Format posts data for frontend
+            posts_data = []
+            with debug_span(logger, 'lazy_load_posts', page=page_number) as span:
+                async for post in posts_page:
+                    try:
+                        posts_data.append(POST(post))
+                    except Exception:
+                        logger.warning("Skipping post %s in lazy_load_posts", post.id, exc_info=True)
+                        continue
+                span.update(posts=len(posts_data), has_more=has_next)
         
-        # If no posts, return empty result
-        if not all_public_posts.exists():
-            print("DEBUG: No public posts found")
-            return JsonResponse({
+            result = {
                 'success': True,
-                'posts': [],
-                'has_more': False,
+                'posts': posts_data,
+                'has_more': has_next,
                 'debug_info': {
-                    'total_posts': total_posts,
-                    'public_posts': public_posts_count,
-                    'page_requested': page_number
-                }
-            })
-        
-        # Paginate
-        paginator = Paginator(all_public_posts, posts_per_page)
-        
-        try:
-            posts_page = paginator.page(page_number)
-            print(f"DEBUG: Page {page_number} has {len(posts_page)} posts")
-        except Exception as page_error:
-            print(f"DEBUG: Page error: {page_error}")
-            return JsonResponse({
-                'success': True,
-                'posts': [],
-                'has_more': False,
-                'error': f'Page {page_number} not found'
-            })
-        
-        # Format posts data for frontend
-        posts_data = []
-        for post in posts_page:
-            try:
-                post_data = {
-                    'id': post.id,
-                    'image': post.image.url if post.image else '',
-                    'caption': post.caption or '',
-                    'is_liked': getattr(post, 'is_liked', False),
-                    'user': {
-                        'id': post.user.id,
-                        'username': post.user.username,
-                        'full_name': post.user.full_name or post.user.username,
-                        'profile_picture': post.user.profile_picture.url if post.user.profile_picture else DEFAULT_AVATAR_URL,
-                    },
-                    'created_at': post.created_at.isoformat(),
+                    'page': page_number,
+                    'posts_in_page': len(posts_data),
+                    'total_pages': total_pages,
+                    'has_next': has_next
                 }
-                posts_data.append(post_data)
-                print(f"DEBUG: Added post {post.id} to data")
-            except Exception as post_error:
-                print(f"DEBUG: Error processing post {post.id}: {post_error}")
-                continue
-        
-        result = {
-            'success': True,
-            'posts': posts_data,
-            'has_more': posts_page.has_next(),
-            'debug_info': {
-                'page': page_number,
-                'posts_in_page': len(posts_data),
-                'total_pages': paginator.num_pages,
-                'has_next': posts_page.has_next()
             }
-        }
         
-        print(f"DEBUG: Returning {len(posts_data)} posts, has_more: {posts_page.has_next()}")
-        return JsonResponse(result)
+            return result
         
-    except Exception as e:
-        print(f"DEBUG: Exception in lazy_load_posts: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return JsonResponse({
-            'error': f'Failed to load posts: {str(e)}',
-            'success': False
-        }, status=500)
+        except Exception as e:
+            logger.exception("lazy_load_posts failed")
+            return JsonResponse({
+                'error': f'Failed to load posts: {str(e)}',
+                'success': False
+            }, status=500)
+
+    # is_liked differs per user, so each user gets their own ETag.
+    return await aconditional_json(request, ['posts', 'users'], build, vary_on_user=True)
     
 
 @login_required
@@ -973,35 +1086,35 @@ def test_lazy_load_posts(request):
         page_number = int(request.GET.get('page', 1))
         posts_per_page = 5
         
-        print(f"=== LAZY LOAD DEBUG START ===")
-        print(f"User: {request.user.username} (ID: {request.user.id})")
-        print(f"Page requested: {page_number}")
+        logger.debug("test_lazy_load_posts start", extra={'user_id': request.user.id, 'page': page_number})
         
         # Step 1: Check basic counts
         total_posts = Post.objects.count()
         public_posts_count = Post.objects.filter(is_public=True).count()
-        print(f"Total posts in DB: {total_posts}")
-        print(f"Public posts in DB: {public_posts_count}")
         
         # Step 2: Try to get public posts without annotation first
         basic_public_posts = Post.objects.filter(is_public=True).select_related('user').order_by('-created_at')
-        print(f"Basic public posts query count: {basic_public_posts.count()}")
         
         # Step 3: Add annotation
         user_post_likes = Like.objects.filter(post=OuterRef('pk'), user=request.user)
         annotated_posts = basic_public_posts.annotate(is_liked=Exists(user_post_likes))
-        print(f"Annotated posts query count: {annotated_posts.count()}")
+        if debug_enabled(logger):
+            # These counts cost a query each, so only run them when they will be logged.
+            logger.debug("test_lazy_load_posts counts", extra={
+                'total_posts': total_posts,
+                'public_posts': public_posts_count,
+                'basic_count': basic_public_posts.count(),
+                'annotated_count': annotated_posts.count(),
+            })
         
         # Step 4: Test pagination
         from django.core.paginator import Paginator
         paginator = Paginator(annotated_posts, posts_per_page)
-        print(f"Paginator created - total pages: {paginator.num_pages}")
         
         try:
             posts_page = paginator.page(page_number)
-            print(f"Page {page_number} loaded - has {len(posts_page)} posts")
         except Exception as page_error:
-            print(f"Pagination error: {page_error}")
+            logger.debug("Pagination error: %s", page_error)
             return JsonResponse({
                 'error': f'Pagination failed: {str(page_error)}',
                 'debug_info': {
@@ -1016,8 +1129,6 @@ def test_lazy_load_posts(request):
         posts_data = []
         for i, post in enumerate(posts_page):
             try:
-                print(f"Processing post {i+1}: ID {post.id}")
-                
                 # Check user object
                 user_data = {
                     'id': post.user.id,
@@ -1041,17 +1152,16 @@ def test_lazy_load_posts(request):
                 }
                 
                 posts_data.append(post_data)
-                print(f"Successfully processed post {post.id}")
                 
             except Exception as post_error:
-                print(f"Error processing post {post.id}: {post_error}")
+                logger.warning("Error processing post %s in test_lazy_load_posts", post.id, exc_info=True)
                 posts_data.append({
                     'id': post.id,
                     'error': str(post_error),
                     'user': {'id': post.user.id, 'username': post.user.username}
                 })
         
-        print(f"=== LAZY LOAD DEBUG END ===")
+        logger.debug("test_lazy_load_posts end", extra={'page': page_number, 'posts': len(posts_data)})
         
         return JsonResponse({
             'success': True,
@@ -1069,8 +1179,7 @@ def test_lazy_load_posts(request):
         
     except Exception as e:
         import traceback
-        print(f"MAJOR ERROR in test_lazy_load_posts: {str(e)}")
-        traceback.print_exc()
+        logger.exception("test_lazy_load_posts failed")
         return JsonResponse({
             'error': str(e),
             'traceback': traceback.format_exc()
@@ -1118,7 +1227,7 @@ def lazy_load_posts_improved(request):
             user_post_likes = Like.objects.filter(post=OuterRef('pk'), user=request.user)
             all_public_posts = base_query.annotate(is_liked=Exists(user_post_likes))
         except Exception as like_error:
-            print(f"Like annotation failed: {like_error}")
+            logger.warning("Like annotation failed: %s", like_error)
             # Fallback without like annotation
             all_public_posts = base_query.extra(select={'is_liked': 'FALSE'})
         
@@ -1178,8 +1287,8 @@ def lazy_load_posts_improved(request):
                 }
                 posts_data.append(post_data)
                 
-            except Exception as post_error:
-                print(f"Error processing post {post.id}: {post_error}")
+            except Exception:
+                logger.warning("Skipping post %s in lazy_load_posts_improved", post.id, exc_info=True)
                 # Skip this post but continue with others
                 continue
         
@@ -1198,7 +1307,7 @@ def lazy_load_posts_improved(request):
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"Error in lazy_load_posts_improved: {error_trace}")
+        logger.exception("lazy_load_posts_improved failed")
         
         return JsonResponse({
             'success': False,
@@ -1,4 +1,13 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
 from django.shortcuts import render
 
+from feed.caching import fragment_versions
+
 def home(request):
-    return render(request, 'poornima_site/index.html')
+    # The page is static apart from asset URLs, which change when a deploy
+    # writes a new static manifest.
+    context = {
+        'fragments': fragment_versions(),
+        'static_version': getattr(staticfiles_storage, 'manifest_hash', ''),
+    }
+    return render(request, 'poornima_site/index.html', context)
@@ -16,7 +16,6 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-import chat.routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poornimax.settings')
 
@@ -24,11 +23,16 @@ try:
     # Set up Django ASGI application first
     django_asgi_app = get_asgi_application()
 
+    # Routing modules import models, so they must load after the app registry is ready.
+    import chat.routing
+    import feed.routing
+
     application = ProtocolTypeRouter({
         'http': django_asgi_app,
         'websocket': AuthMiddlewareStack(
             URLRouter(
-                chat.routing.websocket_urlpatterns
+                chat.routing.websocket_urlpatterns +
+                feed.routing.websocket_urlpatterns
             )
         ),
     })
@@ -0,0 +1,44 @@
+"""
+Cache selection for the poornimax project.
+
+The backend is chosen with the ``CACHE_BACKEND`` environment variable, in the
+same way as ``CHANNEL_LAYER`` (see ``poornimax.channel_layers``):
+
+    CACHE_BACKEND=locmem    LocMemCache. Per process, so cached responses and
+                            version counters are not shared between workers.
+    CACHE_BACKEND=redis     Django's RedisCache (default when REDIS_URLS /
+                            REDIS_URL is set).
+
+Only the first of several ``REDIS_URLS`` is used; the cache is not sharded.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .channel_layers import redis_hosts
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+
+def build_caches(environ=os.environ, default_redis_url=None):
+    """Builds the ``CACHES`` setting from the environment."""
+    hosts = redis_hosts(environ, default_redis_url)
+    backend = environ.get('CACHE_BACKEND', '').strip().lower() or ('redis' if hosts else 'locmem')
+
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {backend!r}; expected one of: {', '.join(BACKENDS)}.")
+    if backend == 'locmem':
+        return {'default': {'BACKEND': BACKENDS['locmem']}}
+    if not hosts:
+        raise ImproperlyConfigured("CACHE_BACKEND=redis requires REDIS_URL or REDIS_URLS to be set.")
+
+    return {
+        'default': {
+            'BACKEND': BACKENDS['redis'],
+            'LOCATION': hosts[0],
+            'KEY_PREFIX': environ.get('CACHE_KEY_PREFIX', 'poornimax'),
+        },
+    }
@@ -0,0 +1,61 @@
+"""
+Channel layer selection for the poornimax project.
+
+The backend is chosen explicitly with the ``CHANNEL_LAYER`` environment
+variable instead of being inferred from the hosting platform:
+
+    CHANNEL_LAYER=memory        InMemoryChannelLayer. Single process only, so
+                                chat between two ASGI workers silently breaks.
+    CHANNEL_LAYER=redis         channels_redis RedisChannelLayer (default when
+                                REDIS_URLS / REDIS_URL is set).
+    CHANNEL_LAYER=redis-pubsub  channels_redis RedisPubSubChannelLayer.
+
+``REDIS_URLS`` takes a comma-separated list of Redis servers. channels_redis
+shards channels and groups across them by consistent hashing, so adding
+servers spreads the group fan-out of busy chat rooms.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+MEMORY_BACKEND = 'channels.layers.InMemoryChannelLayer'
+
+REDIS_BACKENDS = {
+    'redis': 'channels_redis.core.RedisChannelLayer',
+    'redis-pubsub': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+}
+
+
+def redis_hosts(environ=os.environ, default_url=None):
+    """Returns the list of Redis URLs from REDIS_URLS, REDIS_URL or ``default_url``."""
+    raw = environ.get('REDIS_URLS') or environ.get('REDIS_URL') or default_url or ''
+    return [url.strip() for url in raw.split(',') if url.strip()]
+
+
+def build_channel_layers(environ=os.environ, default_redis_url=None):
+    """Builds the ``CHANNEL_LAYERS`` setting from the environment."""
+    hosts = redis_hosts(environ, default_redis_url)
+    backend = environ.get('CHANNEL_LAYER', '').strip().lower() or ('redis' if hosts else 'memory')
+
+    if backend == 'memory':
+        return {'default': {'BACKEND': MEMORY_BACKEND}}
+
+    if backend not in REDIS_BACKENDS:
+        choices = ', '.join(['memory', *REDIS_BACKENDS])
+        raise ImproperlyConfigured(f"Unknown CHANNEL_LAYER {backend!r}; expected one of: {choices}.")
+    if not hosts:
+        raise ImproperlyConfigured(f"CHANNEL_LAYER={backend} requires REDIS_URL or REDIS_URLS to be set.")
+
+    config = {
+        'hosts': hosts,
+        'prefix': environ.get('CHANNEL_LAYER_PREFIX', 'poornimax'),
+    }
+    if backend == 'redis':
+        config.update({
+            # Messages buffered per channel before group_send starts dropping them.
+            'capacity': int(environ.get('CHANNEL_LAYER_CAPACITY', 1000)),
+            'expiry': int(environ.get('CHANNEL_LAYER_EXPIRY', 60)),
+            'group_expiry': int(environ.get('CHANNEL_LAYER_GROUP_EXPIRY', 86400)),
+        })
+
+    return {'default': {'BACKEND': REDIS_BACKENDS[backend], 'CONFIG': config}}
@@ -0,0 +1,113 @@
+"""
+Database selection for the poornimax project.
+
+Without ``DATABASE_URL`` the project uses the local SQLite file
+(``SQLITE_PATH`` overrides its location) through ``poornimax.sqlite``,
+which applies ``SQLITE_PRAGMAS`` to every connection:
+
+    journal_mode=WAL      readers no longer block the writer and vice versa
+    busy_timeout=5000     a writer waits up to 5 s for the lock instead of
+                          failing with "database is locked"
+    synchronous=NORMAL    safe with WAL; fsync on checkpoint, not every commit
+    mmap_size, cache_size reads served from memory-mapped pages and a 64 MB
+                          page cache
+
+``SQLITE_PRAGMAS=off`` restores Django's plain SQLite backend. Writes that
+must not contend with each other can go through ``poornimax.write_queue``.
+
+With a Postgres URL the project uses ``poornimax.postgresql_pool``, a
+pooled PostgreSQL backend:
+
+    DB_POOL=on          (default for Postgres) connections are borrowed from
+                        a per-process pool and returned when a request or a
+                        ``database_sync_to_async`` call ends.
+    DB_POOL=off         Django's own backend with persistent connections
+                        (``CONN_MAX_AGE``, default 600 seconds), one per thread.
+
+Pool sizing, per process (see ``poornimax/postgresql_pool/pool.py``):
+``DB_POOL_MIN_SIZE``, ``DB_POOL_MAX_SIZE``, ``DB_POOL_TIMEOUT``,
+``DB_POOL_MAX_LIFETIME``, ``DB_POOL_MAX_IDLE``. Keep
+``workers x DB_POOL_MAX_SIZE`` below the server's ``max_connections``.
+
+A read replica is added as the ``replica`` alias from
+``DATABASE_REPLICA_URL`` (configured like ``DATABASE_URL``, with its own
+pool) or, for local testing, from ``SQLITE_REPLICA_PATH``. Only views
+decorated with ``poornimax.replicas.use_replica`` read from it.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+REPLICA_ALIAS = 'replica'
+POOL_ENGINE = 'poornimax.postgresql_pool'
+SQLITE_ENGINE = 'poornimax.sqlite'
+POSTGRES_ENGINES = ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2')
+
+POOL_ENV = {
+    'min_size': ('DB_POOL_MIN_SIZE', int),
+    'max_size': ('DB_POOL_MAX_SIZE', int),
+    'timeout': ('DB_POOL_TIMEOUT', float),
+    'max_lifetime': ('DB_POOL_MAX_LIFETIME', float),
+    'max_idle': ('DB_POOL_MAX_IDLE', float),
+}
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # Negative: KiB rather than pages.
+}
+
+
+def build_sqlite(environ=os.environ, sqlite_path=None):
+    """Builds the local SQLite database's settings."""
+    path = environ.get('SQLITE_PATH') or sqlite_path
+    if environ.get('SQLITE_PRAGMAS', '').strip().lower() == 'off':
+        return {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    pragmas = dict(SQLITE_PRAGMAS)
+    if environ.get('SQLITE_BUSY_TIMEOUT'):
+        pragmas['busy_timeout'] = int(environ['SQLITE_BUSY_TIMEOUT'])
+    return {'ENGINE': SQLITE_ENGINE, 'NAME': path, 'PRAGMAS': pragmas}
+
+
+def build_databases(environ=os.environ, sqlite_path=None):
+    """Builds the ``DATABASES`` setting from the environment."""
+    url = environ.get('DATABASE_URL', '').strip()
+    if url:
+        databases = {'default': build_url(url, environ)}
+        replica_url = environ.get('DATABASE_REPLICA_URL', '').strip()
+        if replica_url:
+            databases[REPLICA_ALIAS] = build_url(replica_url, environ)
+    else:
+        databases = {'default': build_sqlite(environ, sqlite_path)}
+        if environ.get('SQLITE_REPLICA_PATH'):
+            databases[REPLICA_ALIAS] = build_sqlite({**environ, 'SQLITE_PATH': environ['SQLITE_REPLICA_PATH']})
+    if REPLICA_ALIAS in databases:
+        # Tests read the replica through the default connection instead of a second test database.
+        databases[REPLICA_ALIAS]['TEST'] = {'MIRROR': 'default'}
+    return databases
+
+
+def build_url(url, environ=os.environ):
+    """Builds one database's settings from a ``DATABASE_URL``-style URL."""
+    import dj_database_url
+    config = dj_database_url.parse(url, conn_health_checks=True)
+    is_postgres = config['ENGINE'] in POSTGRES_ENGINES
+
+    pooled = environ.get('DB_POOL', '').strip().lower() or ('on' if is_postgres else 'off')
+    if pooled not in ('on', 'off'):
+        raise ImproperlyConfigured(f"Unknown DB_POOL {pooled!r}; expected on or off.")
+    if pooled == 'off':
+        config['CONN_MAX_AGE'] = int(environ.get('CONN_MAX_AGE', 600))
+        return config
+    if not is_postgres:
+        raise ImproperlyConfigured(f"DB_POOL=on requires a PostgreSQL DATABASE_URL, not {config['ENGINE']}.")
+
+    config['ENGINE'] = POOL_ENGINE
+    # Closing hands the connection back to the pool, so close after every request.
+    config['CONN_MAX_AGE'] = 0
+    config['POOL'] = {
+        option: cast(environ[name]) for option, (name, cast) in POOL_ENV.items() if environ.get(name)
+    }
+    return config
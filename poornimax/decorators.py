@@ -0,0 +1,27 @@
+"""
+Shared view decorators for the poornimax project.
+"""
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+
+
+def alogin_required(view_func):
+    """
+    Async counterpart of ``login_required``.
+
+    Django 5.0's ``login_required`` wraps views in a sync function, which
+    forces async views back through the thread pool. This resolves the user
+    with ``request.auser()`` instead and replaces the lazy ``request.user``
+    with the loaded instance so the view can use it without touching the
+    sync ORM.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+
+    return _wrapped_view
@@ -0,0 +1,231 @@
+"""
+Delivery of uploaded media (post images, profile pictures).
+
+``HashedMediaStorage`` is the default file storage. It adds a short hash of
+the content to every saved file name (``photo.3f2a9c1b7d4e.jpg``), so a name
+always refers to the same bytes and can be cached forever. Uploads with
+identical content share one file.
+
+``serve_media`` answers ``MEDIA_URL`` requests in one of three ways:
+
+    MEDIA_ACCEL_REDIRECT=/protected-media/
+        Returns an empty response with ``X-Accel-Redirect`` and lets nginx
+        send the file from an ``internal`` location aliased to MEDIA_ROOT.
+    MEDIA_SENDFILE_HEADER=X-Sendfile
+        Returns the absolute path, percent-encoded, in that header for
+        Apache mod_xsendfile or lighttpd.
+    (neither)
+        Streams the file with ``FileResponse``, which gunicorn sends with
+        ``os.sendfile`` through ``wsgi.file_wrapper``.
+
+Images of posts that are not public are only served to their owner and
+the owner's mutual crushes, as ``get_post_data`` shows them; anyone else
+gets a 404. They are sent with ``Cache-Control: private`` so shared caches
+never keep them. Everything else (public posts, profile pictures) is
+public: hashed names get ``Cache-Control: public, max-age=31536000,
+immutable``, files uploaded before hashing get ``MEDIA_CACHE_SECONDS``. Single byte
+ranges are answered with 206 (the front server handles ranges itself in the
+first two modes); ETag / Last-Modified revalidation returns 304.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+HASH_LENGTH = 12
+# Longest base name kept before the hash; shorter when the field's max_length needs it.
+MAX_BASE_LENGTH = 40
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Where feed.models.post_image_path puts post images.
+POST_IMAGE_DIR = 'posts/'
+
+_HASHED_NAME_RE = re.compile(r'\.([0-9a-f]{%d})(\.[^./]+)?$' % HASH_LENGTH)
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_hashed(name):
+    return _HASHED_NAME_RE.search(name) is not None
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage that embeds a content hash in every saved name."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        hashed = self._hashed_name(name, content, max_length)
+        if self.exists(hashed):
+            # Same path and same bytes: reuse the stored file.
+            return hashed
+        return super().save(hashed, content, max_length=max_length)
+
+    def _hashed_name(self, name, content, max_length):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        root, ext = posixpath.splitext(_HASHED_NAME_RE.sub(r'\2', name))
+        directory, base = posixpath.split(root)
+        suffix = f'.{digest.hexdigest()[:HASH_LENGTH]}{ext}'
+        # The base name is shortened rather than the hash, which
+        # get_available_name would cut off first.
+        room = MAX_BASE_LENGTH
+        if max_length is not None:
+            room = min(room, max_length - len(posixpath.join(directory, suffix)))
+        if room < 1:
+            raise SuspiciousFileOperation(
+                f'Storage can not find an available filename for "{name}". '
+                'Please make sure that the corresponding file field allows sufficient "max_length".'
+            )
+        return posixpath.join(directory, f'{base[:room]}{suffix}')
+
+
+# ==============================================================================
+# SERVING
+# ==============================================================================
+
+def _content_type(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def _parse_range(header, size):
+    """Returns ``(start, end)`` (inclusive) for a single byte range, ``None`` to send the whole file."""
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Malformed or multi-range requests get the full file.
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+def _read_range(path, start, length, block_size=FileResponse.block_size):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _if_range_matches(if_range, etag, last_modified):
+    """A Range is only honoured if If-Range (an ETag or a date) still matches the file."""
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range.strip() == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and since >= last_modified
+
+
+def _file_response(request, full_path, size, etag, last_modified):
+    range_header = request.headers.get('Range')
+    if range_header and _if_range_matches(request.headers.get('If-Range'), etag, last_modified):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            # Ranged replies are short and rare (image previews, video
+            # seeks), so they are streamed rather than sent zero-copy.
+            response = StreamingHttpResponse(
+                _read_range(full_path, start, length),
+                status=206,
+                content_type=_content_type(full_path),
+            )
+            response['Content-Length'] = length
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            return response
+    return FileResponse(open(full_path, 'rb'))
+
+
+def _post_image_access(request, path):
+    """
+    ``'public'`` or ``'private'`` for the media at ``path``; raises Http404
+    when it belongs only to posts the user may not see.
+    """
+    if not path.startswith(POST_IMAGE_DIR):
+        return 'public'
+    # Identical uploads share one file, so several posts can own it.
+    owners = list(apps.get_model('feed', 'Post').objects.filter(image=path).values_list('user_id', 'is_public'))
+    if not owners or any(is_public for _, is_public in owners):
+        return 'public'
+    user = request.user
+    owner_ids = {user_id for user_id, _ in owners}
+    if user.is_authenticated and (
+        user.pk in owner_ids
+        or apps.get_model('accounts', 'Crush').objects.filter(sender=user, receiver_id__in=owner_ids, is_mutual=True).exists()
+    ):
+        return 'private'
+    raise Http404("Media file not found.")
+
+
+def serve_media(request, path):
+    """Serves ``MEDIA_ROOT/<path>``; see the module docstring for the delivery modes."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stats = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        # SuspiciousFileOperation: the path points outside MEDIA_ROOT.
+        raise Http404("Media file not found.")
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404("Media file not found.")
+
+    access = _post_image_access(request, path)
+    hashed = is_hashed(path)
+    etag = f'"{_HASHED_NAME_RE.search(path).group(1)}"' if hashed else f'"{int(stats.st_mtime)}-{stats.st_size}"'
+    last_modified = int(stats.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        response = not_modified
+    elif getattr(settings, 'MEDIA_ACCEL_REDIRECT', ''):
+        response = HttpResponse(content_type=_content_type(full_path))
+        # Both headers are read as URIs: spaces, '?', '%' and non-ASCII
+        # characters in a file name must be percent-encoded.
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + path.lstrip('/'))
+    elif getattr(settings, 'MEDIA_SENDFILE_HEADER', ''):
+        response = HttpResponse(content_type=_content_type(full_path))
+        response[settings.MEDIA_SENDFILE_HEADER] = quote(full_path)
+    else:
+        response = _file_response(request, full_path, stats.st_size, etag, last_modified)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if access == 'private':
+        patch_cache_control(response, private=True, max_age=getattr(settings, 'MEDIA_CACHE_SECONDS', 3600))
+    elif hashed:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_SECONDS', 3600))
+    return response
@@ -0,0 +1,399 @@
+"""
+Prometheus-style metrics for the poornimax project.
+
+Subsystems declare their metrics at import time in their own ``metrics``
+module (``chat.metrics``, ``feed.metrics``, ``accounts.metrics``) and update
+them in place:
+
+    MESSAGES = Counter('poornimax_chat_messages_total', "Chat messages sent.", ['transport'])
+    MESSAGES.inc(transport='websocket')
+
+    with COMPRESS_SECONDS.time():
+        ...
+
+Everything is exposed in the Prometheus text format at ``/metrics``, to
+scrapers holding ``METRICS_TOKEN`` and to staff users (see ``metrics_view``).
+
+Multiple worker processes (gunicorn, several ASGI workers) are supported
+by setting ``METRICS_DIR`` to a directory shared by the workers of one
+host. Each process periodically writes a snapshot of its own values to
+``<METRICS_DIR>/metrics_<pid>.json`` and ``/metrics`` merges all snapshots:
+counters and histograms are summed across every file, gauges only across
+processes that are still alive. Clear the directory when the service is
+restarted. Without ``METRICS_DIR`` only the serving process is reported.
+"""
+import atexit
+import bisect
+import glob
+import hmac
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry:
+    """Holds every declared metric and handles the per-process snapshot files."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flusher = None
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name!r} is already registered.")
+            self._metrics[metric.name] = metric
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    # --------------------------------------------------------------------------
+    # Multiprocess support
+    # --------------------------------------------------------------------------
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', '') or ''
+
+    def check_pid(self):
+        """Called on every update; resets values inherited across fork() and starts the flusher."""
+        pid = os.getpid()
+        if pid == self._pid and (self._flusher or not self.directory):
+            return
+        with self._lock:
+            if pid != self._pid:
+                # A forked worker starts from zero; the parent's values live in the parent's file.
+                self._pid = pid
+                self._flusher = None
+                for metric in self._metrics.values():
+                    metric.clear()
+            if self.directory and self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_forever, name='metrics-flusher', daemon=True)
+                self._flusher.start()
+
+    def _flush_forever(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        """Atomically writes this process's values to its snapshot file."""
+        directory = self.directory
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        snapshot = {
+            'pid': os.getpid(),
+            'metrics': {metric.name: metric.dump() for metric in self.metrics()},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics_', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, os.path.join(directory, f'metrics_{os.getpid()}.json'))
+
+    def flush_on_exit(self):
+        """Final snapshot; an exiting process no longer holds connections, so its gauges drop out."""
+        for metric in self.metrics():
+            if metric.type == 'gauge':
+                metric.clear()
+        self.flush()
+
+    def collect(self):
+        """Returns {name: (metric, {label values: value})} merged over all live snapshots."""
+        merged = {metric.name: (metric, metric.samples()) for metric in self.metrics()}
+        directory = self.directory
+        if not directory:
+            return merged
+
+        own_pid = os.getpid()
+        for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # Being replaced or truncated; the next scrape picks it up.
+            pid = snapshot['pid']
+            if pid == own_pid:
+                continue  # Our in-memory values are fresher than our file.
+            alive = _pid_alive(pid)
+            for name, dumped in snapshot['metrics'].items():
+                if name not in merged:
+                    continue
+                metric, samples = merged[name]
+                if metric.type == 'gauge' and not alive:
+                    continue
+                for labels, value in dumped:
+                    metric.merge_into(samples, tuple(labels), value)
+        return merged
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} is missing label {e}.") from None
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.samples().items()]
+
+    def _copy(self, value):
+        return value
+
+    def merge_into(self, samples, key, value):
+        samples[key] = samples.get(key, 0.0) + value
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        self._registry.check_pid()
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; summed across live processes."""
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        self._registry.check_pid()
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        self._registry.check_pid()
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        self._registry.check_pid()
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then the +Inf bucket, sum and count.
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _copy(self, value):
+        return list(value)
+
+    def merge_into(self, samples, key, value):
+        current = samples.get(key)
+        samples[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+
+
+# ==============================================================================
+# EXPOSITION
+# ==============================================================================
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def render(registry=REGISTRY):
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    for name, (metric, samples) in sorted(registry.collect().items()):
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.type}')
+        for key, value in sorted(samples.items()):
+            if metric.type != 'histogram':
+                lines.append(f'{name}{_format_labels(metric.labelnames, key)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (math.inf,), value):
+                cumulative += count
+                le = (('le', _format_value(bound)),)
+                lines.append(f'{name}_bucket{_format_labels(metric.labelnames, key, le)} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(metric.labelnames, key)} {_format_value(value[-2])}')
+            lines.append(f'{name}_count{_format_labels(metric.labelnames, key)} {_format_value(value[-1])}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Serves ``/metrics`` to scrapers sending ``Authorization: Bearer
+    <METRICS_TOKEN>``, and to staff users in a browser. Without a token only
+    staff get through, so a deployment that forgets to set one stays closed.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorization = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+        return HttpResponse(render(), content_type=CONTENT_TYPE)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return HttpResponse(render(), content_type=CONTENT_TYPE)
+    return HttpResponseForbidden()
+
+
+# ==============================================================================
+# HTTP AND DATABASE METRICS
+# ==============================================================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'poornimax_http_request_duration_seconds', "Time spent handling HTTP requests, by view.", ['view', 'method'],
+)
+HTTP_RESPONSES = Counter(
+    'poornimax_http_responses_total', "HTTP responses, by view and status code.", ['view', 'status'],
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    'poornimax_websocket_connections', "Open websocket connections, by consumer.", ['consumer'],
+)
+WEBSOCKET_CONNECTS = Counter(
+    'poornimax_websocket_connects_total', "Websocket connection attempts, by consumer and result.", ['consumer', 'result'],
+)
+DB_QUERIES = Counter('poornimax_db_queries_total', "SQL statements executed.", ['alias'])
+DB_QUERY_SECONDS = Histogram(
+    'poornimax_db_query_duration_seconds', "Time spent executing SQL statements.", ['alias'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+def _time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        alias = context['connection'].alias
+        DB_QUERIES.inc(alias=alias)
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, alias=alias)
+
+
+def _install(connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class MetricsMiddleware:
+    """Records request latency and response codes per resolved view name."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install, dispatch_uid='metrics_install')
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    def _record(self, request, response, started):
+        match = getattr(request, 'resolver_match', None)
+        # Unresolved paths share one label so 404 scans cannot blow up cardinality.
+        view = match.view_name if match else '<unresolved>'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, view=view, method=request.method)
+        HTTP_RESPONSES.inc(view=view, status=response.status_code)
+
+
+atexit.register(REGISTRY.flush_on_exit)
@@ -0,0 +1,7 @@
+"""
+PostgreSQL backend with a per-process connection pool.
+
+Use it as ``ENGINE: 'poornimax.postgresql_pool'`` (``build_databases`` in
+``poornimax.databases`` does so for Postgres URLs) and configure the pool
+with a top-level ``POOL`` key in the database settings; see ``pool.py``.
+"""
@@ -0,0 +1,99 @@
+"""
+Django's PostgreSQL backend, with connections borrowed from a per-process
+``ConnectionPool`` instead of opened and closed for every thread.
+
+``connect()`` takes a connection from the pool (opening one when the pool has
+room) and ``close()`` hands it back, rolled back if a transaction was left
+open. Keep ``CONN_MAX_AGE`` at 0 so every request and every
+``database_sync_to_async`` call returns its connection when it ends.
+"""
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+from .pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(alias, settings_dict):
+    """Returns the pool for ``alias`` in this process, creating it on first use."""
+    global _pools_pid
+    with _pools_lock:
+        if os.getpid() != _pools_pid:
+            # Connections inherited across fork() share sockets with the parent; drop them unclosed.
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(alias)
+        if pool is None:
+            try:
+                pool = ConnectionPool(alias, _is_healthy, _is_reusable, **settings_dict.get('POOL', {}))
+            except ValueError as e:
+                raise ImproperlyConfigured(f"DATABASES[{alias!r}]['POOL']: {e}")
+            _pools[alias] = pool
+        return pool
+
+
+def pools():
+    with _pools_lock:
+        return dict(_pools)
+
+
+def _is_healthy(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+        return True
+    except Exception:
+        return False
+
+
+def _is_reusable(connection):
+    """Leaves ``connection`` idle and reports whether it can go back in the pool."""
+    if connection.closed or getattr(connection, 'broken', False):
+        return False
+    if is_psycopg3:
+        status = connection.info.transaction_status
+        idle, unknown = base.Database.pq.TransactionStatus.IDLE, base.Database.pq.TransactionStatus.UNKNOWN
+    else:
+        from psycopg2 import extensions
+        status = connection.get_transaction_status()
+        idle, unknown = extensions.TRANSACTION_STATUS_IDLE, extensions.TRANSACTION_STATUS_UNKNOWN
+    if status == unknown:
+        return False
+    if status != idle:
+        try:
+            connection.rollback()
+        except Exception:
+            return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            # Surfaces as django.db.OperationalError through wrap_database_errors.
+            raise self.Database.OperationalError(str(e)) from e
+        # The parent sets this while opening a connection; a reused one skips that.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
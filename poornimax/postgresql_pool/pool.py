@@ -0,0 +1,235 @@
+"""
+A bounded, thread-safe pool of DB-API connections.
+
+Django opens one connection per thread. Under gunicorn that is one per
+worker, but under ASGI every ``database_sync_to_async`` call runs on an
+executor thread with its own connection, so a busy process can hold as many
+connections as it has threads. With this pool, a "closed" connection goes
+back to the pool instead of the server, and a process never holds more than
+``max_size`` connections. A thread that finds the pool exhausted waits up
+to ``timeout`` seconds and then fails with ``PoolTimeout``.
+
+Settings (``DATABASES[alias]['POOL']``):
+
+    min_size        connections kept open while idle (default 1)
+    max_size        upper bound per process (default 10)
+    timeout         seconds to wait for a free connection (default 10)
+    max_lifetime    seconds before a connection is replaced, so server-side
+                    memory and stale sessions are recycled (default 1800)
+    max_idle        seconds an idle connection above ``min_size`` is kept
+                    (default 300)
+    check_interval  idle seconds after which a connection is checked with
+                    ``SELECT 1`` before it is handed out (default 30)
+"""
+import logging
+import threading
+import time
+
+from poornimax.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'min_size': 1,
+    'max_size': 10,
+    'timeout': 10.0,
+    'max_lifetime': 1800.0,
+    'max_idle': 300.0,
+    'check_interval': 30.0,
+}
+
+POOL_CONNECTIONS = Gauge(
+    'poornimax_db_pool_connections', "Pooled database connections, by alias and state (idle, in_use).",
+    ['alias', 'state'],
+)
+POOL_WAITING = Gauge('poornimax_db_pool_waiting', "Threads waiting for a pooled connection.", ['alias'])
+POOL_CHECKOUTS = Counter(
+    'poornimax_db_pool_checkouts_total', "Connection checkouts, by alias and result (reused, created, timeout).",
+    ['alias', 'result'],
+)
+POOL_DISCARDS = Counter(
+    'poornimax_db_pool_discards_total',
+    "Connections closed by the pool, by alias and reason (broken, expired, idle, health_check).",
+    ['alias', 'reason'],
+)
+POOL_WAIT_SECONDS = Histogram(
+    'poornimax_db_pool_wait_seconds', "Time spent waiting for a pooled connection.", ['alias'],
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _Entry:
+    __slots__ = ('connection', 'created', 'returned')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.returned = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    ``getconn(connect)`` returns a connection, calling ``connect()`` when a new
+    one is needed; ``putconn(connection)`` hands it back. ``is_healthy`` and
+    ``is_reusable`` are driver-specific callbacks supplied by the backend.
+    """
+
+    def __init__(self, alias, is_healthy, is_reusable, **options):
+        unknown = set(options) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown POOL options: {', '.join(sorted(unknown))}.")
+        self.alias = alias
+        self.options = {**DEFAULTS, **options}
+        if not 0 <= self.options['min_size'] <= self.options['max_size'] or self.options['max_size'] < 1:
+            raise ValueError("POOL requires 0 <= min_size <= max_size and max_size >= 1.")
+        self._is_healthy = is_healthy
+        self._is_reusable = is_reusable
+        self._idle = []  # LIFO, so the warmest connections are reused and the rest age out.
+        self._in_use = {}
+        self._opening = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def stats(self):
+        with self._condition:
+            return {
+                'alias': self.alias,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'max_size': self.options['max_size'],
+            }
+
+    def getconn(self, connect):
+        started = time.monotonic()
+        deadline = started + self.options['timeout']
+        while True:
+            entry = None
+            with self._condition:
+                while not self._idle and self.size >= self.options['max_size']:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        POOL_CHECKOUTS.inc(alias=self.alias, result='timeout')
+                        raise PoolTimeout(
+                            f"No connection available in the {self.alias!r} pool after "
+                            f"{self.options['timeout']}s ({self.options['max_size']} in use)."
+                        )
+                    self._waiting += 1
+                    self._update_gauges()
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    entry = self._idle.pop()
+                    # Counted as in use while it is checked, so the pool cannot overfill meanwhile.
+                    self._in_use[id(entry.connection)] = entry
+                else:
+                    self._opening += 1
+                self._update_gauges()
+
+            if entry is None:
+                return self._open(connect, started)
+            reason = self._check(entry)
+            if reason is None:
+                POOL_CHECKOUTS.inc(alias=self.alias, result='reused')
+                POOL_WAIT_SECONDS.observe(time.monotonic() - started, alias=self.alias)
+                return entry.connection
+            self._discard(entry, reason)
+
+    def putconn(self, connection):
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Not ours (e.g. opened before a fork); just close it.
+            _close_quietly(connection)
+            return
+        now = time.monotonic()
+        if not self._is_reusable(connection):
+            self._discard(entry, 'broken')
+        elif now - entry.created > self.options['max_lifetime']:
+            self._discard(entry, 'expired')
+        else:
+            entry.returned = now
+            with self._condition:
+                self._idle.append(entry)
+                pruned = self._prune(now)
+                self._update_gauges()
+                self._condition.notify()
+            for connection in pruned:
+                _close_quietly(connection)
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._update_gauges()
+        for entry in idle:
+            _close_quietly(entry.connection)
+
+    def _open(self, connect, started):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._opening -= 1
+                self._update_gauges()
+                self._condition.notify()
+            raise
+        entry = _Entry(connection)
+        with self._condition:
+            self._opening -= 1
+            self._in_use[id(connection)] = entry
+            self._update_gauges()
+        POOL_CHECKOUTS.inc(alias=self.alias, result='created')
+        POOL_WAIT_SECONDS.observe(time.monotonic() - started, alias=self.alias)
+        return connection
+
+    def _check(self, entry):
+        """Returns why ``entry`` cannot be handed out, or ``None``."""
+        now = time.monotonic()
+        if now - entry.created > self.options['max_lifetime']:
+            return 'expired'
+        if now - entry.returned > self.options['check_interval'] and not self._is_healthy(entry.connection):
+            return 'health_check'
+        return None
+
+    def _discard(self, entry, reason):
+        POOL_DISCARDS.inc(alias=self.alias, reason=reason)
+        logger.debug("Discarding pooled connection", extra={'alias': self.alias, 'reason': reason})
+        _close_quietly(entry.connection)
+        with self._condition:
+            self._in_use.pop(id(entry.connection), None)
+            self._update_gauges()
+            self._condition.notify()
+
+    def _prune(self, now):
+        """
+        Removes connections idle for longer than ``max_idle`` beyond
+        ``min_size`` and returns them for closing. Holds the lock.
+        """
+        pruned = []
+        # The oldest returns sit at the bottom of the LIFO stack.
+        while len(self._idle) > self.options['min_size'] and now - self._idle[0].returned > self.options['max_idle']:
+            pruned.append(self._idle.pop(0).connection)
+            POOL_DISCARDS.inc(alias=self.alias, reason='idle')
+        return pruned
+
+    def _update_gauges(self):
+        """Holds the lock."""
+        POOL_CONNECTIONS.set(len(self._idle), alias=self.alias, state='idle')
+        POOL_CONNECTIONS.set(len(self._in_use) + self._opening, alias=self.alias, state='in_use')
+        POOL_WAITING.set(self._waiting, alias=self.alias)
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
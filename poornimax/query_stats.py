@@ -0,0 +1,233 @@
+"""
+Sampled per-view SQL instrumentation.
+
+``QueryStatsMiddleware`` records, for a sample of requests, the number of
+queries, total DB time, view time and the slowest statement (as a literal-
+free fingerprint) under the resolved view name. Aggregates are kept as
+fixed-bucket histograms per process and served as JSON to staff users at
+``/admin/query-stats/``. Requests that exceed their view's query budget
+are logged on the ``poornimax.query_stats`` logger.
+
+Settings:
+    QUERY_STATS_SAMPLE_RATE     Share of requests to record (0 disables the
+                                middleware entirely, 1 records everything).
+    QUERY_STATS_DEFAULT_BUDGET  Query budget for views without their own.
+    QUERY_STATS_BUDGETS         {view_name: max_queries}, e.g. {'feed:home': 20}.
+
+Queries are captured with a connection execute wrapper that reads the
+current request's collector from a context variable, so it also sees the
+queries async views run through ``sync_to_async`` threads and costs a single
+lookup when no request is being sampled.
+"""
+import bisect
+import logging
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+
+logger = logging.getLogger('poornimax.query_stats')
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_collector = ContextVar('query_stats_collector', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+_COLUMNS_RE = re.compile(r'^SELECT (DISTINCT )?.+? FROM ', re.DOTALL)
+
+
+def fingerprint(sql):
+    """Strips literals, column lists and IN lists so repeated statements group together."""
+    sql = _COLUMNS_RE.sub(r'SELECT \1... FROM ', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class _Collector:
+    __slots__ = ('count', 'db_ms', 'slowest_ms', 'slowest_sql')
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ''
+
+
+def _record_query(execute, sql, params, many, context):
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        collector.count += 1
+        collector.db_ms += elapsed
+        if elapsed > collector.slowest_ms:
+            collector.slowest_ms = elapsed
+            collector.slowest_sql = sql
+
+
+def _install(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds] + [f'>{self.bounds[-1]}']
+        return {'buckets': dict(zip(labels, self.counts)), 'sum': round(self.total, 3)}
+
+
+class _ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.db_ms = _Histogram(TIME_BUCKETS_MS)
+        self.view_ms = _Histogram(TIME_BUCKETS_MS)
+        self.max_queries = 0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ''
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'over_budget': self.over_budget,
+            'max_queries': self.max_queries,
+            'queries': self.queries.as_dict(),
+            'db_ms': self.db_ms.as_dict(),
+            'view_ms': self.view_ms.as_dict(),
+            'slowest_query': {'ms': round(self.slowest_ms, 3), 'sql': self.slowest_sql},
+        }
+
+
+class QueryStats:
+    """Thread-safe per-view aggregates for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, collector, view_ms, over_budget):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = _ViewStats()
+            stats.requests += 1
+            stats.over_budget += over_budget
+            stats.queries.observe(collector.count)
+            stats.db_ms.observe(collector.db_ms)
+            stats.view_ms.observe(view_ms)
+            stats.max_queries = max(stats.max_queries, collector.count)
+            if collector.slowest_ms > stats.slowest_ms:
+                stats.slowest_ms = collector.slowest_ms
+                stats.slowest_sql = fingerprint(collector.slowest_sql)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+stats = QueryStats()
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'QUERY_STATS_SAMPLE_RATE', 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.default_budget = getattr(settings, 'QUERY_STATS_DEFAULT_BUDGET', None)
+        self.budgets = getattr(settings, 'QUERY_STATS_BUDGETS', {})
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(_install, dispatch_uid='query_stats_install')
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        collector, token, started = self._start()
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(request, collector, token, started)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        collector, token, started = self._start()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(request, collector, token, started)
+
+    def _start(self):
+        collector = _Collector()
+        return collector, _collector.set(collector), time.perf_counter()
+
+    def _finish(self, request, collector, token, started):
+        view_ms = (time.perf_counter() - started) * 1000
+        _collector.reset(token)
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return
+        view_name = match.view_name
+        budget = self.budgets.get(view_name, self.default_budget)
+        over_budget = budget is not None and collector.count > budget
+        if over_budget:
+            logger.warning(
+                "%s ran %d queries (budget %d) in %.1f ms, %.1f ms in the DB; slowest: %s",
+                view_name, collector.count, budget, view_ms, collector.db_ms,
+                fingerprint(collector.slowest_sql),
+                extra={'view_name': view_name, 'queries': collector.count, 'path': request.path},
+            )
+        stats.add(view_name, collector, view_ms, over_budget)
+
+
+@staff_member_required
+def query_stats_view(request):
+    """Per-view query histograms for this worker process; POST resets them."""
+    if request.method == 'POST':
+        stats.reset()
+    return JsonResponse({
+        'sample_rate': getattr(settings, 'QUERY_STATS_SAMPLE_RATE', 0),
+        'views': stats.snapshot(),
+    })
@@ -0,0 +1,145 @@
+"""
+Read-replica routing.
+
+Reads go to the ``replica`` database alias (see ``poornimax.databases``)
+only inside views decorated with ``use_replica`` or blocks wrapped in
+``replica_reads()``; everything else, and every write, uses ``default``:
+
+    @login_required
+    @use_replica
+    def inbox_view(request):
+        ...
+
+Replicas lag behind the primary, so a user who has just written is pinned
+to the primary: ``ReplicaPinMiddleware`` sets a short-lived cookie on the
+response to any POST/PUT/PATCH/DELETE, and requests carrying it read from
+``default`` for ``REPLICA_STICKY_SECONDS`` (default 5). Within one request,
+reads also switch back to ``default`` once anything has been written, and
+inside ``atomic()`` blocks.
+
+Settings:
+    REPLICA_STICKY_SECONDS  Seconds to keep reading from the primary after a write.
+    REPLICA_PIN_COOKIE      Name of the pinning cookie (default ``db_primary``).
+
+Without a ``replica`` alias the decorator, router and middleware do nothing.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .databases import REPLICA_ALIAS
+from .metrics import Counter
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+REPLICA_READS = Counter(
+    'poornimax_db_replica_reads_total', "Reads in replica-enabled code, by the alias they went to.", ['alias'],
+)
+
+_reads = ContextVar('replica_reads', default=None)
+
+
+class _ReadState:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pin_cookie_name():
+    return getattr(settings, 'REPLICA_PIN_COOKIE', 'db_primary')
+
+
+def is_pinned(request):
+    return pin_cookie_name() in request.COOKIES
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Sends reads inside the block to the replica, unless ``pinned``."""
+    token = _reads.set(_ReadState(pinned))
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+def use_replica(view_func):
+    """Lets a read-only view (sync or async) read from the replica."""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            with replica_reads(pinned=is_pinned(request)):
+                return await view_func(request, *args, **kwargs)
+    else:
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            with replica_reads(pinned=is_pinned(request)):
+                return view_func(request, *args, **kwargs)
+
+    return _wrapped_view
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _reads.get()
+        if state is None or not replica_configured():
+            return None
+        if state.pinned or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            REPLICA_READS.inc(alias=DEFAULT_DB_ALIAS)
+            return DEFAULT_DB_ALIAS
+        REPLICA_READS.inc(alias=REPLICA_ALIAS)
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _reads.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_ALIAS}:
+            return True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Pins a client to the primary for a few seconds after it sends a write."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._pin(request, await self.get_response(request))
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                pin_cookie_name(), '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax',
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
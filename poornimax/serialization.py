@@ -0,0 +1,140 @@
+"""
+Shared JSON serialization for the API views.
+
+* ``Schema`` declares the fields of a payload once (attribute paths, computed
+  values, nested schemas) and compiles them into plain getters, so building
+  a dict per row is a loop over prepared callables instead of hand-written
+  dict literals repeated across views.
+* ``dumps`` encodes with orjson when it is installed and falls back to the
+  stdlib encoder otherwise; both accept everything ``DjangoJSONEncoder`` does
+  and return UTF-8 bytes.
+* ``stream_json`` encodes a large list in chunks for a
+  ``StreamingJsonResponse``, so the whole payload is never held in memory
+  (the chat export, ``chat.views.export_chat``).
+
+Schemas for the app models live in each app's ``serializers`` module.
+"""
+import json
+from operator import attrgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib encoder is used without it.
+    orjson = None
+
+ENCODER = 'orjson' if orjson is not None else 'json'
+
+_django_default = DjangoJSONEncoder().default
+
+
+def dumps(data):
+    """Encodes ``data`` to JSON bytes with the fastest available encoder."""
+    if orjson is not None:
+        # Datetimes go through DjangoJSONEncoder too, so both encoders agree.
+        return orjson.dumps(
+            data, default=_django_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return stdlib_dumps(data)
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+# ==============================================================================
+# SCHEMAS
+# ==============================================================================
+
+def _compile(spec):
+    if isinstance(spec, str):
+        get = attrgetter(spec)
+        return lambda obj, context: get(obj)
+    if isinstance(spec, tuple):
+        path, schema = spec
+        get = attrgetter(path)
+
+        def nested(obj, context):
+            value = get(obj)
+            return None if value is None else schema(value, **context)
+        return nested
+    if callable(spec):
+        return spec
+    raise TypeError(f"Unsupported schema field {spec!r}; expected a path, a callable or (path, Schema).")
+
+
+class Schema:
+    """
+    Serializes an object to a dict. Each keyword names an output field:
+
+        'user.username'         dotted attribute lookup
+        func(obj, context)      computed value; ``context`` holds the keyword
+                                arguments the schema was called with
+        ('user', OTHER_SCHEMA)  nested schema applied to an attribute
+                                (``None`` stays ``None``)
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self._getters = [(name, _compile(spec)) for name, spec in fields.items()]
+
+    def __call__(self, obj, **context):
+        return {name: get(obj, context) for name, get in self._getters}
+
+    def many(self, objs, **context):
+        return [self(obj, **context) for obj in objs]
+
+    def extend(self, **fields):
+        """Returns a new schema with ``fields`` added or replaced."""
+        return Schema(**{**self.fields, **fields})
+
+
+# ==============================================================================
+# RESPONSES
+# ==============================================================================
+
+class FastJsonResponse(HttpResponse):
+    """``JsonResponse`` encoded with ``dumps``."""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+
+def _envelope(key, extra):
+    head = dumps(extra or {})[:-1]
+    return head + (b',' if len(head) > 1 else b'') + dumps(key) + b':['
+
+
+def _encode_chunk(chunk, first):
+    return (b'' if first else b',') + dumps(chunk)[1:-1]
+
+
+def stream_json(items, schema=None, key='items', extra=None, chunk_size=200, **context):
+    """
+    Yields ``{**extra, key: [items...]}`` as JSON byte chunks, encoding
+    ``chunk_size`` items at a time. ``schema`` is applied to each item.
+    """
+    yield _envelope(key, extra)
+    first, chunk = True, []
+    for item in items:
+        chunk.append(schema(item, **context) if schema else item)
+        if len(chunk) >= chunk_size:
+            yield _encode_chunk(chunk, first)
+            first, chunk = False, []
+    if chunk:
+        yield _encode_chunk(chunk, first)
+    yield b']}'
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """Streams the chunks of ``stream_json``."""
+
+    def __init__(self, chunks, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(chunks, **kwargs)
@@ -6,6 +6,11 @@ import os
 from pathlib import Path
 from django.core.management.utils import get_random_secret_key
 
+from .caches import build_caches
+from .channel_layers import build_channel_layers
+from .databases import build_databases
+from .structured_logging import build_logging
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,11 +42,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this for static files
+    'poornimax.structured_logging.RequestIdMiddleware',  # X-Request-ID + per-request debug log sampling
+    'poornimax.metrics.MetricsMiddleware',  # Request latency/status per view for /metrics
+    'poornimax.query_stats.QueryStatsMiddleware',  # Sampled per-view query stats; off unless QUERY_STATS_SAMPLE_RATE > 0
+    'poornimax.replicas.ReplicaPinMiddleware',  # Read-your-writes after a POST; off without a replica database
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'feed.scoring.ScoringModelMiddleware',  # Per-request compatibility model / A/B arm; off with one model and no experiment
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -66,13 +76,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'poornimax.wsgi.application'
 ASGI_APPLICATION = 'poornimax.asgi.application'
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database: SQLite unless DATABASE_URL is set; Postgres URLs get a connection pool
+DATABASES = build_databases(sqlite_path=BASE_DIR / 'db.sqlite3')
+
+# Views decorated with poornimax.replicas.use_replica read from DATABASES['replica']
+# when it exists; clients stay on the primary for this long after a write.
+DATABASE_ROUTERS = ['poornimax.replicas.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+# Serialize hot writes (chat messages) through one writer thread per process;
+# see poornimax/write_queue.py. Worth it for SQLite's single writer lock only.
+DB_WRITE_QUEUE = os.environ.get(
+    'DB_WRITE_QUEUE', 'on' if 'sqlite' in DATABASES['default']['ENGINE'] else 'off'
+).strip().lower() == 'on'
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -107,18 +123,91 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are saved under content-hashed names and served by poornimax/media.py.
+# Set MEDIA_ACCEL_REDIRECT (nginx internal location) or MEDIA_SENDFILE_HEADER
+# (e.g. X-Sendfile) to hand the file transfer to the front server.
+STORAGES = {
+    'default': {'BACKEND': 'poornimax.media.HashedMediaStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER', '')
+# Browser cache lifetime for media uploaded before names were hashed.
+MEDIA_CACHE_SECONDS = int(os.environ.get('MEDIA_CACHE_SECONDS', '3600'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Logging: JSON lines with request ids (see poornimax/structured_logging.py).
+# LOG_LEVEL / LOG_LEVELS set root and per-logger levels; DEBUG records are
+# only kept for LOG_DEBUG_SAMPLE_RATE of requests.
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '1' if DEBUG else '0.01'))
+LOGGING = build_logging(debug=DEBUG, debug_sample_rate=LOG_DEBUG_SAMPLE_RATE)
+
+# Per-view query instrumentation (see poornimax/query_stats.py).
+# Histograms are served to staff at /admin/query-stats/.
+QUERY_STATS_SAMPLE_RATE = float(os.environ.get('QUERY_STATS_SAMPLE_RATE', '0'))
+QUERY_STATS_DEFAULT_BUDGET = int(os.environ.get('QUERY_STATS_DEFAULT_BUDGET', '50'))
+QUERY_STATS_BUDGETS = {
+    # Views with known per-row lookups; requests above these are logged.
+    'feed:home': 20,
+    'feed:get_post_data': 10,
+    'feed:lazy_load_same_year': 15,
+    'feed:lazy_load_same_department': 15,
+    'feed:lazy_load_same_college': 15,
+    'feed:lazy_load_recently_joined': 15,
+    'chat:delete_chat': 10,
+}
+
+# Metrics served at /metrics (see poornimax/metrics.py). METRICS_DIR must be a
+# directory shared by all worker processes on the host for multi-worker totals;
+# scrapers must send METRICS_TOKEN as a Bearer token. Without a token only
+# logged-in staff can read /metrics; set one in production.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Channels configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+# Selected explicitly with CHANNEL_LAYER (memory / redis / redis-pubsub);
+# see poornimax/channel_layers.py. Defaults to Redis whenever REDIS_URL(S) is set.
+CHANNEL_LAYERS = build_channel_layers()
+
+# Chat messages older than this move to the archive table (manage.py archive_messages).
+CHAT_ARCHIVE_AFTER_DAYS = int(os.environ.get('CHAT_ARCHIVE_AFTER_DAYS', 180))
+
+# Profile visits are buffered in memory and upserted in batches this often, or
+# once this many viewer/viewed pairs are waiting (accounts/profile_views.py).
+PROFILE_VIEW_FLUSH_SECONDS = float(os.environ.get('PROFILE_VIEW_FLUSH_SECONDS', 5))
+PROFILE_VIEW_BUFFER_SIZE = int(os.environ.get('PROFILE_VIEW_BUFFER_SIZE', 1000))
+# Hourly view rollups are folded into daily ones after this many days, and
+# daily ones dropped after this many (0 keeps them; manage.py compact_profile_views).
+PROFILE_VIEW_HOURLY_DAYS = int(os.environ.get('PROFILE_VIEW_HOURLY_DAYS', 7))
+PROFILE_VIEW_DAILY_DAYS = int(os.environ.get('PROFILE_VIEW_DAILY_DAYS', 365))
+
+# Compatibility scoring models (see feed/scoring.py), configured like CACHES.
+# COMPATIBILITY_MODEL scores everyone unless COMPATIBILITY_EXPERIMENT splits
+# users between models by share, e.g. "rules:90,hobbies_heavy:10"; staff can
+# try any model on a page with ?scoring_model=<name>.
+COMPATIBILITY_MODELS = {
+    'rules': {'BACKEND': 'feed.compatibility.RulesModel'},
+    'hobbies_heavy': {
+        'BACKEND': 'feed.compatibility.RulesModel',
+        'OPTIONS': {'intent_weight': 40, 'personality_weight': 20, 'hobbies_weight': 40},
     },
 }
+COMPATIBILITY_MODEL = os.environ.get('COMPATIBILITY_MODEL', 'rules')
+COMPATIBILITY_EXPERIMENT = os.environ.get('COMPATIBILITY_EXPERIMENT', '')
+
+# Cache: Redis whenever REDIS_URL(S) is set, else per-process memory
+# (see poornimax/caches.py). Holds the feed JSON responses and their version
+# counters (see feed/caching.py), which must be shared by all workers.
+CACHES = build_caches()
+FEED_CACHE_TIMEOUT = int(os.environ.get('FEED_CACHE_TIMEOUT', '60'))
+# {% cache %} blocks on the home, profile and landing pages (see feed/caching.py).
+# Off under DEBUG so template edits show up immediately.
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', '0' if DEBUG else '300'))
 
 # Render.com specific settings
 import os
@@ -127,26 +216,10 @@ if os.environ.get('RENDER'):
     ALLOWED_HOSTS = ['*']
     DEBUG = False
     
-    # Database configuration for Render
-    import dj_database_url
-    DATABASES = {
-        'default': dj_database_url.config(
-            default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
-            conn_health_checks=True,
-        )
-    }
-    
     # Redis configuration for Render
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
-    CHANNEL_LAYERS = {
-        'default': {
-            'BACKEND': 'channels_redis.core.RedisChannelLayer',
-            'CONFIG': {
-                'hosts': [REDIS_URL],
-            },
-        },
-    }
+    CHANNEL_LAYERS = build_channel_layers(default_redis_url=REDIS_URL)
+    CACHES = build_caches(default_redis_url=REDIS_URL)
 
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
@@ -186,8 +259,9 @@ if not DEBUG:
     SECURE_CONTENT_TYPE_NOSNIFF = True
     X_FRAME_OPTIONS = 'DENY'
     
-    # Static and Media files in production
-    STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    # Hashed, precompressed static files served as immutable (see poornimax/staticfiles.py).
+    # Requires collectstatic, which build.sh runs.
+    STORAGES['staticfiles'] = {'BACKEND': 'poornimax.staticfiles.StaticStorage'}
 else:
     # Development settings
     SECURE_SSL_REDIRECT = False
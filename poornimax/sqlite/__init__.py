@@ -0,0 +1,7 @@
+"""
+SQLite backend that applies PRAGMAs to every new connection.
+
+Use it as ``ENGINE: 'poornimax.sqlite'`` (``build_databases`` in
+``poornimax.databases`` does so for the local database file) with a
+top-level ``PRAGMAS`` dict in the database settings.
+"""
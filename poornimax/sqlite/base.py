@@ -0,0 +1,52 @@
+"""
+Django's SQLite backend, with ``settings_dict['PRAGMAS']`` run on every new
+connection, e.g.::
+
+    'PRAGMAS': {'journal_mode': 'WAL', 'busy_timeout': 5000, 'synchronous': 'NORMAL'}
+
+See ``poornimax.databases.SQLITE_PRAGMAS`` for the defaults and why.
+
+``transaction_mode`` (``settings_dict['TRANSACTION_MODE']``, or set on a
+thread's connection) picks how ``atomic()`` begins: ``None`` for SQLite's
+deferred ``BEGIN``, ``'IMMEDIATE'`` or ``'EXCLUSIVE'``, as Django 5.1's
+``OPTIONS['transaction_mode']`` does. A deferred transaction that reads
+before it writes cannot become the writer once another process has
+committed in between; it fails with "database is locked" whatever the
+``busy_timeout``. ``BEGIN IMMEDIATE`` takes the write lock up front, waiting
+for it under ``busy_timeout`` instead.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+_NAME_RE = re.compile(r'^[a-z_]+$')
+_VALUE_RE = re.compile(r'^-?\w+$')
+TRANSACTION_MODES = (None, 'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def pragma_statements(pragmas):
+    """Validates ``pragmas`` and returns the ``PRAGMA name = value`` statements."""
+    statements = []
+    for name, value in pragmas.items():
+        if not _NAME_RE.match(name) or not _VALUE_RE.match(str(value)):
+            raise ImproperlyConfigured(f"Invalid SQLite PRAGMA {name!r} = {value!r}.")
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        self.transaction_mode = settings_dict.get('TRANSACTION_MODE')
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in pragma_statements(self.settings_dict.get('PRAGMAS', {})):
+            conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f"Invalid SQLite transaction mode {self.transaction_mode!r}.")
+        self.cursor().execute(f'BEGIN {self.transaction_mode}' if self.transaction_mode else 'BEGIN')
@@ -0,0 +1,25 @@
+"""
+Static file storage for production.
+
+``collectstatic`` writes every asset under a content-hashed name plus
+``.gz`` and ``.br`` (with the Brotli package) variants. WhiteNoise serves the
+hashed names with ``Cache-Control: max-age=315360000, immutable``, so a
+browser fetches each version of a bundle once.
+
+Some templates reference images that are not in the repository. Django's
+manifest storage raises for those at render time, which turns a missing
+image into a failed page. This storage keeps the unhashed URL instead, so
+the image 404s as it did before.
+"""
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # The file does not exist; leave the reference as it was written.
+            return name
@@ -0,0 +1,219 @@
+"""
+Structured logging for the poornimax project.
+
+* ``JsonFormatter`` writes one JSON object per line, including any ``extra``
+  fields passed to the logging call.
+* ``RequestIdMiddleware`` tags every request with an id (taken from an
+  incoming ``X-Request-ID`` header or generated) that ``RequestContextFilter``
+  adds to each record, and echoes it back in the response.
+* Debug output is sampled per request: ``LOG_DEBUG_SAMPLE_RATE`` of requests
+  emit their DEBUG records, the rest drop them, so debug logging can stay
+  enabled in production without flooding the log. ``debug_span`` times a
+  block and logs it as a single DEBUG record.
+
+Configuration comes from the environment through ``build_logging``:
+
+    LOG_LEVEL=INFO                          Root level.
+    LOG_LEVELS=feed.views=DEBUG,django.db=WARNING
+                                            Per-logger levels.
+    LOG_FORMAT=json|text                    json unless DEBUG is on.
+    LOG_DEBUG_SAMPLE_RATE=0.01              Share of requests whose DEBUG
+                                            records are kept.
+
+Call sites should pass values as logging arguments or ``extra`` fields and
+guard anything expensive with ``debug_enabled(logger)``, which is false both
+when the level is off and when the current request was not sampled.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import ImproperlyConfigured
+
+_request_id = ContextVar('log_request_id', default=None)
+_debug_sampled = ContextVar('log_debug_sampled', default=None)
+
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``.
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+def debug_enabled(logger):
+    """True if a DEBUG record from ``logger`` would be kept for the current request."""
+    return logger.isEnabledFor(logging.DEBUG) and _debug_sampled.get() is not False
+
+
+# ==============================================================================
+# FILTERS AND FORMATTER
+# ==============================================================================
+
+class RequestContextFilter(logging.Filter):
+    """Adds ``request_id`` to every record and drops DEBUG records of unsampled requests."""
+
+    def __init__(self, sample_rate=1.0):
+        super().__init__()
+        self.sample_rate = float(sample_rate)
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        if record.levelno > logging.DEBUG:
+            return True
+        sampled = _debug_sampled.get()
+        if sampled is None:
+            # Outside a request (commands, consumers) sample each record on its own.
+            return random.random() < self.sample_rate
+        return sampled
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# ==============================================================================
+# REQUEST IDS
+# ==============================================================================
+
+class RequestIdMiddleware:
+    """Binds a request id and the debug-sampling decision for the duration of the request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'LOG_DEBUG_SAMPLE_RATE', 1.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self._bind(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._unbind(tokens)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        tokens = self._bind(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._unbind(tokens)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    def _bind(self, request):
+        incoming = request.headers.get('X-Request-ID', '')
+        request.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        return (
+            _request_id.set(request.request_id),
+            _debug_sampled.set(random.random() < self.sample_rate),
+        )
+
+    def _unbind(self, tokens):
+        _request_id.reset(tokens[0])
+        _debug_sampled.reset(tokens[1])
+
+
+@contextmanager
+def debug_span(logger, name, **fields):
+    """
+    Times the block and logs it as one DEBUG record with ``duration_ms`` and
+    ``fields``. The body can add fields to the yielded dict. Costs one check
+    when DEBUG is off for ``logger`` or the request was not sampled.
+    """
+    if not debug_enabled(logger):
+        yield fields
+        return
+    started = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        fields['duration_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        logger.debug(name, extra={'span': name, **fields})
+
+
+# ==============================================================================
+# SETTINGS
+# ==============================================================================
+
+def _parse_levels(raw):
+    levels = {}
+    for item in raw.split(','):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition('=')
+        level = level.strip().upper()
+        if not sep or level not in logging.getLevelNamesMapping():
+            raise ImproperlyConfigured(f"Invalid LOG_LEVELS entry {item!r}; expected logger=LEVEL.")
+        levels[name.strip()] = level
+    return levels
+
+
+def build_logging(environ=os.environ, debug=False, debug_sample_rate=1.0):
+    """Builds the ``LOGGING`` setting from the environment."""
+    level = environ.get('LOG_LEVEL', 'INFO').upper()
+    if level not in logging.getLevelNamesMapping():
+        raise ImproperlyConfigured(f"Invalid LOG_LEVEL {level!r}.")
+    log_format = environ.get('LOG_FORMAT', 'text' if debug else 'json').lower()
+    if log_format not in ('json', 'text'):
+        raise ImproperlyConfigured(f"LOG_FORMAT must be 'json' or 'text', not {log_format!r}.")
+
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'filters': {
+            'request_context': {
+                '()': 'poornimax.structured_logging.RequestContextFilter',
+                'sample_rate': debug_sample_rate,
+            },
+        },
+        'formatters': {
+            'json': {'()': 'poornimax.structured_logging.JsonFormatter'},
+            'text': {'format': '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'},
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'filters': ['request_context'],
+                'formatter': log_format,
+            },
+        },
+        'root': {'handlers': ['console'], 'level': level},
+        'loggers': {
+            name: {'level': logger_level}
+            for name, logger_level in _parse_levels(environ.get('LOG_LEVELS', '')).items()
+        },
+    }
@@ -0,0 +1,369 @@
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.utils import ConnectionHandler, OperationalError
+from django.http import Http404
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Crush
+from chat.archive import archive_batch
+from chat.models import Message
+from feed.models import Post
+from poornimax.channel_layers import MEMORY_BACKEND, REDIS_BACKENDS, build_channel_layers
+from poornimax.columnar_export import ColumnarExporter
+from poornimax.databases import REPLICA_ALIAS
+from poornimax.media import HashedMediaStorage, is_hashed, serve_media
+from poornimax.metrics import Counter, Gauge, Histogram, Registry, metrics_view, render
+from poornimax.replicas import pin_cookie_name, replica_reads
+from poornimax.serialization import Schema, dumps, stream_json
+from poornimax.write_queue import WriteQueue
+
+try:
+    import pyarrow.dataset
+except ImportError:  # Optional, like the export itself.
+    pyarrow = None
+
+# Another process (gunicorn worker) writing to the same database file.
+OTHER_WRITER = """
+import sqlite3, sys
+db = sqlite3.connect(sys.argv[1], timeout=0.2, isolation_level=None)
+db.execute("INSERT INTO hits VALUES ('other')")
+"""
+
+
+class SqliteTransactionModeTests(SimpleTestCase):
+    """A transaction that reads before it writes while another process commits in between."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = str(Path(directory) / 'db.sqlite3')
+        db = sqlite3.connect(self.path, isolation_level=None)
+        db.execute('PRAGMA journal_mode = WAL')
+        db.execute('CREATE TABLE hits (source TEXT)')
+        db.close()
+
+    def _read_then_write(self, mode):
+        """Returns the other process's exit code and the error of our write, if any."""
+        connections = ConnectionHandler({'default': {
+            'ENGINE': 'poornimax.sqlite',
+            'NAME': self.path,
+            'PRAGMAS': {'journal_mode': 'WAL', 'busy_timeout': 200},
+            'TRANSACTION_MODE': mode,
+        }})
+        conn = connections['default']
+        try:
+            conn._start_transaction_under_autocommit()  # what atomic() runs
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM hits')
+            other = subprocess.run([sys.executable, '-c', OTHER_WRITER, self.path], capture_output=True, timeout=60)
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("INSERT INTO hits VALUES ('queued')")
+                    cursor.execute('COMMIT')
+            except OperationalError as e:
+                conn.cursor().execute('ROLLBACK')
+                return other.returncode, e
+            return other.returncode, None
+        finally:
+            conn.close()
+
+    def _sources(self):
+        db = sqlite3.connect(self.path)
+        try:
+            return sorted(source for source, in db.execute('SELECT source FROM hits'))
+        finally:
+            db.close()
+
+    def test_deferred_transaction_loses_its_write(self):
+        returncode, error = self._read_then_write(None)
+        self.assertEqual(returncode, 0)
+        self.assertIn('locked', str(error))
+        self.assertEqual(self._sources(), ['other'])
+
+    def test_immediate_transaction_keeps_the_write_lock(self):
+        returncode, error = self._read_then_write('IMMEDIATE')
+        self.assertNotEqual(returncode, 0)  # the other writer waited out its timeout instead
+        self.assertIsNone(error)
+        self.assertEqual(self._sources(), ['queued'])
+
+
+class WriteQueueTests(TransactionTestCase):
+    def test_writer_batches_begin_immediate(self):
+        queue = WriteQueue()
+        try:
+            state = queue.submit(lambda: (connection.transaction_mode, connection.in_atomic_block)).result(timeout=10)
+        finally:
+            queue.stop()
+        self.assertEqual(state, ('IMMEDIATE', True))
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing against a second SQLite file that holds a copy of the primary."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # connections reads the same dict as settings.DATABASES.
+        settings.DATABASES[REPLICA_ALIAS] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict, 'NAME': str(Path(directory) / 'replica.sqlite3'),
+        }
+        self.addCleanup(settings.DATABASES.pop, REPLICA_ALIAS)
+        self.addCleanup(connections.__delitem__, REPLICA_ALIAS)
+        self.addCleanup(lambda: connections[REPLICA_ALIAS].close())
+        User = get_user_model()
+        self.user, self.other = (
+            User.objects.create(username=name, college_email=f'{name}@poornima.org') for name in ('alice', 'bob')
+        )
+        self._sync()
+
+    def _sync(self):
+        """Copies the primary into the replica file, as check_replica_routing --sync does."""
+        replica = sqlite3.connect(settings.DATABASES[REPLICA_ALIAS]['NAME'])
+        try:
+            connections[DEFAULT_DB_ALIAS].ensure_connection()
+            connections[DEFAULT_DB_ALIAS].connection.backup(replica)
+        finally:
+            replica.close()
+
+    def _usernames(self):
+        return set(get_user_model().objects.values_list('username', flat=True))
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self):
+        get_user_model().objects.create(username='carol', college_email='carol@poornima.org')  # not replicated yet
+        self.assertEqual(self._usernames(), {'alice', 'bob', 'carol'})
+        with replica_reads():
+            self.assertEqual(self._usernames(), {'alice', 'bob'})
+            Message.objects.create(sender=self.user, receiver=self.other, content='hi')
+            # Read-your-writes: the rest of the block reads the primary.
+            self.assertEqual(self._usernames(), {'alice', 'bob', 'carol'})
+        self.assertEqual(Message.objects.count(), 1)
+        with replica_reads(pinned=True):
+            self.assertEqual(self._usernames(), {'alice', 'bob', 'carol'})
+
+    def test_pin_cookie_reads_from_the_primary_after_a_write(self):
+        with self.settings(SECURE_SSL_REDIRECT=False):
+            client = Client()
+            client.force_login(self.user)
+            url = reverse('chat:inbox_unread_status')
+
+            def queries():
+                with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                        CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+                    self.assertEqual(client.get(url).status_code, 200)
+                return len(primary), len(replica)
+
+            self.assertGreater(queries()[1], 0)
+            client.post(url)  # any write request pins the client
+            self.assertIn(pin_cookie_name(), client.cookies)
+            primary, replica = queries()
+            self.assertGreater(primary, 0)
+            self.assertEqual(replica, 0)
+
+
+class ChannelLayerSelectionTests(SimpleTestCase):
+    def test_memory_without_redis(self):
+        self.assertEqual(build_channel_layers({}), {'default': {'BACKEND': MEMORY_BACKEND}})
+        self.assertEqual(build_channel_layers({'CHANNEL_LAYER': 'memory', 'REDIS_URL': 'redis://cache:6379'}),
+                         {'default': {'BACKEND': MEMORY_BACKEND}})
+
+    def test_redis_is_the_default_with_a_redis_url(self):
+        layer = build_channel_layers({'REDIS_URL': 'redis://cache:6379'})['default']
+        self.assertEqual(layer['BACKEND'], REDIS_BACKENDS['redis'])
+        self.assertEqual(layer['CONFIG']['hosts'], ['redis://cache:6379'])
+        self.assertEqual(layer['CONFIG']['capacity'], 1000)
+        self.assertEqual(build_channel_layers({}, default_redis_url='redis://render:6379')['default']['BACKEND'],
+                         REDIS_BACKENDS['redis'])
+
+    def test_pubsub_shards_over_every_redis_url(self):
+        layer = build_channel_layers({
+            'CHANNEL_LAYER': 'Redis-PubSub', 'REDIS_URLS': 'redis://a:6379, redis://b:6379,', 'REDIS_URL': 'redis://c:6379',
+        })['default']
+        self.assertEqual(layer['BACKEND'], REDIS_BACKENDS['redis-pubsub'])
+        self.assertEqual(layer['CONFIG'], {'hosts': ['redis://a:6379', 'redis://b:6379'], 'prefix': 'poornimax'})
+
+    def test_bad_configurations_are_rejected(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "Unknown CHANNEL_LAYER 'rabbitmq'"):
+            build_channel_layers({'CHANNEL_LAYER': 'rabbitmq', 'REDIS_URL': 'redis://cache:6379'})
+        with self.assertRaisesMessage(ImproperlyConfigured, "requires REDIS_URL or REDIS_URLS"):
+            build_channel_layers({'CHANNEL_LAYER': 'redis'})
+
+
+class StreamJsonTests(SimpleTestCase):
+    def test_chunks_join_into_the_full_payload(self):
+        schema = Schema(n='real', double=lambda number, context: number * context['factor'])
+        for count in (0, 1, 5, 6):
+            with self.subTest(count=count):
+                chunks = list(stream_json(range(count), schema, key='rows', extra={'total': count}, chunk_size=3, factor=2))
+                self.assertEqual(len(chunks), 2 + -(-count // 3))
+                self.assertEqual(
+                    json.loads(b''.join(chunks)),
+                    json.loads(dumps({'total': count, 'rows': [{'n': n, 'double': n * 2} for n in range(count)]})),
+                )
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.requests = Counter('test_requests_total', "Requests.", ['view'], registry=self.registry)
+        self.open = Gauge('test_open', "Open connections.", registry=self.registry)
+        self.latency = Histogram('test_seconds', "Latency.", buckets=(0.1, 1.0), registry=self.registry)
+
+    def test_render_uses_the_text_exposition_format(self):
+        self.requests.inc(view='home')
+        self.requests.inc(2, view='home')
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.assertEqual(render(self.registry), '\n'.join([
+            '# HELP test_open Open connections.',
+            '# TYPE test_open gauge',
+            '# HELP test_requests_total Requests.',
+            '# TYPE test_requests_total counter',
+            'test_requests_total{view="home"} 3',
+            '# HELP test_seconds Latency.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1"} 2',
+            'test_seconds_bucket{le="+Inf"} 2',
+            'test_seconds_sum 0.55',
+            'test_seconds_count 2',
+        ]) + '\n')
+
+    def test_snapshots_of_other_processes_are_merged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        for pid in (os.getppid(), exited.pid):
+            with open(Path(directory) / f'metrics_{pid}.json', 'w') as f:
+                json.dump({'pid': pid, 'metrics': {
+                    'test_requests_total': [[['home'], 1]], 'test_open': [[[], 4]],
+                }}, f)
+        self.requests.inc(view='home')
+        self.open.set(1)
+        with self.settings(METRICS_DIR=directory):
+            merged = self.registry.collect()
+        # Counters add up over every file; gauges only over live processes.
+        self.assertEqual(merged['test_requests_total'][1], {('home',): 3})
+        self.assertEqual(merged['test_open'][1], {(): 5})
+
+    def test_scrapes_need_the_token_or_a_staff_user(self):
+        factory = RequestFactory()
+
+        def status(token, authorization=None, user=AnonymousUser()):
+            request = factory.get('/metrics', **({'HTTP_AUTHORIZATION': authorization} if authorization else {}))
+            request.user = user
+            with self.settings(METRICS_TOKEN=token):
+                return metrics_view(request).status_code
+
+        staff = get_user_model()(username='admin', is_staff=True)
+        self.assertEqual(status(''), 403)
+        self.assertEqual(status('', 'Bearer '), 403)
+        self.assertEqual(status('', user=staff), 200)
+        self.assertEqual(status('secret'), 403)
+        self.assertEqual(status('secret', 'Bearer wrong'), 403)
+        self.assertEqual(status('secret', 'Bearer secret'), 200)
+
+
+class MediaTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = HashedMediaStorage(location=self.root)
+
+    def test_hashed_names_fit_the_field(self):
+        name = self.storage.save(f"profile_pics/{'u' * 60}/{'p' * 60}.jpg", ContentFile(b'jpeg'), max_length=100)
+        self.assertLessEqual(len(name), 100)
+        self.assertTrue(is_hashed(name))
+        self.assertEqual(self.storage.save(f"profile_pics/{'u' * 60}/{'p' * 60}.jpg", ContentFile(b'jpeg'), max_length=100), name)
+
+    def test_front_server_headers_are_percent_encoded(self):
+        name = self.storage.save('posts/my photo?.jpg', ContentFile(b'jpeg'))
+        request = RequestFactory().get('/media/')
+        with override_settings(MEDIA_ROOT=self.root, MEDIA_ACCEL_REDIRECT='/protected-media/'):
+            response = serve_media(request, name)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + name.replace(' ', '%20').replace('?', '%3F'))
+        with override_settings(MEDIA_ROOT=self.root, MEDIA_SENDFILE_HEADER='X-Sendfile'):
+            response = serve_media(request, name)
+        self.assertTrue(response['X-Sendfile'].endswith('/posts/my%20photo%3F' + name[len('posts/my photo?'):]))
+
+
+class MediaAccessTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        User = get_user_model()
+        self.owner, self.friend, self.stranger = (
+            User.objects.create(username=name, college_email=f'{name}@poornima.org') for name in ('owner', 'friend', 'stranger')
+        )
+        Crush.objects.create(sender=self.owner, receiver=self.friend, is_mutual=True)
+        Crush.objects.create(sender=self.friend, receiver=self.owner, is_mutual=True)
+        self.name = HashedMediaStorage(location=self.root).save('posts/owner/beach.jpg', ContentFile(b'jpeg'))
+        self.post = Post.objects.create(user=self.owner, image=self.name, is_public=False)
+
+    def _get(self, user):
+        request = RequestFactory().get('/media/')
+        request.user = user
+        return serve_media(request, self.name)
+
+    def test_private_post_image_is_hidden_from_non_mutual_users(self):
+        for user in (self.stranger, AnonymousUser()):
+            with self.assertRaises(Http404):
+                self._get(user)
+        for user in (self.owner, self.friend):
+            self.assertEqual(self._get(user)['Cache-Control'], 'private, max-age=3600')
+
+    def test_public_post_image_is_cached_publicly(self):
+        self.post.is_public = True
+        self.post.save()
+        self.assertEqual(self._get(AnonymousUser())['Cache-Control'], 'public, max-age=31536000, immutable')
+
+
+@skipIf(pyarrow is None, "needs pyarrow")
+class ColumnarExportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.exporter = ColumnarExporter(directory)
+        User = get_user_model()
+        alice, bob = (User.objects.create(username=name, college_email=f'{name}@poornima.org') for name in ('alice', 'bob'))
+        self.messages = [Message.objects.create(sender=alice, receiver=bob, content=f'hi {i}') for i in range(3)]
+
+    def _exported_ids(self, name):
+        table = pyarrow.dataset.dataset(str(self.exporter.output / name), format='parquet').to_table()
+        return sorted(table.column('id').to_pylist())
+
+    def test_archived_messages_are_exported_in_archive_order(self):
+        low, _, high = (message.id for message in self.messages)
+        archive_batch([high])
+        self.assertEqual(self.exporter.export('archived_message')['rows'], 1)
+
+        # An older message archived after the watermark has passed its id.
+        archive_batch([low])
+        self.assertEqual(self.exporter.export('archived_message')['rows'], 1)
+        self.assertEqual(self.exporter.export('archived_message')['rows'], 0)
+        self.assertEqual(self._exported_ids('archived_message'), [low, high])
+
+    def test_full_export_of_an_empty_table_resets_the_watermark(self):
+        self.assertEqual(self.exporter.export('message')['rows'], 3)
+        Message.objects.all().delete()
+        self.assertEqual(self.exporter.export('message', full=True)['rows'], 0)
+        self.assertEqual(self.exporter.watermarks()['message'], 0)
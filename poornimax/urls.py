@@ -1,15 +1,21 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from . import urls
 from django.conf import settings
-from django.conf.urls.static import static
+
+from .media import serve_media
+from .metrics import metrics_view
+from .query_stats import query_stats_view
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
+    path('admin/query-stats/', query_stats_view, name='query_stats'),
     path('admin/', admin.site.urls),
     path('', include('poornima_site.urls')),
     path('accounts/', include('accounts.urls')), 
     path('feed/', include('feed.urls')),
     path('chat/', include('chat.urls', namespace='chat')),
 
-    
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Uploaded media, in production too (see poornimax/media.py).
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
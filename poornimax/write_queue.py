@@ -0,0 +1,158 @@
+"""
+A single writer thread per process for the SQLite database.
+
+SQLite allows one writer at a time. With several request threads and
+``database_sync_to_async`` executors writing at once, each waits for the
+lock (``busy_timeout``) and, past it, fails with "database is locked".
+Routing hot writes through one thread removes that contention inside a
+process: writes queue up in memory and the writer commits them in batches,
+one transaction (and one fsync) per batch, each write in its own savepoint
+so a failing write does not take the rest of the batch with it. On
+``poornimax.sqlite`` the batch transaction starts with ``BEGIN IMMEDIATE``:
+a write that reads first would otherwise fail with "database is locked" if
+another process (gunicorn worker) committed in between, and take every
+later write of its batch with it.
+
+    message = run_write(Message.objects.create, sender=..., receiver=..., content=...)
+    message = await arun_write(Message.objects.create, sender=..., receiver=..., content=...)
+
+Both return ``fn``'s result once the batch holding it has committed, and
+re-raise its exception. Enabled by ``settings.DB_WRITE_QUEUE`` (on by
+default for SQLite); when off they just call ``fn``. Called inside an
+``atomic()`` block, ``run_write`` also calls ``fn`` directly so the write
+stays part of the caller's transaction.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from poornimax.metrics import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 64
+
+WRITE_QUEUE_DEPTH = Gauge('poornimax_db_write_queue_depth', "Writes waiting for the database writer thread.")
+WRITE_QUEUE_BATCH = Histogram(
+    'poornimax_db_write_queue_batch_size', "Writes committed together in one writer transaction.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+_STOP = object()
+
+
+class WriteQueue:
+    def __init__(self, max_batch=MAX_BATCH):
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues ``fn(*args, **kwargs)`` for the writer thread and returns a ``Future``."""
+        future = Future()
+        self._ensure_started().put((future, fn, args, kwargs))
+        WRITE_QUEUE_DEPTH.inc()
+        return future
+
+    def stop(self, timeout=5.0):
+        """Lets the writer finish the queued writes and exit."""
+        with self._lock:
+            thread, pending = self._thread, self._queue
+            self._thread = self._queue = None
+        if thread is not None and self._pid == os.getpid():
+            pending.put(_STOP)
+            thread.join(timeout)
+
+    def is_writer_thread(self):
+        return self._thread is threading.current_thread()
+
+    def _ensure_started(self):
+        with self._lock:
+            # A forked worker inherits the queue but not the thread behind it.
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='db-writer', daemon=True,
+                )
+                self._thread.start()
+            return self._queue
+
+    def _run(self, pending):
+        # Only this thread's connection; see poornimax/sqlite/base.py.
+        connection.transaction_mode = 'IMMEDIATE'
+        while True:
+            batch = [pending.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is _STOP
+            batch = [item for item in batch if item is not _STOP]
+            if batch:
+                WRITE_QUEUE_DEPTH.dec(len(batch))
+                WRITE_QUEUE_BATCH.observe(len(batch))
+                self._write(batch)
+            if stopping:
+                connection.close()
+                return
+
+    def _write(self, batch):
+        close_old_connections()
+        results = []
+        try:
+            with transaction.atomic():
+                for future, fn, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append((future, fn(*args, **kwargs), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            logger.exception("Database writer batch failed to commit")
+            for future, _, _ in results:
+                future.set_exception(e)
+        else:
+            # Only now are the rows visible to other connections.
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        finally:
+            close_old_connections()
+
+
+writer = WriteQueue()
+atexit.register(writer.stop)
+
+
+def enabled():
+    return getattr(settings, 'DB_WRITE_QUEUE', False)
+
+
+def run_write(fn, *args, **kwargs):
+    """Runs ``fn`` on the writer thread and waits for its result."""
+    if not enabled() or writer.is_writer_thread() or transaction.get_connection().in_atomic_block:
+        return fn(*args, **kwargs)
+    return writer.submit(fn, *args, **kwargs).result()
+
+
+async def arun_write(fn, *args, **kwargs):
+    """Async counterpart of ``run_write``; the event loop is not blocked meanwhile."""
+    if not enabled():
+        return await database_sync_to_async(fn)(*args, **kwargs)
+    return await asyncio.wrap_future(writer.submit(fn, *args, **kwargs))
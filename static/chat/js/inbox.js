@@ -0,0 +1,410 @@
+// Loading animation
+window.addEventListener('load', function() {
+    setTimeout(function() {
+        const loader = document.getElementById('loaderContainer');
+        loader.style.opacity = '0';
+        setTimeout(function() {
+            loader.style.visibility = 'hidden';
+        }, 500);
+    }, 1000);
+});
+
+// Toast notification function
+function showToast(message, isError = false) {
+    const toast = document.createElement('div');
+    toast.className = `toast ${isError ? 'error' : 'success'}`;
+    toast.textContent = message;
+    document.body.appendChild(toast);
+
+    setTimeout(() => {
+        toast.classList.add('show');
+    }, 10);
+
+    setTimeout(() => {
+        toast.classList.remove('show');
+        setTimeout(() => {
+            toast.remove();
+        }, 300);
+    }, 3000);
+}
+
+// Get CSRF token from cookies
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Store previous chat order for animation comparison
+let previousChatOrder = [];
+
+// Real-time inbox updates with enhanced animations
+let lastUpdateTime = new Date().toISOString();
+let isRefreshing = false;
+let lastFullRefresh = 0;
+const FULL_REFRESH_INTERVAL = 30000;
+const QUICK_UPDATE_INTERVAL = 3000;
+
+function getCurrentChatOrder() {
+    const chatItems = document.querySelectorAll('.chat-item-wrapper');
+    return Array.from(chatItems).map(item => item.dataset.username);
+}
+
+function checkForNewMessages() {
+    if (isRefreshing) return;
+
+    fetch(`/chat/inbox_updates/?after=${encodeURIComponent(lastUpdateTime)}`, {
+        method: 'GET',
+        headers: {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        },
+        credentials: 'same-origin'
+    })
+    .then(response => {
+        if (!response.ok) throw new Error('Network response was not ok');
+        return response.json();
+    })
+    .then(data => {
+        if (data.error) {
+            console.error('Error:', data.error);
+            return;
+        }
+
+        if (data.updates) {
+            lastUpdateTime = data.last_update;
+
+            const needsFullRefresh = data.new_messages || data.deleted_chats;
+            const needsUnreadUpdate = data.read_messages || needsFullRefresh;
+
+            if (needsFullRefresh) {
+                // Store current order before refresh
+                previousChatOrder = getCurrentChatOrder();
+                refreshInboxContentWithAnimation();
+                lastFullRefresh = Date.now();
+            } else if (needsUnreadUpdate || (Date.now() - lastFullRefresh > FULL_REFRESH_INTERVAL)) {
+                updateUnreadStatus();
+            }
+        }
+    })
+    .catch(error => {
+        console.error('Error checking for updates:', error);
+        setTimeout(checkForNewMessages, 10000);
+    });
+}
+
+// Enhanced refresh function with animation detection
+function refreshInboxContentWithAnimation() {
+    if (isRefreshing) return;
+    isRefreshing = true;
+
+    const chatList = document.getElementById('chatList');
+
+    fetch('/chat/inbox_content/', {
+        method: 'GET',
+        headers: {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        },
+        credentials: 'same-origin'
+    })
+    .then(response => {
+        if (!response.ok) throw new Error('Network response was not ok');
+        return response.json();
+    })
+    .then(data => {
+        if (data.html) {
+            const tempDiv = document.createElement('div');
+            tempDiv.innerHTML = data.html;
+            const newChatItems = Array.from(tempDiv.querySelectorAll('.chat-item-wrapper'));
+            const newChatOrder = newChatItems.map(item => item.dataset.username);
+
+            const movedChats = detectMovedChats(previousChatOrder, newChatOrder);
+
+            if (movedChats.length > 0) {
+                animateInboxChanges(chatList, newChatItems, movedChats);
+            } else {
+                simpleRefresh(chatList, data.html);
+            }
+
+            previousChatOrder = newChatOrder;
+        }
+    })
+    .catch(error => {
+        console.error('Error refreshing inbox:', error);
+        showToast('Failed to refresh inbox', true);
+    })
+    .finally(() => {
+        isRefreshing = false;
+    });
+}
+
+// Detect which chats moved to the top (indicating new messages)
+function detectMovedChats(oldOrder, newOrder) {
+    const movedChats = [];
+
+    for (let i = 0; i < Math.min(3, newOrder.length); i++) {
+        const username = newOrder[i];
+        const oldIndex = oldOrder.indexOf(username);
+
+        if (oldIndex === -1 || oldIndex > i) {
+            movedChats.push({
+                username: username,
+                newPosition: i,
+                oldPosition: oldIndex === -1 ? 'new' : oldIndex,
+                isNew: oldIndex === -1
+            });
+        }
+    }
+
+    return movedChats;
+}
+
+// Animate inbox changes with bounce effects
+function animateInboxChanges(chatList, newChatItems, movedChats) {
+    chatList.innerHTML = '';
+    newChatItems.forEach(item => chatList.appendChild(item));
+
+    initializeEventListeners();
+
+    movedChats.forEach((chat, index) => {
+        const chatElement = chatList.querySelector(`[data-username="${chat.username}"]`);
+        if (chatElement) {
+            chatElement.classList.add('chat-new-message');
+            setTimeout(() => {
+                chatElement.classList.remove('chat-new-message');
+            }, 1000);
+        }
+    });
+}
+
+// Simple refresh for minor updates
+function simpleRefresh(chatList, newHtml) {
+    chatList.style.opacity = '0.7';
+    setTimeout(() => {
+        chatList.innerHTML = newHtml;
+        chatList.style.opacity = '1';
+        initializeEventListeners();
+    }, 200);
+}
+
+// Function to update only unread dots without full refresh
+function updateUnreadStatus() {
+    fetch('/chat/inbox_unread_status/', {
+        method: 'GET',
+        headers: {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        },
+        credentials: 'same-origin'
+    })
+    .then(response => {
+        if (!response.ok) throw new Error('Network response was not ok');
+        return response.json();
+    })
+    .then(data => {
+        if (data.unread_status) {
+            updateUnreadDots(data.unread_status);
+        }
+    })
+    .catch(error => {
+        console.error('Error updating unread status:', error);
+    });
+}
+
+// Function to update unread dots with animation
+function updateUnreadDots(unreadStatus) {
+    document.querySelectorAll('.chat-item-wrapper').forEach(wrapper => {
+        const username = wrapper.dataset.username;
+        const profileContainer = wrapper.querySelector('.profile-pic-container');
+        const existingDot = profileContainer.querySelector('.unread-dot');
+
+        if (unreadStatus[username]) {
+            if (!existingDot) {
+                const dot = document.createElement('span');
+                dot.className = 'unread-dot';
+                profileContainer.appendChild(dot);
+
+                dot.style.opacity = '0';
+                dot.style.transform = 'scale(0)';
+                setTimeout(() => {
+                    dot.style.transition = 'all 0.4s cubic-bezier(0.68, -0.55, 0.265, 1.55)';
+                    dot.style.opacity = '1';
+                    dot.style.transform = 'scale(1)';
+                }, 10);
+            }
+        } else {
+            if (existingDot) {
+                existingDot.style.transition = 'all 0.3s ease';
+                existingDot.style.opacity = '0';
+                existingDot.style.transform = 'scale(0)';
+                setTimeout(() => {
+                    existingDot.remove();
+                }, 300);
+            }
+        }
+    });
+}
+
+function refreshInboxContent() {
+    previousChatOrder = getCurrentChatOrder();
+    refreshInboxContentWithAnimation();
+}
+
+function initializeEventListeners() {
+    function closeAllDropdowns() {
+        document.querySelectorAll('.dropdown-menu').forEach(menu => {
+            menu.classList.remove('active');
+        });
+    }
+
+    document.querySelectorAll('.menu-dots').forEach(dot => {
+        dot.addEventListener('click', function(e) {
+            e.stopPropagation();
+            e.preventDefault();
+            const dropdown = this.nextElementSibling;
+            if (dropdown.classList.contains('active')) {
+                dropdown.classList.remove('active');
+            } else {
+                closeAllDropdowns();
+                dropdown.classList.add('active');
+            }
+        });
+    });
+
+    document.addEventListener('click', function() {
+        closeAllDropdowns();
+    });
+
+    const deleteModal = document.getElementById('deleteModal');
+    const cancelDelete = document.getElementById('cancelDelete');
+    const confirmDelete = document.getElementById('confirmDelete');
+
+    let currentUsername = null;
+
+    document.querySelectorAll('.delete-btn').forEach(button => {
+        button.addEventListener('click', function(e) {
+            e.preventDefault();
+            e.stopPropagation();
+            currentUsername = this.dataset.username;
+            deleteModal.classList.add('active');
+        });
+    });
+
+    cancelDelete.addEventListener('click', function(e) {
+        e.preventDefault();
+        deleteModal.classList.remove('active');
+        currentUsername = null;
+    });
+
+    confirmDelete.addEventListener('click', function(e) {
+        e.preventDefault();
+        if (currentUsername) {
+            const originalText = this.textContent;
+            this.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Deleting...';
+            this.disabled = true;
+
+            fetch(`/chat/delete/${currentUsername}/`, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken'),
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json'
+                },
+                credentials: 'same-origin'
+            })
+            .then(response => {
+                if (!response.ok) throw new Error('Network response was not ok');
+                return response.json();
+            })
+            .then(data => {
+                if (data.success) {
+                    showToast('Conversation deleted successfully');
+                    refreshInboxContent();
+                } else {
+                    showToast(data.error || 'Failed to delete conversation', true);
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                showToast('Failed to delete conversation. Please try again.', true);
+            })
+            .finally(() => {
+                deleteModal.classList.remove('active');
+                currentUsername = null;
+                confirmDelete.textContent = originalText;
+                confirmDelete.disabled = false;
+            });
+        }
+    });
+
+    deleteModal.addEventListener('click', function(e) {
+        if (e.target === this) {
+            deleteModal.classList.remove('active');
+            currentUsername = null;
+        }
+    });
+}
+
+// Polling system
+let messageCheckInterval;
+let unreadCheckInterval;
+
+function startPolling() {
+    messageCheckInterval = setInterval(checkForNewMessages, 5000);
+    unreadCheckInterval = setInterval(() => {
+        if (!isRefreshing && Date.now() - lastFullRefresh > 5000) {
+            updateUnreadStatus();
+        }
+    }, QUICK_UPDATE_INTERVAL);
+}
+
+function stopPolling() {
+    if (messageCheckInterval) clearInterval(messageCheckInterval);
+    if (unreadCheckInterval) clearInterval(unreadCheckInterval);
+}
+
+document.addEventListener('visibilitychange', function() {
+    if (document.hidden) {
+        stopPolling();
+        messageCheckInterval = setInterval(checkForNewMessages, 15000);
+    } else {
+        stopPolling();
+        startPolling();
+        setTimeout(() => {
+            checkForNewMessages();
+            updateUnreadStatus();
+        }, 500);
+    }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    setTimeout(() => {
+        previousChatOrder = getCurrentChatOrder();
+    }, 100);
+
+    initializeEventListeners();
+
+    setTimeout(() => {
+        startPolling();
+        lastFullRefresh = Date.now();
+    }, 2000);
+});
+
+if (typeof $ !== 'undefined') {
+    $.ajaxSetup({
+        beforeSend: function(xhr, settings) {
+            const csrftoken = document.querySelector('meta[name="csrf-token"]').getAttribute('content');
+            xhr.setRequestHeader("X-CSRFToken", csrftoken);
+        }
+    });
+}
@@ -0,0 +1,249 @@
+// Rendered values come from data-* attributes on this script's tag.
+const csrfToken = document.currentScript.dataset.csrfToken;
+
+// --- PAGE LOAD & UTILITIES ---
+document.addEventListener('DOMContentLoaded', () => {
+    setTimeout(() => document.getElementById('loaderContainer').classList.add('hidden'), 500);
+    document.getElementById('searchInput').addEventListener('input', debounce(handleSearch, 400));
+});
+
+function debounce(func, delay) {
+    let timeout;
+    return (...args) => { clearTimeout(timeout); timeout = setTimeout(() => func.apply(this, args), delay); };
+}
+
+// --- REAL-TIME USER SEARCH ---
+async function handleSearch(event) {
+    const query = event.target.value.trim();
+    const resultsContainer = document.getElementById('user-results');
+    if (query.length < 2) {
+        resultsContainer.innerHTML = '';
+        return;
+    }
+    try {
+        const response = await fetch(`/feed/api/search-users/?q=${encodeURIComponent(query)}`);
+        if (!response.ok) throw new Error(`Server responded with ${response.status}`);
+        const data = await response.json();
+        renderUsers(data.users);
+    } catch (error) {
+        console.error('Search error:', error);
+        resultsContainer.innerHTML = '<div class="no-results-card" style="color: #ef4444;">Error fetching results.</div>';
+    }
+}
+
+function renderUsers(users) {
+    const resultsContainer = document.getElementById('user-results');
+    if (users.length === 0) {
+        // Use the new styled card for no results
+        resultsContainer.innerHTML = '<div class="no-results-card">No users found for this search.</div>';
+    } else {
+        resultsContainer.innerHTML = users.map((user, index) => `
+            <a href="/feed/profile/${user.id}/" class="user-card" style="animation: fadeInUp 0.5s ease ${index * 60}ms forwards;">
+                <img src="${user.profile_picture_url}" alt="${user.username}" class="user-avatar">
+                <div class="user-info">
+                    <div class="name">${user.full_name}</div>
+                    <div class="detail">@${user.username}</div>
+                </div>
+            </a>
+        `).join('');
+    }
+}
+
+// --- INFINITE SCROLL FOR CONFESSIONS ---
+const confessionsSentinel = document.getElementById('confessionsSentinel');
+let loadingConfessions = false;
+
+async function loadMoreConfessions() {
+    const cursor = confessionsSentinel.dataset.nextCursor;
+    if (!cursor || loadingConfessions) return;
+    loadingConfessions = true;
+    try {
+        const response = await fetch(`/feed/lazy-load/confessions/?cursor=${encodeURIComponent(cursor)}`);
+        if (!response.ok) throw new Error(`Server responded with ${response.status}`);
+        const data = await response.json();
+        document.getElementById('confessionsGrid').insertAdjacentHTML('beforeend', data.html);
+        confessionsSentinel.dataset.nextCursor = data.next_cursor || '';
+        if (!data.has_more) confessionsObserver.disconnect();
+    } catch (error) {
+        console.error('Error loading confessions:', error);
+    } finally {
+        loadingConfessions = false;
+    }
+}
+
+const confessionsObserver = new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) loadMoreConfessions();
+}, { rootMargin: '300px' });
+if (confessionsSentinel.dataset.nextCursor) confessionsObserver.observe(confessionsSentinel);
+
+// --- LIKE FUNCTIONALITY ---
+async function likeConfession(event, confessionId) {
+    event.stopPropagation();
+    const button = event.currentTarget;
+    try {
+        const response = await fetch(`/feed/api/confession/like/`, {
+            method: 'POST',
+            headers: { 'X-CSRFToken': csrfToken, 'Content-Type': 'application/x-www-form-urlencoded' },
+            body: `confession_id=${confessionId}`
+        });
+        const data = await response.json();
+        button.querySelector('.like-count').textContent = data.like_count;
+        button.classList.toggle('liked', data.liked);
+        button.querySelector('i').classList.toggle('fas', data.liked);
+        button.querySelector('i').classList.toggle('far', !data.liked);
+    } catch (error) { console.error('Like error:', error); }
+}
+
+// --- COMMENT POPUP LOGIC ---
+let currentConfessionId = null;
+const popup = document.getElementById('commentPopup');
+let confessionStream = null;
+const renderedCommentIds = new Set();
+
+function renderConfessionComment(comment) {
+    return `
+        <div class="comment-item">
+            <img src="${comment.profile_picture_url}" alt="${comment.user}" class="comment-avatar">
+            <div class="comment-body">
+                <div>
+                    <span class="user">${comment.user}</span>
+                    <span class="time">${comment.time_since}</span>
+                </div>
+                <p class="content">${comment.content}</p>
+            </div>
+        </div>
+    `;
+}
+
+function appendConfessionComment(comment) {
+    if (comment.id && renderedCommentIds.has(comment.id)) return;
+    if (comment.id) renderedCommentIds.add(comment.id);
+    const commentListDiv = document.getElementById('commentList');
+    const placeholder = commentListDiv.querySelector('.no-results-card');
+    if (placeholder) placeholder.remove();
+    commentListDiv.insertAdjacentHTML('beforeend', renderConfessionComment(comment));
+}
+
+function setConfessionCount(confessionId, selector, value) {
+    const span = document.querySelector(`#confession-${confessionId} ${selector}`);
+    if (span) span.textContent = value;
+}
+
+// Live likes & comments for the open confession, pushed over a websocket.
+function openConfessionStream(confessionId) {
+    closeConfessionStream();
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    confessionStream = new WebSocket(`${scheme}://${window.location.host}/ws/feed/confession/${confessionId}/`);
+    confessionStream.onmessage = (e) => {
+        const data = JSON.parse(e.data);
+        if (data.type === 'likes') {
+            setConfessionCount(confessionId, '.like-count', data.like_count);
+        } else if (data.type === 'comment' && currentConfessionId === confessionId) {
+            appendConfessionComment(data.comment);
+            setConfessionCount(confessionId, '.comment-count', data.comment_count);
+        }
+    };
+}
+
+function closeConfessionStream() {
+    if (confessionStream) confessionStream.close();
+    confessionStream = null;
+}
+
+async function refreshComments(confessionId) {
+    const commentListDiv = document.getElementById('commentList');
+    const confessionContentDiv = document.getElementById('popupConfessionContent');
+
+    // Clear previous content and show loading state
+    commentListDiv.innerHTML = '<p class="no-results-card">Loading...</p>';
+    confessionContentDiv.innerHTML = '';
+
+    try {
+        const response = await fetch(`/feed/api/confession/${confessionId}/details/`);
+        if (!response.ok) throw new Error('Failed to fetch details');
+        const data = await response.json();
+
+        // Render the new confession UI in the popup
+        confessionContentDiv.innerHTML = `
+            <div class="popup-confession-content">
+                <div class="author-details">
+                    <img src="${data.confession.author_avatar}" alt="${data.confession.author}" class="author-avatar-popup">
+                    <span class="author-name-popup">${data.confession.author}</span>
+                </div>
+                <blockquote class="confession-quote">
+                    ${data.confession.content}
+                </blockquote>
+            </div>
+        `;
+
+        // Render the comments
+        renderedCommentIds.clear();
+        data.comments.forEach(comment => renderedCommentIds.add(comment.id));
+        if (data.comments.length > 0) {
+            commentListDiv.innerHTML = data.comments.map(renderConfessionComment).join('');
+        } else {
+            commentListDiv.innerHTML = '<p class="no-results-card">Be the first to comment!</p>';
+        }
+    } catch (error) {
+        console.error('Error fetching comments:', error);
+        commentListDiv.innerHTML = '<p class="no-results-card" style="color: #ef4444;">Could not load comments.</p>';
+    }
+}
+
+function openCommentPopup(confessionId) {
+    currentConfessionId = confessionId;
+    popup.classList.add('visible');
+    document.body.classList.add('popup-active');
+    openConfessionStream(confessionId);
+    refreshComments(confessionId);
+}
+
+function closeCommentPopup() {
+    popup.classList.remove('visible');
+    document.body.classList.remove('popup-active');
+    document.getElementById('commentForm').reset();
+    closeConfessionStream();
+    currentConfessionId = null;
+}
+
+// Using your original, functional logic for submitting comments
+async function submitComment(event) {
+    event.preventDefault();
+    const form = event.target;
+    const content = form.content.value.trim();
+    const submitButton = form.querySelector('.submit-comment-btn');
+
+    if (!content) return;
+
+    submitButton.disabled = true;
+    submitButton.textContent = 'Posting...';
+
+    try {
+        const response = await fetch(`/feed/api/confession/comment/`, {
+            method: 'POST',
+            headers: { 'X-CSRFToken': csrfToken, 'Content-Type': 'application/x-www-form-urlencoded' },
+            body: `confession_id=${currentConfessionId}&content=${encodeURIComponent(content)}&is_anonymous=${form.is_anonymous.checked}`
+        });
+        const data = await response.json();
+        if (data.success) {
+            form.reset(); 
+            appendConfessionComment(data.comment);
+            setConfessionCount(currentConfessionId, '.comment-count', data.comment_count);
+        } else {
+            alert('Error: ' + (data.error || 'Could not post comment.'));
+        }
+    } catch (error) {
+        console.error('Comment submission error:', error);
+        alert('An unexpected error occurred. Please try again.');
+    } finally {
+        submitButton.disabled = false;
+        submitButton.textContent = 'Post';
+    }
+}
+
+// Close popup with Escape key
+document.addEventListener('keydown', (event) => {
+    if (event.key === 'Escape' && popup.classList.contains('visible')) {
+        closeCommentPopup();
+    }
+});
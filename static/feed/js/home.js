@@ -0,0 +1,621 @@
+class LazyLoader {
+    constructor() {
+        this.postPage = 1;
+        this.isLoading = false;
+        this.hasMorePosts = true;
+        this.sectionsLoaded = new Set();
+
+        this.init();
+    }
+
+    init() {
+        this.setupIntersectionObserver();
+        this.loadInitialData();
+        this.setupEventListeners();
+    }
+
+    setupIntersectionObserver() {
+        this.observer = new IntersectionObserver((entries) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    entry.target.classList.add('visible');
+                }
+            });
+        }, {
+            threshold: 0.1,
+            rootMargin: '50px'
+        });
+    }
+
+    async loadInitialData() {
+        // Load horizontal sections with staggered timing for smooth experience
+        setTimeout(() => this.loadHorizontalSection('recently-joined'), 100);
+        setTimeout(() => this.loadHorizontalSection('same-year'), 300);
+        setTimeout(() => this.loadHorizontalSection('same-department'), 500);
+        setTimeout(() => this.loadHorizontalSection('same-college'), 700);
+
+        // Load initial posts
+        setTimeout(() => this.loadPosts(), 900);
+    }
+
+    async loadHorizontalSection(sectionType) {
+        if (this.sectionsLoaded.has(sectionType)) return;
+
+        const container = document.getElementById(`${sectionType}-container`);
+        if (!container) return;
+
+        try {
+            const response = await fetch(`/feed/lazy-load/${sectionType}/`);
+            if (!response.ok) throw new Error('Failed to load section');
+
+            const data = await response.json();
+
+            // Clear skeleton
+            container.innerHTML = '';
+
+            if (data.users && data.users.length > 0) {
+                data.users.forEach((user, index) => {
+                    const userCard = this.createUserCard(user);
+                    userCard.classList.add('fade-in');
+                    container.appendChild(userCard);
+
+                    // Observe for intersection
+                    this.observer.observe(userCard);
+
+                    // Staggered animation
+                    setTimeout(() => {
+                        userCard.classList.add('visible');
+                    }, index * 100);
+                });
+
+                // Update count
+                const countElement = document.getElementById(`${sectionType}-count`);
+                if (countElement) {
+                    countElement.textContent = data.users.length;
+                }
+            } else {
+                container.innerHTML = this.createEmptyCard(sectionType);
+            }
+
+            this.sectionsLoaded.add(sectionType);
+        } catch (error) {
+            console.error(`Error loading ${sectionType}:`, error);
+            container.innerHTML = this.createErrorCard();
+        }
+    }
+
+    createUserCard(user) {
+        const card = document.createElement('div');
+        card.className = 'user-card';
+        card.dataset.userId = user.id;
+
+        card.innerHTML = `
+            <a href="/feed/profile/${user.id}/" class="profile-link">
+                <div class="profile-pic-container">
+                    <img src="${user.profile_picture}" alt="Profile" class="profile-pic" loading="lazy">
+                </div>
+                <div class="user-info">
+                    <h3>${user.full_name}</h3>
+                    <p><i class="fas fa-graduation-cap"></i>${user.department || 'N/A'}</p>
+                    <p><i class="fas fa-university"></i>${user.college || 'N/A'}</p>
+                </div>
+            </a>
+            <form class="heart-form">
+                <input type="hidden" name="csrfmiddlewaretoken" value="${this.getCsrfToken()}">
+                ${this.createHeartButton(user.crush_status)}
+            </form>
+        `;
+
+        return card;
+    }
+
+    createHeartButton(crushStatus) {
+        const buttons = {
+            'mutual': '<button type="submit" name="crush_action" value="uncrush" class="heart-btn" title="Friend"><i class="fas fa-heart" style="color: #ef4444;"></i></button>',
+            'sent': '<button type="submit" name="crush_action" value="uncrush" class="heart-btn" title="Sent"><i class="fas fa-heart" style="color: #ff6584;"></i></button>',
+            'received': '<button type="submit" name="crush_action" value="send_crush" class="heart-btn" title="Send Heart Back"><i class="far fa-heart" style="color: rgba(255, 101, 132, 0.8);"></i></button>',
+            'none': '<button type="submit" name="crush_action" value="send_crush" class="heart-btn" title="Send Heart"><i class="far fa-heart" style="color: var(--text-light);"></i></button>'
+        };
+        return buttons[crushStatus] || buttons['none'];
+    }
+
+    createEmptyCard(sectionType) {
+        const messages = {
+            'recently-joined': '<i class="fas fa-door-open"></i><p>No new users recently.</p>',
+            'same-year': '<i class="fas fa-search-minus"></i><p>No one from your year has joined yet.</p>',
+            'same-department': '<i class="fas fa-users-slash"></i><p>Looks quiet... No users from your department found.</p>',
+            'same-college': '<i class="fas fa-school"></i><p>You\'re a pioneer! No other users from your college found.</p>'
+        };
+
+        return `<div class="empty-card fade-in visible">${messages[sectionType] || '<i class="fas fa-info-circle"></i><p>No users found.</p>'}</div>`;
+    }
+
+    createErrorCard() {
+        return '<div class="empty-card fade-in visible"><i class="fas fa-exclamation-triangle"></i><p>Failed to load content. Please try again later.</p></div>';
+    }
+
+    async loadPosts() {
+        if (this.isLoading) return;
+
+        this.isLoading = true;
+        const loadMoreBtn = document.getElementById('load-more-posts');
+        const btnText = loadMoreBtn.querySelector('.btn-text');
+        const loadingIcon = loadMoreBtn.querySelector('.loading-icon');
+
+        if (this.postPage > 1) {
+            btnText.style.display = 'none';
+            loadingIcon.style.display = 'inline-block';
+            loadingIcon.style.animation = 'spin 1s linear infinite';
+            loadMoreBtn.disabled = true;
+        }
+
+        try {
+            const response = await fetch(`/feed/lazy-load/posts/?page=${this.postPage}`);
+            if (!response.ok) throw new Error('Failed to load posts');
+
+            const data = await response.json();
+            const postGrid = document.getElementById('post-grid');
+
+            // Clear skeletons on first load
+            if (this.postPage === 1) {
+                postGrid.innerHTML = '';
+            }
+
+            if (data.posts && data.posts.length > 0) {
+                data.posts.forEach((post, index) => {
+                    const postCard = this.createPostCard(post);
+                    postCard.classList.add('fade-in');
+                    postGrid.appendChild(postCard);
+
+                    // Observe for intersection
+                    this.observer.observe(postCard);
+
+                    // Staggered animation
+                    setTimeout(() => {
+                        postCard.classList.add('visible');
+                    }, index * 150);
+                });
+
+                this.postPage++;
+                this.hasMorePosts = data.has_more;
+
+                // Show/hide load more button
+                if (this.hasMorePosts) {
+                    loadMoreBtn.style.display = 'block';
+                } else {
+                    loadMoreBtn.style.display = 'none';
+                }
+            } else if (this.postPage === 1) {
+                postGrid.innerHTML = '<div class="empty-card fade-in visible"><i class="fas fa-images"></i><p>The public feed is empty. Be the first to share something!</p></div>';
+                loadMoreBtn.style.display = 'none';
+            }
+        } catch (error) {
+            console.error('Error loading posts:', error);
+            if (this.postPage === 1) {
+                document.getElementById('post-grid').innerHTML = '<div class="empty-card fade-in visible"><i class="fas fa-exclamation-triangle"></i><p>Failed to load posts. Please try again later.</p></div>';
+            }
+        } finally {
+            this.isLoading = false;
+            if (loadMoreBtn) {
+                btnText.style.display = 'inline';
+                loadingIcon.style.display = 'none';
+                loadMoreBtn.disabled = false;
+            }
+        }
+    }
+
+    createPostCard(post) {
+        const card = document.createElement('div');
+        card.className = 'post-card';
+        card.id = `post-card-${post.id}`;
+
+        card.innerHTML = `
+            <div class="post-header">
+                <a href="/feed/profile/${post.user.id}/">
+                    <img src="${post.user.profile_picture}" alt="${post.user.username}'s avatar" class="post-user-avatar">
+                    <span>${post.user.full_name || post.user.username}</span>
+                </a>
+            </div>
+            <div class="post-image-container">
+                <img src="${post.image}" alt="Post by ${post.user.username}" class="post-image" loading="lazy">
+            </div>
+            <div class="post-actions">
+                <button class="post-action-btn like-btn ${post.is_liked ? 'liked' : ''}" data-post-id="${post.id}">
+                    <i class="${post.is_liked ? 'fas fa-heart' : 'far fa-heart'}"></i>
+                </button>
+                <button class="post-action-btn comment-btn" data-post-id="${post.id}">
+                    <i class="far fa-comment"></i>
+                </button>
+            </div>
+            ${post.caption ? `
+            <div class="post-caption">
+                <a href="/feed/profile/${post.user.id}/">${post.user.full_name || post.user.username}</a>
+                ${post.caption}
+            </div>
+            ` : ''}
+        `;
+
+        return card;
+    }
+
+    setupEventListeners() {
+        // Load more posts button
+        document.getElementById('load-more-posts').addEventListener('click', () => {
+            if (this.hasMorePosts && !this.isLoading) {
+                this.loadPosts();
+            }
+        });
+
+        // Smooth scrolling for arrows
+        document.addEventListener('click', (e) => {
+            const scrollArrow = e.target.closest('.scroll-arrow');
+            if (scrollArrow) {
+                const container = document.getElementById(scrollArrow.dataset.target);
+                if (container) {
+                    const scrollAmount = container.clientWidth * 0.8;
+                    const direction = scrollArrow.classList.contains('left') ? -1 : 1;
+
+                    container.scrollBy({
+                        left: scrollAmount * direction,
+                        behavior: 'smooth'
+                    });
+                }
+            }
+        });
+    }
+
+    getCsrfToken() {
+        return document.querySelector('[name=csrfmiddlewaretoken]').value;
+    }
+}
+
+// Main application logic
+document.addEventListener('DOMContentLoaded', function() {
+    const lazyLoader = new LazyLoader();
+    const getCsrfToken = () => document.querySelector('[name=csrfmiddlewaretoken]').value;
+    const commentModal = document.getElementById('comment-modal');
+    const commentForm = document.getElementById('comment-form');
+    const commentsListContainer = document.getElementById('comments-list-container');
+    const commentTextarea = document.querySelector('.comment-textarea');
+    const submitCommentBtn = document.getElementById('btn-submit-comment-id');
+    let activePostId = null;
+    let postStream = null;
+    const renderedCommentIds = new Set();
+
+    const appendComment = (comment) => {
+        if (comment.id && renderedCommentIds.has(comment.id)) return;
+        if (comment.id) renderedCommentIds.add(comment.id);
+        const noCommentsEl = commentsListContainer.querySelector('.no-comments');
+        if (noCommentsEl) noCommentsEl.remove();
+        commentsListContainer.insertAdjacentHTML('beforeend', renderComment(comment));
+        commentsListContainer.scrollTop = commentsListContainer.scrollHeight;
+    };
+
+    // Live comments for the open modal, pushed by the server over a websocket.
+    const openPostStream = (postId) => {
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        postStream = new WebSocket(`${scheme}://${window.location.host}/ws/feed/post/${postId}/`);
+        postStream.onmessage = (e) => {
+            const data = JSON.parse(e.data);
+            if (data.type === 'comment' && String(activePostId) === String(postId)) {
+                appendComment(data.comment);
+            }
+        };
+    };
+
+    const closePostStream = () => {
+        if (postStream) postStream.close();
+        postStream = null;
+    };
+
+    const renderComment = (comment) => {
+        return `
+            <div class="comment-item fade-in visible">
+                <img src="${comment.user.profile_picture_url || '/static/images/ann.png'}" alt="${comment.user.username}" class="comment-avatar">
+                <div class="comment-body">
+                    <strong>${comment.user.full_name || comment.user.username}</strong>
+                    <p>${comment.content}</p>
+                    <time>${new Date(comment.created_at).toLocaleString('en-IN', { timeZone: 'Asia/Kolkata', dateStyle: 'medium', timeStyle: 'short' })}</time>
+                </div>
+            </div>`;
+    };
+
+    const openCommentModal = async (postId) => {
+        activePostId = postId;
+        commentModal.classList.add('active');
+        document.body.style.overflow = 'hidden';
+        commentsListContainer.innerHTML = '<div class="loading-spinner"><i class="fas fa-spinner"></i></div>';
+        renderedCommentIds.clear();
+        closePostStream();
+        openPostStream(postId);
+
+        try {
+            const response = await fetch(`/feed/post/${postId}/comments/`);
+            if (!response.ok) throw new Error(`Network response was not ok (${response.status})`);
+            const data = await response.json();
+
+            if (data.comments && data.comments.length > 0) {
+                data.comments.forEach(comment => renderedCommentIds.add(comment.id));
+                commentsListContainer.innerHTML = data.comments.map(renderComment).join('');
+            } else {
+                commentsListContainer.innerHTML = '<div class="no-comments"><p>No comments yet. Be the first!</p></div>';
+            }
+        } catch (error) {
+            console.error('Failed to fetch comments:', error);
+            commentsListContainer.innerHTML = '<div class="no-comments"><p>Could not load comments.</p></div>';
+        }
+    };
+
+    const closeCommentModal = () => {
+        commentModal.classList.remove('active');
+        document.body.style.overflow = 'auto';
+        commentForm.reset();
+        activePostId = null;
+        closePostStream();
+        submitCommentBtn.disabled = true;
+    };
+
+    const handleHeartFormSubmit = (form) => {
+        const button = form.querySelector('.heart-btn');
+        const userCard = form.closest('.user-card');
+        if (!userCard) return;
+
+        const userId = userCard.dataset.userId;
+        const action = button.value;
+        const url = `/feed/crush_action/${userId}/`;
+        const formData = new FormData(form);
+        formData.append(button.name, button.value);
+
+        // Add loading state
+        const originalIcon = button.innerHTML;
+        button.innerHTML = '<i class="fas fa-spinner" style="animation: spin 1s linear infinite;"></i>';
+        button.disabled = true;
+
+        fetch(url, { method: 'POST', body: formData })
+            .then(res => {
+                if (!res.ok) return Promise.reject(res);
+                return res.json();
+            })
+            .then(data => {
+                if (data.status === 'ok') {
+                    document.getElementById('hearts-sent-stat').textContent = data.stats.hearts_sent;
+                    document.getElementById('hearts-received-stat').textContent = data.stats.hearts_received;
+                    document.getElementById('friends-stat').textContent = data.stats.friends;
+
+                    const icon = button.querySelector('i');
+                    switch (data.new_crush_status) {
+                        case 'mutual': 
+                            button.value = 'uncrush'; 
+                            button.innerHTML = '<i class="fas fa-heart" style="color: #ef4444;"></i>';
+                            break;
+                        case 'sent': 
+                            button.value = 'uncrush'; 
+                            button.innerHTML = '<i class="fas fa-heart" style="color: #ff6584;"></i>';
+                            break;
+                        case 'received': 
+                            button.value = 'send_crush'; 
+                            button.innerHTML = '<i class="far fa-heart" style="color: rgba(255, 101, 132, 0.8);"></i>';
+                            break;
+                        default: 
+                            button.value = 'send_crush'; 
+                            button.innerHTML = '<i class="far fa-heart" style="color: var(--text-light);"></i>';
+                            break;
+                    }
+                } else {
+                    alert(`Error: ${data.message}`);
+                    button.innerHTML = originalIcon;
+                }
+            })
+            .catch(err => {
+                console.error('Action error:', err);
+                button.innerHTML = originalIcon;
+            })
+            .finally(() => {
+                button.disabled = false;
+            });
+    };
+
+    const handlePostLike = (button) => {
+        const postId = button.dataset.postId;
+        const originalIcon = button.innerHTML;
+
+        // Add loading state
+        button.innerHTML = '<i class="fas fa-spinner" style="animation: spin 1s linear infinite;"></i>';
+        button.disabled = true;
+
+        fetch(`/feed/post/${postId}/like/`, { 
+            method: 'POST', 
+            headers: { 'X-CSRFToken': getCsrfToken() }
+        })
+        .then(res => res.ok ? res.json() : Promise.reject('Failed to like post'))
+        .then(data => {
+            if (data.success) {
+                button.classList.toggle('liked', data.liked);
+                button.innerHTML = `<i class="${data.liked ? 'fas fa-heart' : 'far fa-heart'}"></i>`;
+            } else {
+                button.innerHTML = originalIcon;
+            }
+        })
+        .catch(err => {
+            console.error('Like error:', err);
+            button.innerHTML = originalIcon;
+        })
+        .finally(() => {
+            button.disabled = false;
+        });
+    };
+
+    const handleCommentSubmit = (event) => {
+        event.preventDefault();
+        if (!activePostId || submitCommentBtn.disabled) return;
+
+        const originalContent = submitCommentBtn.innerHTML;
+        submitCommentBtn.innerHTML = '<i class="fas fa-spinner" style="animation: spin 1s linear infinite;"></i>';
+        submitCommentBtn.disabled = true;
+
+        fetch(`/feed/post/${activePostId}/comment/`, { 
+            method: 'POST', 
+            body: new FormData(commentForm) 
+        })
+        .then(res => res.ok ? res.json() : Promise.reject('Failed to submit comment'))
+        .then(data => {
+            if (data.success && data.comment) {
+                appendComment(data.comment);
+                commentForm.reset();
+                commentTextarea.style.height = 'auto';
+            } else { 
+                alert("Error: " + (data.error || "Could not post comment.")); 
+            }
+        })
+        .catch(err => {
+            console.error('Comment submit error:', err);
+            alert('Failed to post comment. Please try again.');
+        })
+        .finally(() => {
+            submitCommentBtn.innerHTML = originalContent;
+            submitCommentBtn.disabled = true;
+        });
+    };
+
+    // Event Delegation for Dynamic Content
+    document.body.addEventListener('click', (e) => {
+        const likeBtn = e.target.closest('.like-btn');
+        const commentBtn = e.target.closest('.comment-btn');
+
+        if (likeBtn && !likeBtn.disabled) {
+            handlePostLike(likeBtn);
+        } else if (commentBtn) {
+            openCommentModal(commentBtn.dataset.postId);
+        } else if (e.target.matches('.modal-close-btn') || e.target.matches('.modal-overlay')) {
+            closeCommentModal();
+        }
+    });
+
+    document.body.addEventListener('submit', (e) => {
+        if (e.target.matches('.heart-form')) {
+            e.preventDefault();
+            const button = e.target.querySelector('.heart-btn');
+            if (!button.disabled) {
+                handleHeartFormSubmit(e.target);
+            }
+        } else if (e.target.matches('#comment-form')) {
+            handleCommentSubmit(e);
+        }
+    });
+
+    commentTextarea.addEventListener('input', () => {
+        commentTextarea.style.height = 'auto';
+        commentTextarea.style.height = (commentTextarea.scrollHeight) + 'px';
+        submitCommentBtn.disabled = commentTextarea.value.trim() === '';
+    });
+
+    // Periodic updates
+    const fetchUpdates = () => {
+        fetch('/feed/get-home-updates/')
+            .then(res => res.ok ? res.json() : Promise.reject(res))
+            .then(data => {
+                document.getElementById('hearts-sent-stat').textContent = data.stats.hearts_sent;
+                document.getElementById('hearts-received-stat').textContent = data.stats.hearts_received;
+                document.getElementById('friends-stat').textContent = data.stats.friends;
+                document.getElementById('profile-views-stat').textContent = data.stats.profile_views;
+            }).catch(err => console.error('Polling error:', err));
+    };
+    setInterval(fetchUpdates, 30000);
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('=== POST LOADING DEBUG STARTED ===');
+
+    // Test 1: Check if elements exist
+    const postGrid = document.getElementById('post-grid');
+    const loadMoreBtn = document.getElementById('load-more-posts');
+
+    console.log('Post grid element:', postGrid);
+    console.log('Load more button:', loadMoreBtn);
+
+    if (!postGrid) {
+        console.error('ERROR: post-grid element not found!');
+        return;
+    }
+
+    // Test 2: Manual fetch to debug endpoint
+    console.log('Testing debug endpoint...');
+    fetch('/feed/debug-posts/')  // You'll need to add this URL
+        .then(response => {
+            console.log('Debug response status:', response.status);
+            return response.json();
+        })
+        .then(data => {
+            console.log('Debug data:', data);
+        })
+        .catch(error => {
+            console.error('Debug fetch error:', error);
+        });
+
+    // Test 3: Manual fetch to lazy load endpoint
+    console.log('Testing lazy load endpoint...');
+    fetch('/feed/lazy-load/posts/?page=1')
+        .then(response => {
+            console.log('Lazy load response status:', response.status);
+            console.log('Response headers:', [...response.headers.entries()]);
+            return response.text(); // Get as text first to see raw response
+        })
+        .then(text => {
+            console.log('Raw response:', text);
+            try {
+                const data = JSON.parse(text);
+                console.log('Parsed JSON:', data);
+
+                if (data.posts && data.posts.length > 0) {
+                    console.log('SUCCESS: Found', data.posts.length, 'posts');
+                    console.log('First post:', data.posts[0]);
+                } else {
+                    console.log('WARNING: No posts in response');
+                }
+            } catch (e) {
+                console.error('JSON parse error:', e);
+            }
+        })
+        .catch(error => {
+            console.error('Lazy load fetch error:', error);
+        });
+
+    // Test 4: Check if LazyLoader is working
+    setTimeout(() => {
+        if (window.lazyLoader) {
+            console.log('LazyLoader instance exists');
+        } else {
+            console.error('LazyLoader instance not found');
+        }
+
+        // Check post grid content
+        const postGridContent = postGrid.innerHTML;
+        console.log('Post grid content length:', postGridContent.length);
+        console.log('Post grid content preview:', postGridContent.substring(0, 200));
+
+        if (postGridContent.includes('skeleton')) {
+            console.log('Still showing skeleton - posts may not have loaded');
+        }
+
+        if (postGridContent.includes('empty-card')) {
+            console.log('Showing empty card - no posts found');
+        }
+
+        console.log('=== POST LOADING DEBUG COMPLETED ===');
+    }, 2000);
+});
+
+// Enhanced error logging for fetch requests
+const originalFetch = window.fetch;
+window.fetch = function(...args) {
+    console.log('FETCH REQUEST:', args[0]);
+    return originalFetch.apply(this, args)
+        .then(response => {
+            console.log('FETCH RESPONSE:', args[0], 'Status:', response.status);
+            return response;
+        })
+        .catch(error => {
+            console.error('FETCH ERROR:', args[0], error);
+            throw error;
+        });
+};
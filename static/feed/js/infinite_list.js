@@ -0,0 +1,33 @@
+// Infinite scroll for the hearts, friends and all-users pages. The sentinel
+// below the grid carries the lazy-load URL and the cursor of the next page;
+// each response appends rendered cards to the grid and hands back the next cursor.
+(() => {
+    const sentinel = document.getElementById('infiniteListSentinel');
+    if (!sentinel) return;
+    const grid = document.getElementById(sentinel.dataset.target);
+    let loading = false;
+
+    async function loadMore() {
+        const cursor = sentinel.dataset.nextCursor;
+        if (!cursor || loading) return;
+        loading = true;
+        try {
+            const url = sentinel.dataset.url;
+            const response = await fetch(`${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}`);
+            if (!response.ok) throw new Error(`Server responded with ${response.status}`);
+            const data = await response.json();
+            grid.insertAdjacentHTML('beforeend', data.html);
+            sentinel.dataset.nextCursor = data.next_cursor || '';
+            if (!data.has_more) observer.disconnect();
+        } catch (error) {
+            console.error('Error loading more cards:', error);
+        } finally {
+            loading = false;
+        }
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMore();
+    }, { rootMargin: '300px' });
+    if (sentinel.dataset.nextCursor) observer.observe(sentinel);
+})();
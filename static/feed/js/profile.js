@@ -0,0 +1,288 @@
+// Rendered URLs and values come from data-* attributes on this script's tag.
+const pageConfig = document.currentScript.dataset;
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+const csrftoken = getCookie('csrftoken');
+
+const postOverlay = document.getElementById('postOverlay');
+const closeOverlayBtn = document.getElementById('closeOverlay');
+function closePostOverlay() {
+    postOverlay.classList.remove('active');
+    document.body.classList.remove('overlay-active');
+    closePostStream();
+}
+
+// --- Live likes & comments for the open post ---
+let postStream = null;
+const renderedCommentIds = new Set();
+
+function prependComment(comment) {
+    if (comment.id && renderedCommentIds.has(comment.id)) return;
+    if (comment.id) renderedCommentIds.add(comment.id);
+    const commentsContainer = document.getElementById('commentsContainer');
+    const noCommentsEl = commentsContainer.querySelector('p');
+    if (noCommentsEl) noCommentsEl.remove();
+
+    const commentEl = document.createElement('div');
+    commentEl.className = 'comment new-comment-animation';
+    commentEl.innerHTML = `
+        <img src="${comment.user.profile_picture_url}" alt="${comment.user.username}" class="comment-user-img">
+        <div class="comment-content">
+            <span class="comment-username">${comment.user.username}</span>
+            <p class="comment-text">${comment.content}</p>
+            <div class="comment-time">${moment(comment.created_at).fromNow()}</div>
+        </div>`;
+    commentsContainer.prepend(commentEl);
+}
+
+function openPostStream(postId) {
+    closePostStream();
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    postStream = new WebSocket(`${scheme}://${window.location.host}/ws/feed/post/${postId}/`);
+    postStream.onmessage = (e) => {
+        const data = JSON.parse(e.data);
+        if (data.type === 'likes') {
+            document.getElementById('likeCount').textContent = `${data.likes_count} likes`;
+        } else if (data.type === 'comment') {
+            prependComment(data.comment);
+        }
+    };
+}
+
+function closePostStream() {
+    if (postStream) postStream.close();
+    postStream = null;
+}
+if (closeOverlayBtn) closeOverlayBtn.addEventListener('click', closePostOverlay);
+if (postOverlay) postOverlay.addEventListener('click', (e) => { if (e.target === postOverlay) closePostOverlay(); });
+
+async function openPostOverlay(postId) {
+    try {
+        const response = await fetch(pageConfig.postDataUrl.replace('0', postId));
+        if (!response.ok) throw new Error('Network response was not ok');
+        const data = await response.json();
+
+        if (data.success) {
+            const post = data.post;
+            document.getElementById('overlayPostImage').src = post.image;
+            document.getElementById('overlayUserImage').src = post.user_image;
+            document.getElementById('overlayUsername').textContent = post.username;
+            document.getElementById('overlayTime').textContent = post.time;
+            document.getElementById('overlayCaption').textContent = post.caption;
+            document.getElementById('likeCount').textContent = `${post.likes_count} likes`;
+
+            document.getElementById('likeForm').action = pageConfig.likeUrl.replace('0', postId);
+            document.getElementById('commentForm').action = pageConfig.commentUrl.replace('0', postId);
+
+            const likeBtn = document.getElementById('likeButton');
+            const likeIcon = document.getElementById('likeIcon');
+            likeBtn.classList.toggle('active', post.liked);
+            likeIcon.classList.toggle('fas', post.liked);
+            likeIcon.classList.toggle('far', !post.liked);
+
+            const commentsContainer = document.getElementById('commentsContainer');
+            commentsContainer.innerHTML = '';
+            renderedCommentIds.clear();
+            post.comments.forEach(comment => renderedCommentIds.add(comment.id));
+
+            if (post.comments.length === 0) {
+                commentsContainer.innerHTML = '<p style="text-align: center; color: var(--text-light); padding: 20px;">Be the first to comment!</p>';
+            } else {
+                post.comments.forEach(comment => {
+                    const commentEl = document.createElement('div');
+                    commentEl.className = 'comment';
+                    commentEl.innerHTML = `
+                        <a href="#"><img src="${comment.user_image}" alt="${comment.username}" class="comment-user-img"></a>
+                        <div class="comment-content">
+                            <a href="#"><span class="comment-username">${comment.username}</span></a>
+                            <p class="comment-text">${comment.content}</p>
+                            <div class="comment-time">${moment(comment.created_at).fromNow()}</div>
+                        </div>`;
+                    commentsContainer.appendChild(commentEl);
+                });
+            }
+
+            postOverlay.classList.add('active');
+            document.body.classList.add('overlay-active');
+            openPostStream(postId);
+        } else {
+            alert('Error loading post: ' + data.error);
+        }
+    } catch (error) {
+        console.error('Error fetching post data:', error);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    particlesJS('particles-js', { particles: { number: { value: 50 }, color: { value: "#007bff" }, shape: { type: "circle" }, opacity: { value: 0.4, random: true }, size: { value: 3, random: true }, line_linked: { enable: true, distance: 150, color: "#007bff", opacity: 0.2, width: 1 }, move: { enable: true, speed: 2, direction: "none", out_mode: "out" } }, interactivity: { detect_on: "canvas", events: { onhover: { enable: true, mode: "grab" }, onclick: { enable: false } }, modes: { grab: { distance: 140, line_linked: { opacity: 0.5 } } } } });
+
+    const chartEl = document.getElementById('compatibilityChart');
+    if (chartEl) {
+        const score = parseInt(pageConfig.compatibilityScore);
+        const primaryColor = getComputedStyle(document.documentElement).getPropertyValue('--primary').trim();
+        new Chart(chartEl.getContext('2d'), {
+            type: 'doughnut',
+            data: { datasets: [{ data: [score, 100 - score], backgroundColor: [primaryColor, 'rgba(128, 128, 128, 0.1)'], borderWidth: 0, cutout: '75%' }] },
+            options: { responsive: true, maintainAspectRatio: false, plugins: { legend: { display: false }, tooltip: { enabled: false } }, animation: { animateRotate: true, animateScale: true, duration: 1500 } }
+        });
+    }
+
+    const likeForm = document.getElementById('likeForm');
+    if (likeForm) {
+        likeForm.addEventListener('submit', async function(e) {
+            e.preventDefault();
+            try {
+                const response = await fetch(likeForm.action, {
+                    method: 'POST', body: new FormData(likeForm), headers: { 'X-CSRFToken': csrftoken, 'X-Requested-With': 'XMLHttpRequest' }
+                });
+                const data = await response.json();
+                if (data.success) {
+                    document.getElementById('likeCount').textContent = `${data.likes_count} likes`;
+                    const likeBtn = document.getElementById('likeButton');
+                    const likeIcon = document.getElementById('likeIcon');
+                    likeBtn.classList.toggle('active', data.liked);
+                    likeIcon.classList.toggle('fas', data.liked);
+                    likeIcon.classList.toggle('far', !data.liked);
+                }
+            } catch (error) { console.error('Like Action Error:', error); }
+        });
+    }
+
+    const commentForm = document.getElementById('commentForm');
+    if (commentForm) {
+        commentForm.addEventListener('submit', async function(e) {
+            e.preventDefault();
+            const contentInput = commentForm.querySelector('input[name="content"]');
+            if (!contentInput.value.trim()) return;
+
+            try {
+                const response = await fetch(commentForm.action, {
+                    method: 'POST', body: new FormData(commentForm), headers: { 'X-CSRFToken': csrftoken, 'X-Requested-with': 'XMLHttpRequest' }
+                });
+                const data = await response.json();
+                if (data.success) {
+                    prependComment(data.comment);
+                    contentInput.value = '';
+                }
+            } catch (error) { console.error('Comment Action Error:', error); }
+        });
+    }
+
+    // --- FIXED: AJAX Crush Button Handler ---
+    const crushButtonContainer = document.getElementById('crushButtonContainer');
+    if (crushButtonContainer) {
+        crushButtonContainer.addEventListener('click', async function(e) {
+            if (e.target.matches('button[data-action]') || e.target.closest('button[data-action]')) {
+                e.preventDefault();
+
+                const button = e.target.matches('button[data-action]') ? e.target : e.target.closest('button[data-action]');
+                const action = button.getAttribute('data-action');
+
+                // Add loading state
+                button.classList.add('loading');
+                const originalHTML = button.innerHTML;
+                button.innerHTML = '<i class="fas fa-spinner"></i> Processing...';
+
+                try {
+                    // Create FormData with the correct parameter name
+                    const formData = new FormData();
+                    formData.append('crush_action', action);
+
+                    const response = await fetch(pageConfig.crushActionUrl, {
+                        method: 'POST',
+                        body: formData,
+                        headers: { 
+                            'X-CSRFToken': csrftoken, 
+                            'X-Requested-With': 'XMLHttpRequest' 
+                        }
+                    });
+
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! status: ${response.status}`);
+                    }
+
+                    const data = await response.json();
+
+                    if (data.status === 'ok') {
+                        // Update button based on new state
+                        const messageButton = document.getElementById('messageButton');
+                        const postsSection = document.querySelector('.posts-section');
+                        const privatePostsMessage = document.getElementById('privatePostsMessage');
+                        const privateMessageStatus = document.getElementById('privateMessageStatus');
+
+                        let newButtonHTML = '';
+                        let newButtonClass = '';
+                        let newButtonAction = '';
+
+                        if (data.is_mutual) {
+                            newButtonHTML = '<i class="fas fa-heart"></i> Mutual Crush';
+                            newButtonClass = 'heart-btn btn-mutual';
+                            newButtonAction = 'uncrush';
+                            if (messageButton) messageButton.style.display = 'flex';
+                            if (postsSection) postsSection.style.display = 'block';
+                            if (privatePostsMessage) privatePostsMessage.style.display = 'none';
+                        } else if (data.sent_crush) {
+                            newButtonHTML = '<i class="fas fa-heart-crack"></i> Crush Sent';
+                            newButtonClass = 'heart-btn btn-sent';
+                            newButtonAction = 'uncrush';
+                            if (privateMessageStatus) privateMessageStatus.textContent = "You've sent a crush. Waiting for them to accept.";
+                            if (messageButton) messageButton.style.display = 'none';
+                            if (postsSection) postsSection.style.display = 'none';
+                            if (privatePostsMessage) privatePostsMessage.style.display = 'block';
+                        } else if (data.received_crush) {
+                            newButtonHTML = '<i class="fas fa-heart-pulse"></i> Crush Back';
+                            newButtonClass = 'heart-btn btn-received';
+                            newButtonAction = 'accept_crush';
+                            if (privateMessageStatus) privateMessageStatus.textContent = "They sent you a crush. Crush back to connect!";
+                            if (messageButton) messageButton.style.display = 'none';
+                            if (postsSection) postsSection.style.display = 'none';
+                            if (privatePostsMessage) privatePostsMessage.style.display = 'block';
+                        } else {
+                            newButtonHTML = '<i class="far fa-heart"></i> Send Crush';
+                            newButtonClass = 'heart-btn btn-send';
+                            newButtonAction = 'send_crush';
+                            if (privateMessageStatus) privateMessageStatus.textContent = "Send a crush to connect!";
+                            if (messageButton) messageButton.style.display = 'none';
+                            if (postsSection) postsSection.style.display = 'none';
+                            if (privatePostsMessage) privatePostsMessage.style.display = 'block';
+                        }
+
+                        // Update the button
+                        button.className = newButtonClass;
+                        button.setAttribute('data-action', newButtonAction);
+                        button.innerHTML = newButtonHTML;
+
+                    } else {
+                        // Handle error response
+                        console.error('Server error:', data.message);
+                        alert('Error: ' + (data.message || 'Something went wrong'));
+                        // Restore original button state
+                        button.innerHTML = originalHTML;
+                    }
+
+                } catch (error) {
+                    console.error('Crush Action Error:', error);
+                    alert('Network error. Please try again.');
+                    // Restore original button state
+                    button.innerHTML = originalHTML;
+                } finally {
+                    // Remove loading state
+                    button.classList.remove('loading');
+                }
+            }
+        });
+    }
+});